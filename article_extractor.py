@@ -0,0 +1,187 @@
+# Parallel full-text extraction (newspaper3k) with timeouts and per-host limits
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import metrics
+from host_throttle import HostThrottle, host_of
+from http_client import HttpClient, shared_client
+from text_cache import TextCache
+
+logger = logging.getLogger(__name__)
+
+BROWSER_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+class ResponseTooLarge(Exception):
+    """Raised when an article page exceeds the configured maximum size."""
+
+
+def download_html(url: str, timeout: float = 15, max_bytes: int = 5 * 1024 * 1024, client: HttpClient = None) -> str:
+    """Downloads an article page over the shared client, refusing bodies larger than `max_bytes` (decompressed)."""
+    with (client or shared_client()).get(url, headers={'User-Agent': BROWSER_USER_AGENT}, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        declared_length = response.headers.get('Content-Length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+            raise ResponseTooLarge(f"{declared_length} bytes (limit {max_bytes})")
+        body = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                raise ResponseTooLarge(f"more than {max_bytes} bytes")
+        from email.message import Message # Same charset parsing urllib's response headers used
+        content_type = Message()
+        content_type['Content-Type'] = response.headers.get('Content-Type', '')
+        charset = content_type.get_content_charset() or 'utf-8'
+    try:
+        return body.decode(charset, errors='replace')
+    except LookupError: # Unknown charset name
+        return body.decode('utf-8', errors='replace')
+
+
+_article_class = None
+
+
+def newspaper_article_class():
+    """newspaper3k's Article class, imported on first use (the import alone takes ~0.2 s)."""
+    global _article_class
+    if _article_class is None:
+        from newspaper import Article # Heavy import, only needed by extraction workers
+        _article_class = Article
+    return _article_class
+
+
+def parse_article_html(url: str, html: str) -> str:
+    """Runs newspaper3k's parser on already downloaded HTML and returns the article text."""
+    article_parser = newspaper_article_class()(url)
+    article_parser.download(input_html=html)
+    article_parser.parse()
+    return article_parser.text
+
+
+class ArticleExtractor:
+    """
+    Bounded worker pool for newspaper3k extraction.
+    - `max_workers` articles are downloaded/parsed at the same time,
+    - at most `per_host_limit` of them against the same host,
+    - each HTTP request times out after `request_timeout` seconds and bodies above `max_bytes` are refused,
+    - callers stop waiting for an article after `deadline` seconds and fall back to the summary.
+    With a `text_cache`, previously extracted articles are served from disk without any download.
+    Pages are downloaded over `client` (the shared HTTP client by default), so connections
+    opened for a host's feed are reused for its articles.
+    Outcomes are counted per host for the end-of-run report.
+    """
+
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 2, request_timeout: float = 15,
+                 deadline: float = 30, max_bytes: int = 5 * 1024 * 1024, text_cache: TextCache = None,
+                 client: HttpClient = None):
+        self.text_cache = text_cache
+        self.client = client
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.throttle = HostThrottle(max_per_host=per_host_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="extract")
+        self._executor.submit(newspaper_article_class) # Import newspaper3k while the feeds are still downloading
+        self._stats_lock = threading.Lock()
+        self.host_stats = {}
+
+    def _record(self, host: str, outcome: str, seconds: float = 0.0, num_bytes: int = 0):
+        metrics.registry.inc('rss_extraction_total', host=host, outcome=outcome)
+        if outcome != 'deadline_missed':
+            metrics.registry.observe('rss_extraction_seconds', seconds, host=host)
+        with self._stats_lock:
+            stats = self.host_stats.setdefault(host, {
+                'ok': 0, 'failed': 0, 'deadline_missed': 0, 'seconds': 0.0, 'bytes': 0,
+                'first_start': None, 'last_finish': None,
+            })
+            stats[outcome] += 1
+            stats['seconds'] += seconds
+            stats['bytes'] += num_bytes
+            if outcome != 'deadline_missed':
+                now = time.monotonic()
+                if stats['first_start'] is None or now - seconds < stats['first_start']:
+                    stats['first_start'] = now - seconds
+                stats['last_finish'] = now
+
+    def _extract(self, url: str, feed: str = None, cache_key: str = None):
+        host = host_of(url)
+        with self.throttle.slot(url):
+            started = time.monotonic()
+            try:
+                html = download_html(url, timeout=self.request_timeout, max_bytes=self.max_bytes, client=self.client)
+                text = parse_article_html(url, html)
+            except Exception as e:
+                self._record(host, 'failed', time.monotonic() - started)
+                metrics.registry.observe('rss_stage_seconds', time.monotonic() - started, stage='extract', feed=feed)
+                logger.warning(f"Newspaper3k error for {url}: {e}. Falling back to summary for analysis.",
+                               extra={'url': url, 'feed': feed, 'host': host})
+                return None
+            self._record(host, 'ok', time.monotonic() - started, len(html))
+            metrics.registry.observe('rss_stage_seconds', time.monotonic() - started, stage='extract', feed=feed)
+        if self.text_cache is not None and text:
+            self.text_cache.put(cache_key or url, text)
+        return text
+
+    def submit(self, url: str, feed: str = None, cache_key: str = None):
+        """Schedules extraction of one article and returns its Future."""
+        return self._executor.submit(self._extract, url, feed, cache_key)
+
+    def extract_many(self, urls, feed: str = None) -> dict:
+        """
+        Extracts all URLs in parallel and returns {url: text or None}. `urls` is an iterable
+        of URLs or a {key: download URL} mapping (results and the text cache then use the keys).
+        Articles that miss the deadline map to None (the caller falls back to the summary).
+        """
+        started = time.monotonic()
+        results = {}
+        futures = {}
+        downloads = urls if isinstance(urls, dict) else {url: url for url in urls}
+        for key, url in downloads.items():
+            cached_text = self.text_cache.get(key) if self.text_cache is not None else None
+            if cached_text is not None:
+                results[key] = cached_text # Extraction skipped entirely
+            else:
+                futures[key] = self.submit(url, feed, key)
+        for key, future in futures.items():
+            url = downloads[key]
+            remaining = max(0.0, started + self.deadline - time.monotonic())
+            try:
+                results[key] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel() # No effect if the download already started; its result is then ignored
+                self._record(host_of(url), 'deadline_missed')
+                logger.warning(f"Extraction of {url} missed the {self.deadline:.0f}s deadline. Falling back to summary for analysis.",
+                               extra={'url': url, 'feed': feed})
+                results[key] = None
+        return results
+
+    def report(self):
+        """Logs throughput and failure counts per host."""
+        if self.text_cache is not None and (self.text_cache.hits or self.text_cache.misses):
+            logger.info(f"Full-text cache: {self.text_cache.hits} hits, {self.text_cache.misses} misses.")
+        if not self.host_stats:
+            return
+        logger.info("--- Full-text extraction per host ---")
+        logger.info(f"{'host':<40} {'ok':>5} {'failed':>7} {'late':>5} {'avg s':>7} {'art/s':>7} {'MB':>7}")
+        with self._stats_lock:
+            rows = sorted(self.host_stats.items(), key=lambda item: -(item[1]['ok'] + item[1]['failed']))
+            for host, stats in rows:
+                attempts = stats['ok'] + stats['failed']
+                avg_seconds = stats['seconds'] / attempts if attempts else 0.0
+                window = (stats['last_finish'] - stats['first_start']) if stats['first_start'] is not None else 0.0
+                throughput = stats['ok'] / window if window > 0 else 0.0
+                logger.info(f"{host[:40]:<40} {stats['ok']:>5} {stats['failed']:>7} {stats['deadline_missed']:>5} "
+                      f"{avg_seconds:>7.2f} {throughput:>7.2f} {stats['bytes'] / 1e6:>7.2f}")
+
+    def reset_stats(self):
+        """Starts a new reporting period, for extractors that outlive a run (in-process refreshes)."""
+        with self._stats_lock:
+            self.host_stats = {}
+        if self.text_cache is not None:
+            self.text_cache.hits = self.text_cache.misses = 0
+
+    def shutdown(self):
+        """Stops the pool without waiting for downloads whose results were abandoned."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,442 @@
+# Storage backends for the articles table: Supabase (remote) and SQLite (local file)
+import abc
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_COLUMNS = (
+    'url', 'title', 'summary', 'feed_source_name', 'full_text', 'is_relevant', 'relevance_justification',
+    'category', 'tweet', 'instagram_caption', 'linkedin_post', 'flares', 'hashtags', 'image_keywords',
+    'processed_at', 'last_updated_at',
+)
+JSON_COLUMNS = ('flares', 'hashtags', 'image_keywords') # Lists, stored as JSON text in SQLite
+BOOLEAN_COLUMNS = ('is_relevant',)
+IN_CHUNK_SIZE = 100 # URLs per `in` filter, keeps request URLs / SQL parameter lists short
+SCAN_CHUNK_SIZE = 1000 # Rows per request when scanning a column (Supabase caps a response at 1000 rows by default)
+
+
+def _utc_iso(value) -> str:
+    """Timestamp as an ISO 8601 UTC string with microseconds, so SQLite can compare them as text."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _date_bounds(date_range: tuple) -> tuple:
+    """Inclusive (start_date, end_date) pair of UTC dates -> [start, end) datetimes."""
+    start = datetime.combine(date_range[0], datetime.min.time(), tzinfo=timezone.utc)
+    end = datetime.combine(date_range[1] + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return start, end
+
+
+def _chunks(values: list, size: int) -> list:
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _split_columns(columns) -> list:
+    if columns is None:
+        return list(ARTICLE_COLUMNS)
+    if isinstance(columns, str):
+        return [column.strip() for column in columns.split(',') if column.strip()]
+    return list(columns)
+
+
+class ArticleStore(abc.ABC):
+    """
+    Operations the reader and the dashboard need on the articles table. Methods raise
+    on failure; callers decide whether to log and continue. A backend missing one of
+    them fails when it is created, not midway through a run.
+
+    The query methods share these filters: `relevant_only` (relevant and categorized
+    articles, what the dashboard shows), `sector`, `date_range` (inclusive pair of UTC
+    dates), `sources`, `urls` (None means no filter), `flares` (rows whose flares list
+    contains at least one of these), `since` (processed_at at or after) and `before` /
+    `exclude_urls` (processed_at at or before, minus these URLs; the dashboard's keyset
+    cursor). Rows come back newest first (processed_at, then url).
+    """
+
+    @abc.abstractmethod
+    def existing_urls(self, urls) -> set:
+        """Subset of `urls` that is stored."""
+
+    @abc.abstractmethod
+    def insert_article(self, record: dict):
+        """Inserts one row; fails if the url is already stored."""
+
+    @abc.abstractmethod
+    def upsert_articles(self, records: list) -> int:
+        """Writes complete rows keyed on url (existing rows get the given columns overwritten)."""
+
+    @abc.abstractmethod
+    def update_article(self, url: str, fields: dict):
+        """Updates some columns of one row and its last_updated_at."""
+
+    @abc.abstractmethod
+    def update_articles(self, urls: list, fields: dict) -> int:
+        """Sets the same columns (and last_updated_at) on the stored rows of `urls`; returns how many were updated."""
+
+    @abc.abstractmethod
+    def delete_article(self, url: str) -> int:
+        """Deletes one row; returns how many were deleted (0 or 1)."""
+
+    @abc.abstractmethod
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Deletes rows processed before `cutoff`; returns how many."""
+
+    @abc.abstractmethod
+    def query_articles(self, columns=None, limit: int = None, offset: int = 0, **filters) -> list:
+        """Rows (dicts of `columns`, all by default) matching the filters, newest first."""
+
+    @abc.abstractmethod
+    def count_articles(self, **filters) -> int:
+        """Number of rows matching the filters."""
+
+
+class SupabaseArticleStore(ArticleStore):
+    """The articles table of a Supabase project, through a supabase-py `Client`."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def _table(self):
+        return self.client.table('articles')
+
+    def _filtered(self, query, relevant_only: bool = False, sector: str = None, date_range: tuple = None,
+                  sources: tuple = None, urls: list = None, since=None, before=None, exclude_urls: tuple = None):
+        if relevant_only:
+            query = query.eq('is_relevant', True).not_.is_('category', None).not_.eq('category', 'Uncategorized')
+        if sector:
+            query = query.eq('category', sector)
+        if date_range:
+            start, end = _date_bounds(date_range)
+            query = query.gte('processed_at', start.isoformat()).lt('processed_at', end.isoformat())
+        if sources:
+            query = query.in_('feed_source_name', list(sources))
+        if urls is not None:
+            query = query.in_('url', list(urls))
+        if since is not None:
+            query = query.gte('processed_at', since if isinstance(since, str) else since.isoformat())
+        if before is not None:
+            query = query.lte('processed_at', before if isinstance(before, str) else before.isoformat())
+        if exclude_urls:
+            query = query.not_.in_('url', list(exclude_urls))
+        return query
+
+    def _flare_urls(self, flares) -> set:
+        """
+        URLs of the rows whose flares contain any of `flares`. Only rows that have flares are
+        read (url and flares), and matched here, since the column may hold a list or JSON text.
+        """
+        wanted, found, offset = set(flares), set(), 0
+        while True:
+            response = (self._table().select('url, flares').not_.is_('flares', None).order('url')
+                        .range(offset, offset + SCAN_CHUNK_SIZE - 1).execute())
+            rows = response.data or []
+            for row in rows:
+                values = row['flares']
+                if isinstance(values, str):
+                    try:
+                        values = json.loads(values)
+                    except ValueError:
+                        continue
+                if isinstance(values, list) and wanted.intersection(map(str, values)):
+                    found.add(row['url'])
+            if len(rows) < SCAN_CHUNK_SIZE:
+                return found
+            offset += len(rows)
+
+    def _url_chunks(self, filters: dict) -> list:
+        """
+        Pops the `flares` and `urls` filters and returns the URL lists to query one by one
+        (IN_CHUNK_SIZE each, so request URLs stay short); [None] when there is no URL filter.
+        """
+        flares, urls = filters.pop('flares', None), filters.pop('urls', None)
+        if flares:
+            matching = self._flare_urls(flares)
+            urls = matching if urls is None else matching.intersection(urls)
+        if urls is None:
+            return [None]
+        return _chunks(sorted(urls), IN_CHUNK_SIZE)
+
+    def existing_urls(self, urls) -> set:
+        found = set()
+        for chunk in _chunks(list(urls), IN_CHUNK_SIZE):
+            response = self._table().select('url').in_('url', chunk).execute()
+            found.update(row['url'] for row in (response.data or []))
+        return found
+
+    def insert_article(self, record: dict):
+        # processed_at and last_updated_at are set by DB default (TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP)
+        self._table().insert(record, upsert=False).execute()
+
+    def upsert_articles(self, records: list) -> int:
+        if not records:
+            return 0
+        response = self._table().upsert(records, on_conflict='url').execute()
+        return len(response.data or [])
+
+    def update_article(self, url: str, fields: dict):
+        self._table().update({**fields, 'last_updated_at': 'now()'}).eq('url', url).execute()
+
+    def update_articles(self, urls: list, fields: dict) -> int:
+        updated = 0
+        for chunk in _chunks(list(urls), IN_CHUNK_SIZE):
+            response = self._table().update({**fields, 'last_updated_at': 'now()'}).in_('url', chunk).execute()
+            updated += len(response.data or [])
+        return updated
+
+    def delete_article(self, url: str) -> int:
+        response = self._table().delete().eq('url', url).execute()
+        return len(response.data or [])
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        response = self._table().delete().lt('processed_at', _utc_iso(cutoff)).execute()
+        return len(response.data or [])
+
+    def _select(self, columns: list, limit: int = None, offset: int = 0, **filters) -> list:
+        query = self._filtered(self._table().select(', '.join(columns)), **filters)
+        query = query.order('processed_at', desc=True).order('url', desc=True)
+        if limit is not None:
+            query = query.range(offset, offset + limit - 1)
+        response = query.execute()
+        return response.data if hasattr(response, 'data') and response.data else []
+
+    def query_articles(self, columns=None, limit: int = None, offset: int = 0, **filters) -> list:
+        """
+        Long URL filters are queried in chunks whose results are merged in order, and a long
+        `exclude_urls` list is applied here (after fetching that many rows more).
+        """
+        columns = _split_columns(columns)
+        url_chunks = self._url_chunks(filters)
+        excluded = filters.get('exclude_urls') or ()
+        if len(excluded) > IN_CHUNK_SIZE:
+            filters['exclude_urls'], excluded = None, set(excluded)
+        else:
+            excluded = set()
+        if len(url_chunks) == 1 and not excluded:
+            return self._select(columns, limit, offset, urls=url_chunks[0], **filters)
+
+        selected = columns + [column for column in ('processed_at', 'url') if column not in columns] # Merge keys
+        wanted = None if limit is None else offset + limit + len(excluded)
+        rows = [row for chunk in url_chunks for row in self._select(selected, wanted, urls=chunk, **filters)
+                if row['url'] not in excluded]
+        rows.sort(key=lambda row: (_utc_iso(row['processed_at']), row['url']), reverse=True)
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        if len(selected) > len(columns):
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+    def count_articles(self, **filters) -> int:
+        total = 0
+        for chunk in self._url_chunks(filters):
+            response = self._filtered(self._table().select('url', count='exact', head=True), urls=chunk, **filters).execute()
+            total += response.count or 0
+        return total
+
+
+class SQLiteArticleStore(ArticleStore):
+    """
+    Articles in a local SQLite file, for offline or high-throughput setups. WAL mode lets
+    the dashboard read while the reader writes; url is the primary key and processed_at
+    and category are indexed for the retention delete and the dashboard filters.
+    One connection per store, shared by threads under a lock.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS articles (
+            url TEXT PRIMARY KEY,
+            title TEXT,
+            summary TEXT,
+            feed_source_name TEXT,
+            full_text TEXT,
+            is_relevant INTEGER NOT NULL DEFAULT 0,
+            relevance_justification TEXT,
+            category TEXT,
+            tweet TEXT,
+            instagram_caption TEXT,
+            linkedin_post TEXT,
+            flares TEXT,
+            hashtags TEXT,
+            image_keywords TEXT,
+            processed_at TEXT NOT NULL,
+            last_updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_articles_processed_at ON articles (processed_at DESC, url DESC);
+        CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category, processed_at DESC);
+    '''
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL') # Safe with WAL; a power loss can only drop the last commits
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_db(column: str, value):
+        if value is None:
+            return None
+        if column in JSON_COLUMNS and not isinstance(value, str):
+            return json.dumps(list(value))
+        if column in BOOLEAN_COLUMNS:
+            return int(bool(value))
+        if column in ('processed_at', 'last_updated_at'):
+            return _utc_iso(value)
+        return value
+
+    @staticmethod
+    def _from_db(row: sqlite3.Row) -> dict:
+        data = dict(row)
+        for column in JSON_COLUMNS:
+            if data.get(column) is not None:
+                try:
+                    data[column] = json.loads(data[column])
+                except ValueError:
+                    pass # Leave malformed values to the caller, as Supabase would return them
+        for column in BOOLEAN_COLUMNS:
+            if data.get(column) is not None:
+                data[column] = bool(data[column])
+        return data
+
+    def _where(self, relevant_only: bool = False, sector: str = None, date_range: tuple = None, sources: tuple = None,
+               urls: tuple = None, flares: tuple = None, since=None, before=None, exclude_urls: tuple = None) -> tuple:
+        clauses, params = [], []
+        if relevant_only:
+            clauses.append("is_relevant = 1 AND category IS NOT NULL AND category != 'Uncategorized'")
+        if sector:
+            clauses.append('category = ?')
+            params.append(sector)
+        if date_range:
+            start, end = _date_bounds(date_range)
+            clauses.append('processed_at >= ? AND processed_at < ?')
+            params += [_utc_iso(start), _utc_iso(end)]
+        # Value lists go in as one JSON array parameter, however long they are
+        for column, values, negate in (('feed_source_name', sources or None, False), ('url', urls, False),
+                                       ('url', exclude_urls or None, True)):
+            if values is not None:
+                clauses.append(f"{column} {'NOT IN' if negate else 'IN'} (SELECT value FROM json_each(?))")
+                params.append(json.dumps(list(values)))
+        if flares:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid(flares) THEN flares END) AS flare "
+                           "WHERE flare.value IN (SELECT value FROM json_each(?)))")
+            params.append(json.dumps(list(flares)))
+        if since is not None:
+            clauses.append('processed_at >= ?')
+            params.append(_utc_iso(since))
+        if before is not None:
+            clauses.append('processed_at <= ?')
+            params.append(_utc_iso(before))
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def existing_urls(self, urls) -> set:
+        urls = list(urls)
+        found = set()
+        for i in range(0, len(urls), IN_CHUNK_SIZE):
+            chunk = urls[i:i + IN_CHUNK_SIZE]
+            with self._lock:
+                rows = self._conn.execute(f"SELECT url FROM articles WHERE url IN ({', '.join('?' * len(chunk))})",
+                                          chunk).fetchall()
+            found.update(row['url'] for row in rows)
+        return found
+
+    def _write(self, records: list, upsert: bool) -> int:
+        now = _utc_iso(datetime.now(timezone.utc))
+        written = 0
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for record in records:
+                    record = {column: value for column, value in record.items() if column in ARTICLE_COLUMNS}
+                    columns = list(record)
+                    values = [self._to_db(column, record[column]) for column in columns]
+                    # Like the Supabase defaults: timestamps are set on insert, kept on conflict
+                    for column in ('processed_at', 'last_updated_at'):
+                        if column not in record:
+                            columns.append(column)
+                            values.append(now)
+                    sql = f"INSERT INTO articles ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                    if upsert:
+                        updates = [column for column in record if column != 'url']
+                        sql += " ON CONFLICT(url) DO " + (
+                            f"UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in updates)}" if updates else "NOTHING")
+                    written += self._conn.execute(sql, values).rowcount
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return written
+
+    def insert_article(self, record: dict):
+        self._write([record], upsert=False)
+
+    def upsert_articles(self, records: list) -> int:
+        return self._write(records, upsert=True) if records else 0
+
+    def update_article(self, url: str, fields: dict):
+        fields = {column: value for column, value in fields.items() if column in ARTICLE_COLUMNS}
+        fields['last_updated_at'] = datetime.now(timezone.utc)
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        self._execute(f"UPDATE articles SET {assignments} WHERE url = ?",
+                      [self._to_db(column, value) for column, value in fields.items()] + [url])
+
+    def update_articles(self, urls: list, fields: dict) -> int:
+        fields = {column: value for column, value in fields.items() if column in ARTICLE_COLUMNS}
+        fields['last_updated_at'] = datetime.now(timezone.utc)
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        return self._execute(f"UPDATE articles SET {assignments} WHERE url IN (SELECT value FROM json_each(?))",
+                             [self._to_db(column, value) for column, value in fields.items()] + [json.dumps(list(urls))]).rowcount
+
+    def delete_article(self, url: str) -> int:
+        return self._execute('DELETE FROM articles WHERE url = ?', (url,)).rowcount
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        return self._execute('DELETE FROM articles WHERE processed_at < ?', (_utc_iso(cutoff),)).rowcount
+
+    def query_articles(self, columns=None, limit: int = None, offset: int = 0, **filters) -> list:
+        selected = [column for column in _split_columns(columns) if column in ARTICLE_COLUMNS]
+        where, params = self._where(**filters)
+        sql = f"SELECT {', '.join(selected)} FROM articles{where} ORDER BY processed_at DESC, url DESC"
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._from_db(row) for row in rows]
+
+    def count_articles(self, **filters) -> int:
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM articles{where}", params).fetchone()[0]
+
+
+def open_article_store(backend: str, supabase_url: str = None, supabase_key: str = None, sqlite_path: str = None) -> ArticleStore:
+    """Creates the store selected by STORAGE_BACKEND ('supabase' or 'sqlite')."""
+    if backend == 'sqlite':
+        logger.info(f"Using the local SQLite article store at {sqlite_path}.")
+        return SQLiteArticleStore(sqlite_path)
+    if backend != 'supabase':
+        raise ValueError(f"Unknown storage backend '{backend}' (expected 'supabase' or 'sqlite').")
+    if not supabase_url or not supabase_key:
+        raise ValueError("Supabase URL or Key not configured.")
+    from supabase import create_client # Only needed for this backend
+    return SupabaseArticleStore(create_client(supabase_url, supabase_key))
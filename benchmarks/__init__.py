@@ -0,0 +1,2 @@
+# Offline benchmarks and consistency checks for the MCCIA news pipeline.
+# Run from the repository root, e.g. `python -m benchmarks.bench_keyword_matcher`.
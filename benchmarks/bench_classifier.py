@@ -0,0 +1,74 @@
+# Compares the keyword and TF-IDF vector categorization engines on a synthetic corpus.
+# Usage: python -m benchmarks.bench_classifier [--size 5000 --batch-size 500]
+import argparse
+import sys
+import time
+
+import rss_reader
+import vector_classifier
+from benchmarks.corpus import make_corpus
+from vector_classifier import VectorClassifier
+
+
+def run_keyword(corpus: list) -> tuple:
+    started = time.perf_counter()
+    results = [rss_reader.analyze_article_keywords(title, text) for title, text in corpus]
+    return results, time.perf_counter() - started
+
+
+def run_vector(classifier: VectorClassifier, corpus: list, batch_size: int) -> tuple:
+    started = time.perf_counter()
+    results = []
+    for start in range(0, len(corpus), batch_size):
+        results.extend(classifier.analyze_batch(corpus[start:start + batch_size]))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword vs TF-IDF vector categorization throughput")
+    parser.add_argument('--size', type=int, default=5000, help='Number of synthetic articles')
+    parser.add_argument('--batch-size', type=int, default=500, help='Articles per analyze_batch call')
+    parser.add_argument('--min-words', type=int, default=40)
+    parser.add_argument('--max-words', type=int, default=600)
+    args = parser.parse_args()
+
+    keywords = rss_reader.MCCIA_RELEVANCE_KEYWORDS + [kw for kws in rss_reader.MCCIA_SECTOR_KEYWORDS_MAP.values() for kw in kws]
+    corpus = make_corpus(keywords, size=args.size, min_words=args.min_words, max_words=args.max_words)
+    total_chars = sum(len(title) + len(text) for title, text in corpus)
+    print(f"Corpus: {len(corpus)} articles, {total_chars / 1e6:.1f}M characters")
+
+    keyword_results, keyword_seconds = run_keyword(corpus)
+    print(f"keyword engine        : {keyword_seconds * 1e3:8.1f} ms ({len(corpus) / keyword_seconds:,.0f} articles/s)")
+
+    backends = [('scipy.sparse', vector_classifier.sparse)] if vector_classifier.sparse is not None else []
+    backends.append(('numpy', None))
+    vector_results = None
+    for name, backend in backends:
+        vector_classifier.sparse = backend
+        classifier = VectorClassifier(rss_reader.MCCIA_RELEVANCE_KEYWORDS, rss_reader.MCCIA_SECTOR_KEYWORDS_MAP,
+                                      sectors=rss_reader.MCCIA_SECTORS, min_score=rss_reader.VECTOR_MIN_SCORE)
+        results, seconds = run_vector(classifier, corpus, args.batch_size)
+        # Split the time: keyword scan per article vs the batched product and calibration
+        data, indices, indptr, _ = classifier._vectorize([f"{t} {x}" for t, x in corpus[:args.batch_size]])
+        started = time.perf_counter()
+        classifier.calibrate(classifier._scores(data, indices, indptr))
+        product_ms = (time.perf_counter() - started) * 1e3
+        print(f"vector engine ({name:<12}): {seconds * 1e3:8.1f} ms ({len(corpus) / seconds:,.0f} articles/s), "
+              f"product + calibration {product_ms:.2f} ms per batch of {min(args.batch_size, len(corpus))}")
+        if vector_results is not None and [r['category'] for r in results] != [r['category'] for r in vector_results]:
+            print("MISMATCH between the scipy and numpy products")
+            return 1
+        vector_results = results
+
+    same_relevance = sum(k['relevant'] == v['relevant'] for k, v in zip(keyword_results, vector_results))
+    same_category = sum(k['category'] == v['category'] for k, v in zip(keyword_results, vector_results))
+    uncategorized = (sum(r['category'] == 'Uncategorized' for r in keyword_results),
+                     sum(r['category'] == 'Uncategorized' for r in vector_results))
+    print(f"Relevance identical   : {same_relevance}/{len(corpus)}")
+    print(f"Category agreement    : {same_category}/{len(corpus)} ({same_category / len(corpus):.1%}); "
+          f"Uncategorized keyword {uncategorized[0]}, vector {uncategorized[1]}")
+    return 0 if same_relevance == len(corpus) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
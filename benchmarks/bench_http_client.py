@@ -0,0 +1,152 @@
+# TLS set-up cost of the shared HTTP client: fresh HTTPS connections to several local hosts
+# through http_client (a shared SSL context, with the default CAs and with a REQUESTS_CA_BUNDLE)
+# and through a plain requests session with REQUESTS_CA_BUNDLE, which loads the bundle again for
+# every new connection. Exits with an error if the shared client loads CA certificates per
+# connection or a pool does not use the shared context. Needs the `openssl` command to create a
+# throwaway certificate.
+# Usage: python -m benchmarks.bench_http_client [--hosts 8 --requests 5 --repeat 3]
+import argparse
+import http.server
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import http_client
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so each client opens one connection per host
+    disable_nagle_algorithm = True # Headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def make_certificate(directory: str) -> tuple:
+    """Self-signed certificate and key for localhost; returns their paths."""
+    cert_path, key_path = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                    '-addext', 'subjectAltName=DNS:localhost', '-keyout', key_path, '-out', cert_path],
+                   check=True, capture_output=True)
+    return cert_path, key_path
+
+
+def start_servers(count: int, cert_path: str, key_path: str) -> list:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    servers = []
+    for _ in range(count):
+        server = http.server.ThreadingHTTPServer(('localhost', 0), _Handler)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+class CountingLoads:
+    """Counts SSLContext.load_verify_locations calls (one per CA bundle load) while active."""
+
+    def __enter__(self):
+        self.calls = 0
+        self._original = ssl.SSLContext.load_verify_locations
+        counter = self
+
+        def load_verify_locations(context, *args, **kwargs):
+            counter.calls += 1
+            return counter._original(context, *args, **kwargs)
+
+        ssl.SSLContext.load_verify_locations = load_verify_locations
+        return self
+
+    def __exit__(self, *exc):
+        ssl.SSLContext.load_verify_locations = self._original
+
+
+def fetch_all(get, urls: list, requests_per_host: int) -> float:
+    started = time.perf_counter()
+    for url in urls:
+        for _ in range(requests_per_host):
+            response = get(url)
+            response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TLS set-up cost with the shared SSL context vs a CA bundle path")
+    parser.add_argument('--hosts', type=int, default=8, help='Local HTTPS servers (one connection pool each)')
+    parser.add_argument('--requests', type=int, default=5, help='Requests per host')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh clients per variant; the fastest counts')
+    args = parser.parse_args()
+    if shutil.which('openssl') is None:
+        print("The openssl command is needed to create a test certificate.")
+        return 1
+
+    import certifi
+    import requests
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        bundle_path = os.path.join(directory, 'bundle.pem') # certifi's CAs plus the test certificate
+        with open(bundle_path, 'w') as bundle, open(certifi.where()) as cas, open(cert_path) as cert:
+            bundle.write(cas.read() + cert.read())
+        servers = start_servers(args.hosts, cert_path, key_path)
+        urls = [f"https://localhost:{server.server_port}/" for server in servers]
+        http_client.ssl_context().load_verify_locations(cert_path) # Trust the test certificate (default CAs)
+
+        variants = [ # name, REQUESTS_CA_BUNDLE, shared context the pools should use (None: plain requests)
+            ('shared, default CAs', None, http_client.ssl_context()),
+            ('shared, CA bundle', bundle_path, http_client.ssl_context(bundle_path)),
+            ('requests, CA bundle', bundle_path, None),
+        ]
+        results, foreign, pools = {}, 0, 0
+        for name, ca_bundle, context in variants:
+            for variable in ('REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE'):
+                os.environ.pop(variable, None)
+            if ca_bundle:
+                os.environ['REQUESTS_CA_BUNDLE'] = ca_bundle # requests turns verify=True into this path
+            seconds, loaded = [], 0
+            for _ in range(args.repeat):
+                if context is not None:
+                    client = http_client.HttpClient(pool_hosts=args.hosts)
+                    session = client.session
+                else:
+                    session = requests.Session()
+                with CountingLoads() as loads:
+                    seconds.append(fetch_all(lambda url: session.get(url, timeout=5), urls, args.requests))
+                loaded = max(loaded, loads.calls)
+                if context is not None:
+                    pool_map = session.get_adapter('https://').poolmanager.pools
+                    used = [pool_map[key].conn_kw.get('ssl_context') for key in pool_map.keys()]
+                    pools += len(used)
+                    foreign += sum(1 for used_context in used if used_context is not context)
+                session.close()
+            results[name] = (min(seconds), loaded)
+        for server in servers:
+            server.shutdown()
+
+    print(f"{args.hosts} hosts x {args.requests} requests, fresh client (best of {args.repeat}):")
+    for name, (seconds, loaded) in results.items():
+        print(f"  {name:<20} {seconds * 1e3:8.1f} ms  {seconds / args.hosts * 1e3:6.2f} ms per connection  "
+              f"{loaded} CA bundle loads")
+    shared_loads = sum(loaded for name, (_, loaded) in results.items() if name.startswith('shared'))
+    if shared_loads or foreign:
+        print(f"FAIL: the shared client loaded CA certificates {shared_loads} times; {foreign} of {pools} pools "
+              f"without the shared context")
+        return 1
+    print(f"OK: all {pools} pools of the shared client use the shared context; no CA bundle loaded per connection")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
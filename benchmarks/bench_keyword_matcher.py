@@ -0,0 +1,123 @@
+# Checks that the Aho-Corasick classifier matches the original substring scans and compares their speed.
+# Usage: python -m benchmarks.bench_keyword_matcher [--size 2000]
+#        python -m benchmarks.bench_keyword_matcher --check  (equivalence only, over a fixed corpus; exits 1 on a mismatch)
+import argparse
+import sys
+import time
+
+import rss_reader
+from benchmarks.corpus import make_corpus
+from keyword_matcher import KeywordClassifier
+
+
+def reference_qualify(title: str, summary: str) -> dict:
+    """Original qualify_article_relevance: one substring scan per keyword."""
+    text_to_check = (title + " " + summary).lower()
+    for keyword in rss_reader.MCCIA_RELEVANCE_KEYWORDS:
+        if keyword.lower() in text_to_check:
+            return {'relevant': True, 'justification': f"Keyword '{keyword}' found."}
+    return {'relevant': False, 'justification': 'No MCCIA relevant keywords found.'}
+
+
+def reference_sector_scores(title: str, summary: str) -> dict:
+    """Original per-sector scoring of categorize_article_by_keywords."""
+    text_to_check = (title + " " + summary).lower()
+    sector_scores = {sector: 0 for sector in rss_reader.MCCIA_SECTORS}
+    for sector, keywords in rss_reader.MCCIA_SECTOR_KEYWORDS_MAP.items():
+        for keyword in keywords:
+            if keyword.lower() in text_to_check:
+                sector_scores[sector] += 1
+    return sector_scores
+
+
+EDGE_CASES = [("", ""), ("Said the domain expert", "Email html detail"), ("MSME policy", "msme policy msme sme")]
+
+
+def fixed_corpus(size: int) -> list:
+    keywords = rss_reader.MCCIA_RELEVANCE_KEYWORDS + [kw for kws in rss_reader.MCCIA_SECTOR_KEYWORDS_MAP.values() for kw in kws]
+    return make_corpus(keywords, size=size) + EDGE_CASES
+
+
+def engines() -> list:
+    """(name, use_c_extension) of the automatons available here."""
+    available = [("pure Python", False)]
+    if KeywordClassifier(['x'], {}).matcher._automaton is not None:
+        available.insert(0, ("pyahocorasick", True))
+    return available
+
+
+def check_equivalence(size: int = 300, verbose: bool = True) -> int:
+    """
+    Compares every available automaton with the original substring scans over a fixed
+    corpus: relevance, justification keyword, per-sector scores and category. Also checks
+    that the engines agree with each other with word boundaries on. Returns the number of
+    mismatches (0 when equivalent).
+    """
+    corpus = fixed_corpus(size)
+    mismatches = 0
+
+    def report(message: str):
+        nonlocal mismatches
+        mismatches += 1
+        if verbose and mismatches <= 5:
+            print(f"MISMATCH {message}")
+
+    bounded = {}
+    for name, use_c_extension in engines():
+        classifier = KeywordClassifier(rss_reader.MCCIA_RELEVANCE_KEYWORDS, rss_reader.MCCIA_SECTOR_KEYWORDS_MAP,
+                                       use_c_extension=use_c_extension)
+        before = mismatches
+        for title, text in corpus:
+            analysis, reference = classifier.analyze(title, text), reference_qualify(title, text)
+            expected_scores = reference_sector_scores(title, text)
+            actual = (analysis['relevant'], f"Keyword '{analysis['justification']}' found." if analysis['relevant'] else None,
+                      analysis['sector_scores'], rss_reader.pick_category(analysis['sector_scores']))
+            expected = (reference['relevant'], reference['justification'] if reference['relevant'] else None,
+                        expected_scores, rss_reader.pick_category(expected_scores))
+            if actual != expected:
+                report(f"({name}) for {title!r}: expected {expected[:2]}, got {actual[:2]}")
+        bounded[name] = [KeywordClassifier(rss_reader.MCCIA_RELEVANCE_KEYWORDS, rss_reader.MCCIA_SECTOR_KEYWORDS_MAP,
+                                           word_boundaries=True, use_c_extension=use_c_extension).analyze(title, text)
+                         for title, text in corpus]
+        if verbose:
+            print(f"Consistency: {len(corpus) - (mismatches - before)}/{len(corpus)} articles identical ({name} engine)")
+    results = list(bounded.values())
+    for other in results[1:]:
+        for (title, _), first, second in zip(corpus, results[0], other):
+            if first != second:
+                report(f"(word boundaries) engines disagree for {title!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=2000, help='Number of synthetic articles')
+    parser.add_argument('--check', action='store_true', help='Only check equivalence over a fixed 300-article corpus')
+    args = parser.parse_args()
+    if args.check:
+        return 1 if check_equivalence() else 0
+
+    mismatches = check_equivalence(args.size)
+    corpus = fixed_corpus(args.size)
+    classifier = KeywordClassifier(rss_reader.MCCIA_RELEVANCE_KEYWORDS, rss_reader.MCCIA_SECTOR_KEYWORDS_MAP)
+
+    started = time.perf_counter()
+    for title, text in corpus:
+        reference_qualify(title, text)
+        rss_reader.pick_category(reference_sector_scores(title, text))
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for title, text in corpus:
+        classifier.analyze(title, text)
+    automaton_seconds = time.perf_counter() - started
+
+    total_chars = sum(len(title) + len(text) for title, text in corpus)
+    print(f"Corpus: {len(corpus)} articles, {total_chars / 1e6:.1f}M characters")
+    print(f"Substring scans : {reference_seconds * 1e3:8.1f} ms ({len(corpus) / reference_seconds:,.0f} articles/s)")
+    print(f"Aho-Corasick    : {automaton_seconds * 1e3:8.1f} ms ({len(corpus) / automaton_seconds:,.0f} articles/s)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
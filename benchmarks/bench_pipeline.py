@@ -0,0 +1,213 @@
+# End-to-end offline benchmark of rss_reader.fetch_and_print_feeds.
+# Usage: python -m benchmarks.bench_pipeline [--feeds 19 --items 30 --runs 2 --db-latency 0.05 --storage sqlite --json out.json]
+import argparse
+import functools
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import article_extractor
+import feed_fetcher
+import rss_reader
+from article_store import SQLiteArticleStore, SupabaseArticleStore
+from log_config import configure_logging
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.feed_server import FeedServer, FeedServerConfig
+
+# Functions timed per call: stage name -> (module, attribute)
+TIMED_FUNCTIONS = {
+    'fetch': [(rss_reader, 'fetch_feed'), (feed_fetcher, 'fetch_feed')],
+    'prepare': [(rss_reader, 'collect_new_entries')],
+    'dedup': [(rss_reader, 'find_processed_urls')],
+    'extract': [(article_extractor.ArticleExtractor, '_extract')],
+    'classify': [(rss_reader, 'build_article_record')],
+    'persist': [(rss_reader, 'upsert_articles'), (rss_reader, 'persist_article_incrementally')],
+    'retention': [(rss_reader, 'delete_old_articles')],
+}
+
+
+class StageTimer:
+    """Monkeypatches the functions above to record per-call latencies."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+        self._originals = []
+
+    def _wrap(self, stage: str, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(elapsed)
+        return timed
+
+    def install(self):
+        for stage, targets in TIMED_FUNCTIONS.items():
+            for owner, name in targets:
+                original = getattr(owner, name)
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(stage, original))
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+    def summary(self) -> dict:
+        result = {}
+        with self._lock:
+            for stage, values in self.samples.items():
+                ordered = sorted(values)
+                result[stage] = {
+                    'calls': len(ordered),
+                    'p50_ms': statistics.median(ordered) * 1e3,
+                    'p95_ms': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))] * 1e3,
+                    'total_s': sum(ordered),
+                }
+        return result
+
+
+def configure_reader(store, feeds: dict, cache_dir: str, args):
+    """Points rss_reader at the given article store, the local feeds and a throwaway cache directory."""
+    rss_reader.article_store = store
+    rss_reader.RSS_FEEDS = feeds
+    rss_reader.CACHE_DIR = cache_dir
+    rss_reader.FEED_CACHE_PATH = os.path.join(cache_dir, "feed_cache.json")
+    rss_reader.SEEN_FILTER_PATH = os.path.join(cache_dir, "seen_urls.json")
+    rss_reader.TEXT_CACHE_DIR = os.path.join(cache_dir, "fulltext")
+    rss_reader.METRICS_DIR = os.path.join(cache_dir, "metrics")
+    rss_reader.NEAR_DUP_INDEX_PATH = os.path.join(cache_dir, "near_duplicates.json")
+    rss_reader.WRITE_BEHIND_JOURNAL_PATH = os.path.join(cache_dir, "write_journal.jsonl")
+    rss_reader.seen_url_filter = None
+    rss_reader.GOOGLE_NEWS_CACHE_PATH = os.path.join(cache_dir, "google_news_links.json")
+    rss_reader.FEED_WATERMARKS_PATH = os.path.join(cache_dir, "feed_watermarks.json")
+    rss_reader.near_duplicate_index = None
+    rss_reader.feed_watermarks = None
+    rss_reader.google_news_resolver = None
+    rss_reader.article_extractor = None
+    if args.mode:
+        rss_reader.READER_MODE = args.mode
+    if args.write_mode:
+        rss_reader.ARTICLE_WRITE_MODE = args.write_mode
+
+
+def forget_near_duplicates():
+    """
+    Drops the near-duplicate index: fresh runs serve the same synthetic stories under new
+    URLs, which would otherwise all be skipped as near-duplicates of the previous run's.
+    """
+    rss_reader.near_duplicate_index = None # init_reader loads it again from the (removed) file
+    if os.path.exists(rss_reader.NEAR_DUP_INDEX_PATH):
+        os.remove(rss_reader.NEAR_DUP_INDEX_PATH)
+
+
+def run_once(timer: StageTimer, store, fake_db: FakeSupabase = None) -> dict:
+    """One reader run; DB calls are only counted with the fake Supabase backend."""
+    timer.reset()
+    if fake_db is not None:
+        fake_db.reset_calls()
+    rows_before = store.count_articles()
+    started = time.perf_counter()
+    rss_reader.fetch_and_print_feeds()
+    wall = time.perf_counter() - started
+    stages = timer.summary()
+    articles = stages.get('classify', {}).get('calls', 0)
+    db_calls = fake_db.total_calls() if fake_db is not None else None
+    return {
+        'wall_seconds': wall,
+        'new_articles': articles,
+        'stored_articles': store.count_articles() - rows_before, # Only relevant articles are stored
+        'articles_per_second': articles / wall if wall else 0.0,
+        'db_calls': db_calls,
+        'db_calls_per_article': db_calls / articles if articles and db_calls is not None else None,
+        'db_calls_by_operation': dict(fake_db.calls) if fake_db is not None else None,
+        'stages': stages,
+    }
+
+
+def print_run(index: int, result: dict, relevant_ratio: float):
+    per_article = result['db_calls_per_article']
+    print(f"\nRun {index}: {result['wall_seconds']:.2f}s wall, {result['new_articles']} new articles "
+          f"({result['articles_per_second']:.1f}/s), {result['stored_articles']} stored, {result['db_calls'] or 'n/a'} DB calls "
+          f"({'n/a' if per_article is None else f'{per_article:.2f}'} per article)")
+    if result['new_articles']:
+        print(f"  relevant share {result['stored_articles'] / result['new_articles']:.0%} "
+              f"(requested {relevant_ratio:.0%})")
+    print(f"  {'stage':<10} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8}")
+    for stage, stats in sorted(result['stages'].items()):
+        print(f"  {stage:<10} {stats['calls']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['total_s']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the RSS reader pipeline")
+    parser.add_argument('--feeds', type=int, default=19)
+    parser.add_argument('--items', type=int, default=30, help='Items per feed')
+    parser.add_argument('--hosts', type=int, default=3, help='Distinct loopback hosts the feeds are spread over')
+    parser.add_argument('--article-kb', type=int, default=60)
+    parser.add_argument('--feed-latency', type=float, default=0.05)
+    parser.add_argument('--article-latency', type=float, default=0.2)
+    parser.add_argument('--db-latency', type=float, default=0.05, help='Seconds added to every fake Supabase call')
+    parser.add_argument('--storage', choices=['fake', 'sqlite'], default='fake',
+                        help='In-memory fake Supabase (with --db-latency) or a SQLite file in the cache directory')
+    parser.add_argument('--relevant-ratio', type=float, default=0.5)
+    parser.add_argument('--runs', type=int, default=2, help='Runs against the same database (later runs are warm)')
+    parser.add_argument('--fresh', action='store_true', help='Serve new article URLs on every run')
+    parser.add_argument('--mode', choices=['pipeline', 'sequential'], help='Override READER_MODE')
+    parser.add_argument('--write-mode', choices=['batch', 'incremental'], help='Override ARTICLE_WRITE_MODE')
+    parser.add_argument('--host-delay', type=float, default=0.0, help='Override FEED_FETCH_HOST_DELAY')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show the reader log')
+    args = parser.parse_args()
+    configure_logging("INFO" if args.verbose else "WARNING")
+
+    config = FeedServerConfig(feeds=args.feeds, items_per_feed=args.items, article_kb=args.article_kb,
+                              feed_latency=args.feed_latency, article_latency=args.article_latency,
+                              relevant_ratio=args.relevant_ratio)
+    server = FeedServer(config).start()
+    timer = StageTimer()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mccia-bench-") as cache_dir:
+        if args.storage == 'sqlite':
+            fake_db = None
+            store = SQLiteArticleStore(os.path.join(cache_dir, "articles.db"))
+        else:
+            fake_db = FakeSupabase(latency=args.db_latency)
+            store = SupabaseArticleStore(fake_db)
+        configure_reader(store, server.feed_urls(args.hosts), cache_dir, args)
+        rss_reader.FEED_FETCH_HOST_DELAY = args.host_delay
+        timer.install()
+        try:
+            for index in range(1, args.runs + 1):
+                if args.fresh:
+                    config.run_id = str(index)
+                    config.epoch += args.items * 600 # Fresh items are also newer than the feeds' high-water marks
+                    forget_near_duplicates()
+                result = run_once(timer, store, fake_db)
+                print_run(index, result, args.relevant_ratio)
+                results.append(result)
+        finally:
+            timer.uninstall()
+            server.stop()
+            if fake_db is None:
+                store.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': vars(args), 'runs': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
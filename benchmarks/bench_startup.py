@@ -0,0 +1,162 @@
+# Startup cost of the reader: import times, time to the first feed request for a fresh
+# `rss_reader.py` process and for in-process refreshes (the dashboard's default path).
+# Usage: python -m benchmarks.bench_startup [--repeat 5 --feeds 4 --items 10]
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.feed_server import FeedServer, FeedServerConfig
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['rss_reader', 'feedparser', 'requests', 'bs4', 'newspaper', 'numpy', 'supabase']
+
+# Child process: records when the first feed request is made, then runs the reader as the CLI would
+FIRST_FETCH_CHILD = """
+import json, sys, time
+import feed_fetcher, rss_reader
+rss_reader.RSS_FEEDS = json.loads(sys.argv[1])
+original = feed_fetcher.conditional_get
+def first_fetch(*args, **kwargs):
+    if not getattr(first_fetch, 'seen', False):
+        first_fetch.seen = True
+        print(f"FIRST_FETCH {time.time()!r}", flush=True)
+    return original(*args, **kwargs)
+feed_fetcher.conditional_get = first_fetch
+rss_reader.main(['--log-level', 'WARNING'])
+"""
+
+
+def reader_env(cache_dir: str) -> dict:
+    return {
+        **os.environ, 'STORAGE_BACKEND': 'sqlite', 'RSS_CACHE_DIR': cache_dir,
+        'SQLITE_PATH': os.path.join(cache_dir, 'articles.db'), 'FEED_FETCH_HOST_DELAY': '0',
+    }
+
+
+def import_seconds(module: str, repeat: int) -> float:
+    """Best wall time of a fresh interpreter importing `module` (None if it is not installed)."""
+    code = f"import {module}" if module else "pass"
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def cold_first_fetch(feeds: dict, repeat: int) -> list:
+    """Seconds from spawning `rss_reader.py` to its first feed request, and its total run time."""
+    samples = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            started = time.time()
+            result = subprocess.run([sys.executable, '-c', FIRST_FETCH_CHILD, json.dumps(feeds)], cwd=REPO_DIR,
+                                    env=reader_env(cache_dir), capture_output=True, text=True)
+            finished = time.time()
+        marks = [line.split()[1] for line in result.stdout.splitlines() if line.startswith('FIRST_FETCH ')]
+        if result.returncode != 0 or not marks:
+            print(result.stdout[-2000:], result.stderr[-2000:])
+            raise SystemExit("The reader subprocess failed")
+        samples.append((float(marks[0]) - started, finished - started))
+    return samples
+
+
+def in_process_first_fetch(feeds: dict, runs: int) -> list:
+    """The same measurement for consecutive rss_reader.refresh() calls in this process."""
+    import feed_fetcher
+    import rss_reader
+    rss_reader.RSS_FEEDS = feeds
+    original = feed_fetcher.conditional_get
+    samples = []
+    for _ in range(runs):
+        first_call = []
+
+        def first_fetch(*args, **kwargs):
+            if not first_call:
+                first_call.append(time.perf_counter())
+            return original(*args, **kwargs)
+
+        feed_fetcher.conditional_get = first_fetch
+        try:
+            started = time.perf_counter()
+            rss_reader.refresh()
+            finished = time.perf_counter()
+        finally:
+            feed_fetcher.conditional_get = original
+        samples.append((first_call[0] - started if first_call else None, finished - started))
+    return samples
+
+
+def keyword_table_costs(repeat: int) -> tuple:
+    """Compiling the keyword automaton vs loading it back from a pickle (if it pickles at all)."""
+    import rss_reader
+    from keyword_matcher import KeywordClassifier
+
+    def build():
+        return KeywordClassifier(rss_reader.MCCIA_RELEVANCE_KEYWORDS, rss_reader.MCCIA_SECTOR_KEYWORDS_MAP,
+                                 word_boundaries=rss_reader.KEYWORD_MATCH_WORD_BOUNDARIES)
+
+    build_seconds = min(_timed(build) for _ in range(repeat))
+    try:
+        blob = pickle.dumps(build())
+    except Exception:
+        return build_seconds, None
+    return build_seconds, min(_timed(lambda: pickle.loads(blob)) for _ in range(repeat))
+
+
+def _timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def print_samples(label: str, samples: list):
+    for index, (first_fetch, total) in enumerate(samples, 1):
+        first = 'n/a' if first_fetch is None else f"{first_fetch * 1e3:7.0f} ms"
+        print(f"  {label} {index}: first feed request after {first}, run finished after {total:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import times and time to the first feed request of the reader")
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement; the fastest counts')
+    parser.add_argument('--feeds', type=int, default=4, help='Synthetic feeds served locally')
+    parser.add_argument('--items', type=int, default=10, help='Items per synthetic feed')
+    parser.add_argument('--runs', type=int, default=3, help='Consecutive in-process refreshes')
+    args = parser.parse_args()
+
+    print(f"Fresh-interpreter import time (best of {args.repeat}, interpreter start-up included):")
+    baseline = import_seconds(None, args.repeat)
+    print(f"  {'(python -c pass)':<18} {baseline * 1e3:7.1f} ms")
+    for module in MODULES:
+        seconds = import_seconds(module, args.repeat)
+        cost = 'not installed' if seconds is None else f"{seconds * 1e3:7.1f} ms (+{(seconds - baseline) * 1e3:.1f})"
+        print(f"  {module:<18} {cost}")
+
+    server = FeedServer(FeedServerConfig(feeds=args.feeds, items_per_feed=args.items, article_latency=0.0,
+                                         feed_latency=0.0)).start()
+    try:
+        feeds = server.feed_urls()
+        print(f"\nTime to the first feed request ({args.feeds} local feeds x {args.items} items, sqlite store):")
+        print_samples('cold process', cold_first_fetch(feeds, max(1, args.repeat // 2)))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ.update(reader_env(cache_dir))
+            print_samples('in-process run', in_process_first_fetch(feeds, args.runs))
+    finally:
+        server.stop()
+
+    build_seconds, load_seconds = keyword_table_costs(args.repeat)
+    loaded = 'not picklable' if load_seconds is None else f"{load_seconds * 1e3:.2f} ms"
+    print(f"\nKeyword automaton: compiled in {build_seconds * 1e3:.2f} ms, pickle load {loaded}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
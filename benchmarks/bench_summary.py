@@ -0,0 +1,90 @@
+# Checks that summary_text.html_to_text matches BeautifulSoup get_text on feed summaries and compares their speed.
+# Usage: python -m benchmarks.bench_summary [--size 5000] [--feed FILE_OR_URL ...] [--live]
+import argparse
+import random
+import sys
+import time
+
+import feedparser
+from bs4 import BeautifulSoup
+
+import rss_reader
+from summary_text import html_to_text
+
+# Summary shapes of the configured feeds, as feedparser hands them over (entities already sanitized)
+SAMPLE_SUMMARIES = {
+    'google_news': ('<a href="https://news.google.com/rss/articles/CBMiW2h0dHBzOi8vd3d3LnJldXRlcnMuY29tL3dvcmxkL3VzLw?oc=5" '
+                    'target="_blank">{title}</a>&nbsp;&nbsp;<font color="#6f6f6f">Reuters</font>'),
+    'toi': ('<a href="https://timesofindia.indiatimes.com/city/pune/articleshow/1234567.cms"><img border="0" hspace="10" '
+            'align="left" style="margin-top:3px;margin-right:5px;" src="https://timesofindia.indiatimes.com/photo/1234567.cms" />'
+            '</a>{text}'),
+    'bbc': '{text}',
+    'hindustan_times': '{text} &amp; more',
+    'pib': '<p style="text-align:justify">{text}</p>\n<p>&nbsp;</p><p>***</p>\n<p>MJPS/BM</p>',
+}
+WORDS = ("government minister announced new plans for msme growth in pune while exports rose and the rbi said "
+         "inflation eased ‘sharply’ — officials added that infrastructure spending would continue").split()
+
+
+def sample_corpus(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    shapes = list(SAMPLE_SUMMARIES.values())
+    corpus = []
+    for _ in range(size):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(15, 60)))
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+        corpus.append(rng.choice(shapes).format(title=title, text=text))
+    return corpus
+
+
+def feed_summaries(sources: list) -> list:
+    summaries = []
+    for source in sources:
+        feed = feedparser.parse(source)
+        summaries.extend(entry.get('summary', entry.get('description', 'No summary available.')) for entry in feed.entries)
+        print(f"{source}: {len(feed.entries)} entries")
+    return summaries
+
+
+def best_of(function, corpus: list, repeat: int) -> tuple:
+    timings, results = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [function(summary) for summary in corpus]
+        timings.append(time.perf_counter() - started)
+    return results, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="html_to_text vs BeautifulSoup(...).get_text on feed summaries")
+    parser.add_argument('--size', type=int, default=5000, help='Synthetic summaries (when no --feed/--live is given)')
+    parser.add_argument('--feed', action='append', default=[], help='Feed file or URL to take real summaries from')
+    parser.add_argument('--live', action='store_true', help='Download every feed in rss_reader.RSS_FEEDS')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation; the fastest counts')
+    args = parser.parse_args()
+
+    sources = args.feed + (list(rss_reader.RSS_FEEDS.values()) if args.live else [])
+    corpus = feed_summaries(sources) if sources else sample_corpus(args.size)
+    if not corpus:
+        print("No summaries to benchmark.")
+        return 1
+    plain = sum('<' not in summary and '&' not in summary for summary in corpus)
+    print(f"Corpus: {len(corpus)} summaries, {sum(map(len, corpus)) / 1e3:.0f}k characters, {plain} without markup")
+
+    def with_soup(summary):
+        return BeautifulSoup(summary, "html.parser").get_text(separator=" ", strip=True)
+
+    expected, soup_seconds = best_of(with_soup, corpus, args.repeat)
+    results, fast_seconds = best_of(html_to_text, corpus, args.repeat)
+    mismatches = [(summary, want, got) for summary, want, got in zip(corpus, expected, results) if want != got]
+    for summary, want, got in mismatches[:5]:
+        print(f"MISMATCH {summary!r}\n  BeautifulSoup: {want!r}\n  html_to_text : {got!r}")
+    print(f"BeautifulSoup get_text: {soup_seconds * 1e3:8.1f} ms ({soup_seconds / len(corpus) * 1e6:6.1f} us/summary)")
+    print(f"html_to_text          : {fast_seconds * 1e3:8.1f} ms ({fast_seconds / len(corpus) * 1e6:6.1f} us/summary), "
+          f"{soup_seconds / fast_seconds:.1f}x faster")
+    print(f"Identical output      : {len(corpus) - len(mismatches)}/{len(corpus)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
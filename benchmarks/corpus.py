@@ -0,0 +1,34 @@
+# Deterministic synthetic article corpus used by the offline benchmarks
+import random
+
+FILLER_WORDS = [
+    "the", "said", "officials", "on", "monday", "according", "to", "report", "city", "said", "email",
+    "domain", "html", "mail", "claim", "html5", "famous", "smell", "entail", "curtail", "detail",
+    "government", "minister", "announced", "new", "plans", "growth", "quarter", "sources", "market",
+    "shares", "rose", "fell", "percent", "year", "week", "district", "state", "capital", "sports",
+    "cricket", "film", "weather", "rain", "traffic", "police", "court", "hearing", "election",
+]
+
+
+def make_corpus(keywords: list, size: int = 1000, min_words: int = 40, max_words: int = 600, seed: int = 42) -> list:
+    """
+    Returns `size` (title, text) pairs mixing filler words with random keywords,
+    including keywords glued to other words so substring semantics are exercised.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = []
+        for _ in range(rng.randint(min_words, max_words)):
+            roll = rng.random()
+            if roll < 0.03:
+                words.append(rng.choice(keywords))
+            elif roll < 0.04:
+                words.append(rng.choice(FILLER_WORDS) + rng.choice(keywords)) # Keyword inside another word
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+            if rng.random() < 0.05:
+                words[-1] = words[-1].capitalize() + rng.choice([".", ",", ";", ""])
+        title = " ".join(rng.choice(FILLER_WORDS + keywords).title() for _ in range(rng.randint(4, 12)))
+        corpus.append((title, " ".join(words)))
+    return corpus
@@ -0,0 +1,215 @@
+# In-process stand-in for the subset of the supabase-py table API used by the reader and the dashboard
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+        self.error = None
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeQuery:
+    """Builder mirroring postgrest-py's chaining: select/insert/upsert/update/delete + filters + execute."""
+
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self.operation = None
+        self.columns = None
+        self.count_mode = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = 0
+        self._negate_next = False
+
+    # --- Operations ---
+    def select(self, columns: str = '*', count: str = None, head: bool = False):
+        self.operation = 'select'
+        self.columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',') if c.strip()]
+        self.count_mode = count
+        self.head = head
+        return self
+
+    def insert(self, data, upsert: bool = False, **kwargs):
+        self.operation = 'upsert' if upsert else 'insert'
+        self.payload = data
+        return self
+
+    def upsert(self, data, on_conflict: str = None, **kwargs):
+        self.operation = 'upsert'
+        self.payload = data
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, data):
+        self.operation = 'update'
+        self.payload = data
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    # --- Filters ---
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def _filter(self, predicate):
+        negate, self._negate_next = self._negate_next, False
+        self.filters.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) != value)
+
+    def is_(self, column, value):
+        if value in (None, 'null'):
+            return self._filter(lambda row: row.get(column) is None)
+        expected = value if isinstance(value, bool) else str(value).lower() == 'true'
+        return self._filter(lambda row: row.get(column) is expected)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def _compare(self, column, value, op):
+        def predicate(row):
+            current = row.get(column)
+            return current is not None and op(current, value)
+        return self._filter(predicate)
+
+    def lt(self, column, value):
+        return self._compare(column, value, lambda a, b: a < b)
+
+    def lte(self, column, value):
+        return self._compare(column, value, lambda a, b: a <= b)
+
+    def gt(self, column, value):
+        return self._compare(column, value, lambda a, b: a > b)
+
+    def gte(self, column, value):
+        return self._compare(column, value, lambda a, b: a >= b)
+
+    def order(self, column, desc: bool = False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    # --- Execution ---
+    def _matching(self, rows):
+        return [row for row in rows if all(predicate(row) for predicate in self.filters)]
+
+    def _project(self, row):
+        if self.columns is None:
+            return dict(row)
+        return {column: row.get(column) for column in self.columns}
+
+    @staticmethod
+    def _resolve(values: dict) -> dict:
+        return {key: (_now_iso() if value == 'now()' else value) for key, value in values.items()}
+
+    def execute(self):
+        self.client._record_call(self.table_name, self.operation)
+        with self.client._lock:
+            rows = self.client._tables.setdefault(self.table_name, [])
+            if self.operation == 'select':
+                matched = self._matching(rows)
+                for column, desc in reversed(self.ordering):
+                    matched.sort(key=lambda row: (row.get(column) is None, row.get(column) or ''), reverse=desc)
+                total = len(matched) if self.count_mode else None
+                end = None if self.row_limit is None else self.row_offset + self.row_limit
+                page = [] if getattr(self, 'head', False) else [self._project(row) for row in matched[self.row_offset:end]]
+                return FakeResponse(page, total)
+
+            if self.operation in ('insert', 'upsert'):
+                records = self.payload if isinstance(self.payload, list) else [self.payload]
+                key = self.on_conflict or 'url'
+                index = {row.get(key): row for row in rows}
+                written = []
+                for record in records:
+                    record = self._resolve(record)
+                    existing = index.get(record.get(key))
+                    if existing is not None:
+                        if self.operation == 'insert':
+                            raise Exception(f"duplicate key value violates unique constraint ({key}={record.get(key)})")
+                        existing.update(record)
+                        written.append(dict(existing))
+                    else:
+                        row = {'processed_at': _now_iso(), 'last_updated_at': _now_iso(), **record}
+                        rows.append(row)
+                        index[row.get(key)] = row
+                        written.append(dict(row))
+                return FakeResponse(written)
+
+            if self.operation == 'update':
+                matched = self._matching(rows)
+                for row in matched:
+                    row.update(self._resolve(self.payload))
+                return FakeResponse([dict(row) for row in matched])
+
+            if self.operation == 'delete':
+                matched = self._matching(rows)
+                matched_ids = {id(row) for row in matched}
+                rows[:] = [row for row in rows if id(row) not in matched_ids]
+                return FakeResponse([dict(row) for row in matched])
+
+        raise ValueError(f"Unsupported operation: {self.operation}")
+
+
+class FakeSupabase:
+    """
+    Drop-in replacement for a supabase `Client` limited to `.table(...)` queries.
+    Every `execute()` is counted per (table, operation) and can be delayed by
+    `latency` seconds to emulate a remote database.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._tables = {}
+        self.calls = {}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def _record_call(self, table_name: str, operation: str):
+        with self._lock:
+            key = f"{table_name}.{operation}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls = {}
+
+    def rows(self, table_name: str = 'articles') -> list:
+        with self._lock:
+            return [dict(row) for row in self._tables.get(table_name, [])]
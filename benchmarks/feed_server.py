@@ -0,0 +1,122 @@
+# Local HTTP server producing synthetic RSS feeds and article pages for offline benchmarks
+import random
+import threading
+import time
+from email.utils import formatdate
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RELEVANT_TITLES = [
+    "Pune MSME cluster expands export capacity", "Maharashtra announces new industrial policy",
+    "Auto components makers eye electric vehicle demand", "Farmers get better MSP for crop procurement",
+    "Startup ecosystem in Pune attracts venture capital", "GST council meets on tax reform",
+]
+# Off-topic titles and the filler paragraph must not contain any relevance keyword, not even inside
+# a word ("rain" and "said" contain "ai"), or every article is relevant whatever the relevant ratio
+OTHER_TITLES = [
+    "Local cricket team wins the final", "Clear skies expected over the weekend", "Film festival opens downtown",
+    "Traffic diversions announced near the stadium", "Court hears petition on school timings",
+]
+PARAGRAPH = ("The organisers expect a large crowd, and the venue opens its doors early on the day. "
+             "Visitors were urged to check the schedule before they set out. ")
+
+
+class FeedServerConfig:
+    """Shape of the synthetic content: number of feeds/items, page sizes and artificial latencies."""
+
+    def __init__(self, feeds: int = 19, items_per_feed: int = 30, article_kb: int = 60, feed_latency: float = 0.05,
+                 article_latency: float = 0.2, relevant_ratio: float = 0.5, run_id: str = "0", seed: int = 7):
+        self.feeds = feeds
+        self.items_per_feed = items_per_feed
+        self.article_kb = article_kb
+        self.feed_latency = feed_latency
+        self.article_latency = article_latency
+        self.relevant_ratio = relevant_ratio
+        self.run_id = run_id # Changing it makes every article URL new
+        self.seed = seed
+        self.epoch = time.time() # Fixed publish times, so unchanged feeds have identical bodies
+
+
+def _title(config: FeedServerConfig, feed_index: int, item_index: int) -> str:
+    rng = random.Random(f"{config.seed}-{feed_index}-{item_index}")
+    titles = RELEVANT_TITLES if rng.random() < config.relevant_ratio else OTHER_TITLES
+    return f"{rng.choice(titles)} ({feed_index}-{item_index})"
+
+
+def render_feed(config: FeedServerConfig, base_url: str, feed_index: int) -> bytes:
+    items = []
+    for item_index in range(config.items_per_feed):
+        title = _title(config, feed_index, item_index)
+        link = f"{base_url}/article/{config.run_id}/{feed_index}/{item_index}?utm_source=rss&utm_medium=feed"
+        summary = f"<p>{escape(title)} &amp; more. <a href=\"{link}\">Read</a></p>"
+        published = formatdate(config.epoch - item_index * 600, usegmt=True)
+        items.append(
+            f"<item><title>{escape(title)}</title><link>{escape(link)}</link>"
+            f"<guid>{escape(link)}</guid><pubDate>{published}</pubDate>"
+            f"<description>{escape(summary)}</description></item>"
+        )
+    return (f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel>"
+            f"<title>Synthetic feed {feed_index}</title><link>{base_url}</link><description>Benchmark feed</description>"
+            f"{''.join(items)}</channel></rss>").encode('utf-8')
+
+
+def render_article(config: FeedServerConfig, feed_index: int, item_index: int) -> bytes:
+    title = _title(config, feed_index, item_index)
+    paragraph = f"<p>{escape(title)}. {PARAGRAPH}</p>"
+    repeat = max(1, config.article_kb * 1024 // len(paragraph))
+    return (f"<html><head><title>{escape(title)}</title></head><body><header><nav>Home | News</nav></header>"
+            f"<article><h1>{escape(title)}</h1>{paragraph * repeat}</article><footer>Footer</footer></body></html>").encode('utf-8')
+
+
+def make_handler(config: FeedServerConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, like real publishers
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            parts = self.path.split('?', 1)[0].strip('/').split('/')
+            base_url = f"http://{self.headers.get('Host')}"
+            if len(parts) == 2 and parts[0] == 'feed':
+                time.sleep(config.feed_latency)
+                body, content_type = render_feed(config, base_url, int(parts[1].split('.')[0])), "application/rss+xml"
+            elif len(parts) == 4 and parts[0] == 'article':
+                time.sleep(config.article_latency)
+                body, content_type = render_article(config, int(parts[2]), int(parts[3])), "text/html; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+class FeedServer:
+    """Runs the synthetic content server on a background thread, bound to all interfaces so every 127.0.0.x address reaches it."""
+
+    def __init__(self, config: FeedServerConfig, port: int = 0):
+        self.config = config
+        self.httpd = ThreadingHTTPServer(("", port), make_handler(config))
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self) -> 'FeedServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def feed_urls(self, hosts: int = 3) -> dict:
+        """Returns {source_name: url}, spreading feeds over `hosts` loopback addresses to emulate publishers."""
+        return {
+            f"Synthetic_{i:02d}": f"http://127.0.0.{1 + i % max(1, hosts)}:{self.port}/feed/{i}.xml"
+            for i in range(self.config.feeds)
+        }
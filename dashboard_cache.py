@@ -0,0 +1,195 @@
+# Article queries for the dashboard (through an article_store backend): keyset pages, counts and an in-memory facet cache
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ARTICLE_COLUMNS = (
+    'url, title, summary, feed_source_name, processed_at, '
+    'relevance_justification, category, tweet, instagram_caption, linkedin_post, flares, '
+    'hashtags, image_keywords'
+)
+# Light columns that are enough to build the filter options (sources, dates, flares)
+FACET_COLUMNS = 'url, feed_source_name, processed_at, category, flares'
+FETCH_CHUNK_SIZE = 1000 # Supabase caps a single response at 1000 rows by default
+LIST_COLUMNS = ('flares', 'hashtags', 'image_keywords') # JSON/list columns normalized to Python lists at load time
+
+
+def count_articles(store, **filters) -> int:
+    """Number of dashboard articles matching the filters, computed by the database (no rows are transferred)."""
+    return store.count_articles(relevant_only=True, **filters)
+
+
+def fetch_article_page(store, page_size: int, cursor: tuple = None, **filters) -> tuple:
+    """
+    Returns (rows, next_cursor) for one page, newest first (keyset pagination).
+    `filters` are sector, date_range (inclusive pair of UTC dates), sources and flares.
+    Many rows share a processed_at (one bulk upsert is one transaction), so the cursor
+    is (boundary processed_at, urls already shown at that timestamp) rather than the
+    timestamp alone. next_cursor is None on the last page.
+    """
+    if cursor is not None:
+        filters = {**filters, 'before': cursor[0], 'exclude_urls': tuple(cursor[1])}
+    rows = store.query_articles(ARTICLE_COLUMNS, limit=page_size + 1, relevant_only=True, **filters)
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    boundary = rows[-1]['processed_at']
+    shown = tuple(row['url'] for row in rows if row['processed_at'] == boundary)
+    if cursor is not None and cursor[0] == boundary: # The tie spans more than one page
+        shown = tuple(cursor[1]) + shown
+    return rows, (boundary, shown)
+
+
+def process_json_field(data_from_row):
+    """
+    Safely processes a field from a DataFrame row that is expected to contain
+    a list (either directly, as a JSON string, or wrapped in a Series/ndarray).
+    Returns a list of strings, or an empty list if data is missing/malformed.
+    """
+    actual_data = data_from_row
+
+    # 1. Handle bytes
+    if isinstance(actual_data, bytes):
+        try:
+            actual_data = actual_data.decode('utf-8')
+        except UnicodeDecodeError:
+            return []
+
+    # 2. Handle pandas Series/Arrays and NumPy arrays - try to get scalar or return empty
+    if isinstance(actual_data, (pd.Series, pd.arrays.NumpyExtensionArray, np.ndarray)):
+        if hasattr(actual_data, 'size') and actual_data.size == 1: # If it's a single-element array
+            actual_data = actual_data.item() if hasattr(actual_data, 'item') else actual_data[0]
+        else: # Multi-element array or empty array in a cell, treat as unprocessable for this function
+            return []
+
+    # 3. At this point, actual_data should be a Python scalar (None, NaN, str, list, int, float etc.)
+    #    or a Python list.
+
+    # Check for primary missing indicators
+    if actual_data is None: # Python None
+        return []
+
+    # If it's not a list or string, then check with pd.isna for other scalar missing types
+    if not isinstance(actual_data, (list, str)):
+        if pd.isna(actual_data): # For np.nan, pd.NA, etc. This is now safe.
+            return []
+        # If it's some other scalar (e.g., int, float) that's not NA,
+        # it will pass through. The subsequent isinstance checks for list/str will handle it
+        # (or it will result in an empty list if not list/str).
+    
+    processed_list = []
+    if isinstance(actual_data, list):
+        processed_list = [str(item) for item in actual_data if item is not None and not pd.isna(item)]
+    elif isinstance(actual_data, str):
+        if not actual_data.strip(): # Handle empty string case by returning empty list
+            return []
+        try:
+            parsed = json.loads(actual_data)
+            if isinstance(parsed, list):
+                processed_list = [str(item) for item in parsed if item is not None and not pd.isna(item)]
+        except (json.JSONDecodeError, TypeError):
+            pass # Keep processed_list empty
+    return processed_list
+
+
+def rows_to_frame(rows: list) -> pd.DataFrame:
+    """Builds a frame from query rows, parsing timestamps and list columns once so reruns can reuse them."""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = [process_json_field(value) for value in df[column]]
+    # Supabase timestamps do not always carry the same number of fractional digits
+    df['processed_at_ts'] = pd.to_datetime(df['processed_at'], utc=True, format='ISO8601')
+    df['processed_at_date'] = df['processed_at_ts'].dt.date
+    return df
+
+
+class ArticleCache:
+    """
+    Holds the `columns` of the most recent `max_rows` dashboard articles between Streamlit reruns.
+    Within `ttl_seconds` the cached frame is served without any query; after that only
+    rows with processed_at at or after the cached high-water mark are fetched and merged.
+    Every `full_reload_seconds` the table is reloaded completely so that deleted
+    (retention) and rewritten rows are picked up as well.
+    """
+
+    def __init__(self, store, columns: str = ARTICLE_COLUMNS, ttl_seconds: float = 300,
+                 full_reload_seconds: float = 3600, max_rows: int = 500):
+        self.store = store
+        self.columns = columns
+        self.ttl_seconds = ttl_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._df = pd.DataFrame()
+        self._flares = [] # Flare options of the cached rows
+        self._high_water_mark = None # Newest processed_at in the cache (UTC Timestamp)
+        self._checked_at = 0.0 # monotonic time of the last query
+        self._full_loaded_at = None
+        self.stats = {'full_loads': 0, 'incremental_loads': 0, 'cached_reads': 0, 'rows_fetched': 0}
+
+    def invalidate(self):
+        """Makes the next `get` query for new rows (e.g. right after the feeds were refreshed)."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def clear(self):
+        """Forgets everything; the next `get` does a full load."""
+        with self._lock:
+            self._full_loaded_at = None
+            self._checked_at = 0.0
+
+    def get(self) -> pd.DataFrame:
+        """Returns the cached articles, newest first. The frame is shared: copy it before modifying."""
+        return self.get_with_flares()[0]
+
+    def get_with_flares(self) -> tuple:
+        """Returns (frame, sorted flares found in it) from the same load."""
+        with self._lock:
+            now = time.monotonic()
+            if self._full_loaded_at is None or now - self._full_loaded_at >= self.full_reload_seconds:
+                self._full_load(now)
+            elif now - self._checked_at >= self.ttl_seconds:
+                self._incremental_load(now)
+            else:
+                self.stats['cached_reads'] += 1
+            return self._df, self._flares
+
+    def _fetch(self, since=None) -> list:
+        rows = []
+        while len(rows) < self.max_rows:
+            start = len(rows)
+            size = min(self.max_rows - start, FETCH_CHUNK_SIZE)
+            chunk = self.store.query_articles(self.columns, limit=size, offset=start, relevant_only=True, since=since)
+            rows.extend(chunk)
+            if len(chunk) < size: # Short chunk: no more rows
+                break
+        self.stats['rows_fetched'] += len(rows)
+        return rows
+
+    def _full_load(self, now: float):
+        self._set_frame(rows_to_frame(self._fetch()))
+        self._full_loaded_at = self._checked_at = now
+        self.stats['full_loads'] += 1
+
+    def _incremental_load(self, now: float):
+        if self._high_water_mark is None: # Nothing cached yet
+            self._full_load(now)
+            return
+        new_df = rows_to_frame(self._fetch(since=self._high_water_mark))
+        if not new_df.empty:
+            # gte re-fetches the rows at the high-water mark itself; the fresh copy wins
+            merged = pd.concat([new_df, self._df], ignore_index=True).drop_duplicates('url', keep='first')
+            self._set_frame(merged.sort_values('processed_at_ts', ascending=False, kind='stable').head(self.max_rows))
+        self._checked_at = now
+        self.stats['incremental_loads'] += 1
+
+    def _set_frame(self, df: pd.DataFrame):
+        self._df = df.reset_index(drop=True)
+        self._flares = sorted(set().union(*(flares for flares in self._df['flares'] if flares))) if 'flares' in self._df else []
+        self._high_water_mark = df['processed_at_ts'].max() if not df.empty else None
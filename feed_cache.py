@@ -0,0 +1,73 @@
+# Persistent per-feed HTTP validator cache (ETag / Last-Modified / content hash)
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class FeedCache:
+    """
+    Stores, per feed URL, the validators of the last successfully processed response
+    plus cumulative hit/miss counters. Backed by a single JSON file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        """Loads the cache file; a missing or corrupt file starts an empty cache."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read feed cache '{self.path}' ({e}). Starting with an empty cache.")
+            self._entries = {}
+
+    def save(self):
+        """Writes the cache atomically (temp file + rename)."""
+        with self._lock:
+            snapshot = json.dumps(self._entries, indent=1, sort_keys=True)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write feed cache '{self.path}': {e}")
+
+    def get(self, url: str) -> dict:
+        """Returns a copy of the cached entry for a feed URL (empty dict if unknown)."""
+        with self._lock:
+            return dict(self._entries.get(url, {}))
+
+    def commit(self, url: str, etag: str = None, last_modified: str = None, content_hash: str = None):
+        """Stores new validators for a feed once its content has been fully processed."""
+        with self._lock:
+            entry = self._entries.setdefault(url, {})
+            if etag is not None:
+                entry['etag'] = etag
+            if last_modified is not None:
+                entry['last_modified'] = last_modified
+            if content_hash is not None:
+                entry['content_hash'] = content_hash
+            entry['updated_at'] = datetime.now(timezone.utc).isoformat()
+
+    def record(self, url: str, hit: bool) -> dict:
+        """Increments the hit or miss counter of a feed and returns its totals."""
+        with self._lock:
+            entry = self._entries.setdefault(url, {})
+            key = 'hits' if hit else 'misses'
+            entry[key] = entry.get(key, 0) + 1
+            return {'hits': entry.get('hits', 0), 'misses': entry.get('misses', 0)}
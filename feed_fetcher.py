@@ -0,0 +1,88 @@
+# Concurrent RSS feed fetching for rss_reader.py
+import contextlib
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from feed_cache import FeedCache
+from host_throttle import HostThrottle
+from http_client import HttpClient, shared_client
+
+# Cache statuses that mean the feed body was not parsed at all
+CACHE_HIT_STATUSES = ('not_modified', 'unchanged')
+
+
+def conditional_get(url: str, etag: str = None, last_modified: str = None, timeout: float = 30, client: HttpClient = None):
+    """
+    Performs a GET with If-None-Match / If-Modified-Since headers over the shared client.
+    Returns (status, headers, body); body is None on 304 Not Modified and already decompressed otherwise.
+    Raises requests.HTTPError for error statuses.
+    """
+    import feedparser # ~70 ms; imported by the first fetch instead of by every importer of this module
+    headers = {'User-Agent': feedparser.USER_AGENT}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    response = (client or shared_client()).get(url, headers=headers, timeout=timeout)
+    response_headers = {k.lower(): v for k, v in response.headers.items()}
+    if response.status_code == 304:
+        return 304, response_headers, None
+    response.raise_for_status()
+    return response.status_code, response_headers, response.content
+
+
+def fetch_feed(source_name: str, feed_url: str, throttle: HostThrottle = None, cache: FeedCache = None, timeout: float = 30,
+               client: HttpClient = None) -> dict:
+    """
+    Downloads and parses a single feed.
+    With a cache, a conditional request is sent and parsing is skipped on 304 or an
+    identical body ('cache_status' is then 'not_modified' or 'unchanged' and 'feed' is None).
+    New validators are returned in 'validators'; the caller commits them to the cache
+    once the feed has been processed, so an interrupted run is retried next time.
+    Never raises: errors are returned in the 'error' key so the caller can report them.
+    """
+    result = {'source_name': source_name, 'feed_url': feed_url, 'feed': None, 'error': None, 'elapsed': 0.0,
+              'cache_status': 'disabled', 'validators': None}
+    started = time.monotonic()
+    try:
+        import feedparser
+        cached = cache.get(feed_url) if cache is not None else {}
+        with throttle.slot(feed_url) if throttle else contextlib.nullcontext():
+            status, headers, body = conditional_get(feed_url, cached.get('etag'), cached.get('last_modified'), timeout, client)
+
+        if status == 304:
+            result['cache_status'] = 'not_modified'
+        else:
+            if cache is not None:
+                content_hash = hashlib.sha256(body).hexdigest()
+                result['validators'] = {
+                    'etag': headers.get('etag'),
+                    'last_modified': headers.get('last-modified'),
+                    'content_hash': content_hash,
+                }
+                result['cache_status'] = 'unchanged' if content_hash == cached.get('content_hash') else 'miss'
+            if result['cache_status'] != 'unchanged':
+                headers.setdefault('content-location', feed_url) # Lets feedparser resolve relative links
+                result['feed'] = feedparser.parse(body, response_headers=headers)
+    except Exception as e:
+        result['error'] = e
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+
+def fetch_feeds_concurrently(feeds: dict, max_workers: int = 8, per_host_limit: int = 2, per_host_delay: float = 1.0,
+                             cache: FeedCache = None, timeout: float = 30, client: HttpClient = None):
+    """
+    Fetches all feeds in `feeds` ({source_name: url}) with a bounded thread pool.
+    Politeness is enforced per host (at most `per_host_limit` requests in flight and
+    `per_host_delay` seconds between request starts), not by a global sleep.
+    Yields one result dict (see fetch_feed) per feed, in completion order.
+    """
+    throttle = HostThrottle(max_per_host=per_host_limit, min_interval=per_host_delay)
+    max_workers = max(1, min(int(max_workers), len(feeds) or 1))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-fetch") as executor:
+        futures = [executor.submit(fetch_feed, source_name, feed_url, throttle, cache, timeout, client)
+                   for source_name, feed_url in feeds.items()]
+        for future in as_completed(futures):
+            yield future.result()
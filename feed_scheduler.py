@@ -0,0 +1,142 @@
+# Adaptive per-feed poll schedule for the reader's daemon mode
+import calendar
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def publish_rate(published: list, now: float = None):
+    """
+    Items per second over the window spanned by entry timestamps (epoch seconds, e.g.
+    from feedparser's published_parsed). Returns None with fewer than two usable dates.
+    """
+    now = time.time() if now is None else now
+    dates = sorted(t for t in published if t is not None and t <= now + 300) # Ignore dates far in the future
+    if len(dates) < 2 or dates[-1] <= dates[0]:
+        return None
+    return (len(dates) - 1) / (dates[-1] - dates[0])
+
+
+def entry_timestamps(feed) -> list:
+    """Epoch seconds of the published (or updated) date of each entry of a parsed feed."""
+    timestamps = []
+    for entry in feed.entries:
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        timestamps.append(calendar.timegm(parsed) if parsed else None)
+    return timestamps
+
+
+class FeedScheduler:
+    """
+    Decides when each feed is polled next. The publish rate of a feed (items/second) is
+    learned as a moving average of the new items found per second since the previous
+    poll, seeded from the entry timestamps on the first poll. The poll interval aims at
+    `target_new_per_poll` new items, clamped to [min_interval, max_interval]; failed polls
+    back off exponentially and every interval gets +/- `jitter` so feeds of one host drift
+    apart. The learned state is persisted as JSON so a restart keeps the rates.
+    """
+
+    def __init__(self, feeds: dict, path: str = None, min_interval: float = 120, max_interval: float = 3600,
+                 target_new_per_poll: float = 3, jitter: float = 0.1, smoothing: float = 0.3):
+        self.feeds = dict(feeds)
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_per_poll = target_new_per_poll
+        self.jitter = jitter
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        # source_name -> {'rate', 'interval', 'errors', 'last_poll_at', 'next_poll_at', 'polls', 'new_items'}
+        self._state = {source_name: self._new_state() for source_name in self.feeds}
+        self.load()
+
+    def _new_state(self) -> dict:
+        return {'rate': None, 'interval': self.min_interval, 'errors': 0, 'last_poll_at': None,
+                'next_poll_at': 0.0, 'polls': 0, 'new_items': 0}
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read feed schedule '{self.path}' ({e}). Starting fresh.")
+            return
+        for source_name, state in saved.get('feeds', {}).items():
+            if source_name in self._state and isinstance(state, dict):
+                self._state[source_name].update(state)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = json.dumps({'feeds': self._state})
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write feed schedule '{self.path}': {e}")
+
+    def due(self, now: float = None) -> list:
+        """Feeds whose next poll time has passed and that are not being polled, most overdue first; marks them in flight."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ready = sorted((state['next_poll_at'], source_name) for source_name, state in self._state.items()
+                           if source_name not in self._in_flight and state['next_poll_at'] <= now)
+            self._in_flight.update(source_name for _, source_name in ready)
+            return [source_name for _, source_name in ready]
+
+    def seconds_until_next(self, now: float = None) -> float:
+        """Time until the earliest poll of a feed that is not in flight (max_interval if all are)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            pending = [state['next_poll_at'] for source_name, state in self._state.items() if source_name not in self._in_flight]
+        return max(0.0, min(pending) - now) if pending else self.max_interval
+
+    def record(self, source_name: str, ok: bool, new_items: int = 0, published: list = None, now: float = None) -> float:
+        """Updates a feed's rate after a poll and schedules its next one; returns the delay until then."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._in_flight.discard(source_name)
+            state = self._state.setdefault(source_name, self._new_state())
+            state['polls'] += 1
+            if ok:
+                state['errors'] = 0
+                state['new_items'] += new_items
+                if state['last_poll_at'] is not None and now > state['last_poll_at']:
+                    sample = new_items / (now - state['last_poll_at'])
+                else: # First poll: all entries look new, so use their timestamps instead
+                    sample = publish_rate(published or [], now)
+                if sample is not None:
+                    previous = state['rate']
+                    state['rate'] = sample if previous is None else (1 - self.smoothing) * previous + self.smoothing * sample
+                rate = state['rate']
+                interval = self.target_new_per_poll / rate if rate else self.max_interval
+                state['interval'] = min(self.max_interval, max(self.min_interval, interval))
+                delay = state['interval']
+            else:
+                state['errors'] += 1
+                delay = min(self.max_interval, state['interval'] * 2 ** state['errors'])
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+            state['last_poll_at'] = now
+            state['next_poll_at'] = now + delay
+            return delay
+
+    def snapshot(self) -> dict:
+        """Copy of the per-feed state, for logging."""
+        with self._lock:
+            return {source_name: dict(state) for source_name, state in self._state.items()}
@@ -0,0 +1,146 @@
+# Per-feed high-water marks (newest handled entry) so only entries above them are cleaned and dedup-checked
+import calendar
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FUTURE_TOLERANCE_SECONDS = 3600 # Entry dates further ahead than this make a feed's dates untrustworthy for the run
+
+
+def entry_timestamp(entry):
+    """Epoch seconds of an entry's published (or updated) date, or None."""
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    return calendar.timegm(parsed) if parsed else None
+
+
+def entry_id(entry) -> str:
+    return entry.get('id') or entry.get('link') or ''
+
+
+class FeedWatermarks:
+    """
+    Remembers, per feed, the publish date of the newest entry already handled and the
+    ids of the entries carrying that date. `plan` orders a feed's entries newest first
+    and returns only those above the mark, so the steady-state cost of a feed follows
+    its new entries instead of its length.
+
+    A feed is scanned in full when it has no mark yet, when some entries have no (or
+    a future) date, when it is flagged unreliable, and every `verify_every`-th time as
+    a check. A full scan that finds a new entry dated at or below the mark means the
+    feed publishes out of order (e.g. aggregators showing older stories late): it is
+    flagged unreliable until `recover_after` consecutive full scans find no such entry.
+
+    Like feed validators, a new mark is only proposed by `record` and made permanent by
+    `commit` once the feed's articles have been processed.
+    """
+
+    def __init__(self, path: str, verify_every: int = 20, recover_after: int = 5):
+        self.path = path
+        self.verify_every = verify_every
+        self.recover_after = recover_after
+        self._lock = threading.Lock()
+        self._marks = {} # source -> {'published', 'ids', 'reliable', 'scans', 'clean_full_scans'}
+        self._pending = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._marks = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read feed watermarks '{self.path}' ({e}). Scanning all feeds in full.")
+
+    def plan(self, source: str, entries: list) -> dict:
+        """
+        Returns {'entries': entries to scan, 'mode': 'incremental' or 'full', 'reason',
+        'skipped': number of entries at or below the mark, 'dated': [(timestamp, entry)]}.
+        """
+        dated = [(entry_timestamp(entry), entry) for entry in entries]
+        with self._lock:
+            state = dict(self._marks.get(source) or {})
+            scans = state.get('scans', 0) + 1
+            self._marks.setdefault(source, {})['scans'] = scans
+        reason = None
+        if not state.get('published'):
+            reason = 'no mark yet'
+        elif any(timestamp is None for timestamp, _ in dated):
+            reason = 'undated entries'
+        elif any(timestamp > time.time() + FUTURE_TOLERANCE_SECONDS for timestamp, _ in dated):
+            reason = 'future dates'
+        elif not state.get('reliable', True):
+            reason = 'out-of-order feed'
+        elif self.verify_every and scans % self.verify_every == 0:
+            reason = 'periodic check'
+        if reason:
+            return {'entries': list(entries), 'mode': 'full', 'reason': reason, 'skipped': 0, 'dated': dated, 'mark': state}
+
+        mark, mark_ids = state['published'], set(state.get('ids', []))
+        newest_first = sorted(dated, key=lambda item: item[0], reverse=True) # Stable: feed order within a date
+        selected = []
+        for timestamp, entry in newest_first:
+            if timestamp < mark:
+                break # Everything after this is older than the mark
+            if timestamp > mark or entry_id(entry) not in mark_ids:
+                selected.append(entry)
+        return {'entries': selected, 'mode': 'incremental', 'reason': None, 'skipped': len(entries) - len(selected),
+                'dated': dated, 'mark': state}
+
+    def record(self, source: str, plan: dict, unseen_entries: list):
+        """
+        After the dedup check: `unseen_entries` are the scanned entries that were not known
+        yet. Checks a full scan for out-of-order entries and proposes the new mark.
+        """
+        mark = plan['mark'].get('published')
+        now = time.time() + FUTURE_TOLERANCE_SECONDS
+        dates = [timestamp for timestamp, _ in plan['dated'] if timestamp is not None and timestamp <= now]
+        with self._lock:
+            state = self._marks.setdefault(source, {})
+            if plan['mode'] == 'full' and mark and plan['reason'] != 'undated entries':
+                late = [entry for entry in unseen_entries
+                        if (entry_timestamp(entry) or mark) < mark
+                        or (entry_timestamp(entry) == mark and entry_id(entry) not in set(plan['mark'].get('ids', [])))]
+                if late:
+                    if state.get('reliable', True):
+                        logger.info(f"{source}: {len(late)} new entries dated at or before the high-water mark. "
+                                    f"Scanning this feed in full from now on.", extra={'feed': source})
+                    state['reliable'] = False
+                    state['clean_full_scans'] = 0
+                elif not state.get('reliable', True):
+                    state['clean_full_scans'] = state.get('clean_full_scans', 0) + 1
+                    if state['clean_full_scans'] >= self.recover_after:
+                        state['reliable'] = True
+            if dates:
+                newest = max(dates)
+                if not mark or newest >= mark:
+                    ids = {entry_id(entry) for timestamp, entry in plan['dated'] if timestamp == newest}
+                    if newest == mark: # Same date: keep the ids already known at that date
+                        ids |= set(plan['mark'].get('ids', []))
+                    self._pending[source] = {'published': newest, 'ids': sorted(ids)}
+
+    def commit(self, source: str):
+        """Makes the proposed mark permanent (call once the feed's articles were processed)."""
+        with self._lock:
+            pending = self._pending.pop(source, None)
+            if pending:
+                self._marks.setdefault(source, {}).update(pending)
+
+    def discard(self, source: str):
+        with self._lock:
+            self._pending.pop(source, None)
+
+    def save(self):
+        with self._lock:
+            snapshot = json.dumps(self._marks)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write feed watermarks '{self.path}': {e}")
@@ -0,0 +1,50 @@
+# Per-host politeness for outgoing HTTP requests (feeds, article pages)
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+def host_of(url: str) -> str:
+    """Returns the lowercased host name of a URL ('' if it has none)."""
+    return (urlparse(url).hostname or '').lower()
+
+
+class HostThrottle:
+    """
+    Caps the number of in-flight requests per host and spaces out request
+    starts to the same host by at least `min_interval` seconds.
+    Different hosts never wait on each other.
+    """
+
+    def __init__(self, max_per_host: int = 1, min_interval: float = 0.0):
+        self.max_per_host = max(1, int(max_per_host))
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.max_per_host)
+                self._semaphores[host] = sem
+            return sem
+
+    @contextmanager
+    def slot(self, url: str):
+        """Blocks until a request to the URL's host may start, then holds a slot for it."""
+        host = host_of(url)
+        sem = self._semaphore(host)
+        sem.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start_at + self.min_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield
+        finally:
+            sem.release()
@@ -0,0 +1,126 @@
+# Shared HTTP client (connection pooling, TLS, timeouts) for feed, article and redirect requests
+# requests and certifi are imported when the first client is created, not when this module is.
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_ssl_contexts = {} # CA bundle path (None: certifi's, or the system store) -> verifying context
+_ssl_context_lock = threading.Lock()
+
+
+def ssl_context(cafile: str = None):
+    """
+    One verifying ssl.SSLContext per CA bundle for the whole process; by default with
+    certifi's bundle when installed. `cafile` is a bundle given by requests' `verify`
+    (e.g. from REQUESTS_CA_BUNDLE), loaded once here instead of for every connection.
+    """
+    import ssl
+    with _ssl_context_lock:
+        if cafile not in _ssl_contexts:
+            if cafile is not None:
+                _ssl_contexts[cafile] = ssl.create_default_context(cafile=cafile)
+            else:
+                try:
+                    import certifi # Up-to-date CA bundle; some feeds fail verification against older system stores
+                    _ssl_contexts[None] = ssl.create_default_context(cafile=certifi.where())
+                except ImportError:
+                    logger.warning("certifi not found. SSL verification might still fail for some feeds.")
+                    _ssl_contexts[None] = ssl.create_default_context()
+        return _ssl_contexts[cafile]
+
+
+def _shared_context_for(verify):
+    """The shared context for a requests `verify` value; None when not verifying or given a CA directory."""
+    if verify is True:
+        return ssl_context()
+    if isinstance(verify, str) and os.path.isfile(verify):
+        return ssl_context(verify)
+    return None
+
+
+_adapter_class = None
+
+
+def shared_context_adapter_class():
+    """
+    HTTPAdapter that hands every connection a shared context instead of a CA bundle
+    path to load again per connection (defined on first use, so requests is imported lazily).
+    """
+    global _adapter_class
+    if _adapter_class is None:
+        from requests.adapters import HTTPAdapter
+
+        class SharedContextAdapter(HTTPAdapter):
+            def build_connection_pool_key_attributes(self, request, verify, cert=None):
+                # requests picks the pool by these attributes: a bundle path (REQUESTS_CA_BUNDLE turns verify=True
+                # into one) would be loaded for every connection, and 2.32.2-2.32.3 add a context of their own.
+                # Without a shared context (verify=False, a CA directory) urllib3 builds one per connection,
+                # so turning verification off never touches the shared verifying context.
+                host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+                context = _shared_context_for(verify)
+                if context is not None:
+                    pool_kwargs.pop('ca_certs', None)
+                pool_kwargs['ssl_context'] = context
+                return host_params, pool_kwargs
+
+            def cert_verify(self, conn, url, verify, cert):
+                if url.lower().startswith('https') and _shared_context_for(verify) is not None:
+                    super().cert_verify(conn, url, False, cert) # Client certificate only
+                    conn.cert_reqs = 'CERT_REQUIRED' # CA certificates come with the shared context
+                    return
+                super().cert_verify(conn, url, verify, cert)
+
+        _adapter_class = SharedContextAdapter
+    return _adapter_class
+
+
+class HttpClient:
+    """
+    A requests session shared by all threads: keep-alive connections are pooled per
+    host (up to `pool_maxsize` idle connections for each of `pool_hosts` hosts), TLS
+    uses one cached SSL context and gzip/deflate bodies are decoded by urllib3.
+    Timeouts are (connect, read): `connect_timeout` caps the connect phase of every
+    request, the read timeout is passed per request.
+    """
+
+    def __init__(self, pool_hosts: int = 32, pool_maxsize: int = 4, connect_timeout: float = 10):
+        import requests # ~80 ms; only paid once something is downloaded
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = shared_context_adapter_class()(pool_connections=pool_hosts, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    def get(self, url: str, headers: dict = None, timeout: float = 30, stream: bool = False):
+        """GET following redirects; returns the requests.Response. Close streamed responses (or use them as context managers)."""
+        return self.session.get(url, headers=headers, timeout=(min(self.connect_timeout, timeout), timeout), stream=stream)
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client = None
+_shared_client_options = {}
+_shared_client_lock = threading.Lock()
+
+
+def configure_shared_client(**kwargs):
+    """Sets the options (see HttpClient) of the process-wide client; it is (re)created on next use."""
+    global _shared_client, _shared_client_options
+    with _shared_client_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
+        _shared_client_options = dict(kwargs)
+
+
+def shared_client() -> HttpClient:
+    """The process-wide client, created on first use."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient(**_shared_client_options)
+        return _shared_client
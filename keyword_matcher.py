@@ -0,0 +1,133 @@
+# Compiled multi-keyword matcher (Aho-Corasick) for the keyword classifiers in rss_reader.py
+from collections import deque
+
+try:
+    import ahocorasick # Optional C implementation (pip install pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """
+    Finds which of a fixed set of keywords occur in a text in one linear pass.
+    Matching is case-insensitive. By default a keyword matches anywhere, exactly like
+    `keyword in text`; with `word_boundaries=True` it must not be preceded or followed
+    by a letter/digit (so "ai" no longer matches inside "said").
+    """
+
+    def __init__(self, keywords, word_boundaries: bool = False, use_c_extension: bool = True):
+        self.keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+        self.word_boundaries = word_boundaries
+        self._automaton = None
+        if use_c_extension and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for index, keyword in enumerate(self.keywords):
+                self._automaton.add_word(keyword, (index, keyword))
+            self._automaton.make_automaton()
+        else:
+            self._build_python_automaton()
+
+    def _build_python_automaton(self):
+        """Builds a full transition table (DFA) so matching needs one dict lookup per character."""
+        goto = [{}]
+        outputs = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+
+        # Breadth-first pass: failure links, merged outputs and completed transitions
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(delta[fail[state]])
+            transitions.update(goto[state])
+            delta[state] = transitions
+            for ch, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                queue.append(next_state)
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+
+    def _iter_matches(self, text: str):
+        """Yields (end_index, keyword_index) for every occurrence, overlapping ones included."""
+        if self._automaton is not None:
+            if text:
+                for end, (index, _) in self._automaton.iter(text):
+                    yield end, index
+            return
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for position, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    yield position, index
+
+    def _iter_hits(self, text: str):
+        """Yields the keyword index of every occurrence in the lowercased text, honouring word_boundaries."""
+        keywords = self.keywords
+        for end, index in self._iter_matches(text):
+            if self.word_boundaries:
+                start = end - len(keywords[index]) + 1
+                if (start > 0 and _is_word_char(text[start - 1])) or (end + 1 < len(text) and _is_word_char(text[end + 1])):
+                    continue
+            yield index
+
+    def find(self, text: str) -> set:
+        """Returns the set of keywords (lowercased) present in the text."""
+        return {self.keywords[index] for index in set(self._iter_hits(text.lower()))}
+
+    def count(self, text: str) -> dict:
+        """Returns {keyword index: number of occurrences} for the keywords present in the text."""
+        counts = {}
+        for index in self._iter_hits(text.lower()):
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+
+
+class KeywordClassifier:
+    """
+    Relevance and sector scoring over one shared automaton built from the relevance
+    keyword list and the sector keyword map, so an article text is scanned only once.
+    """
+
+    def __init__(self, relevance_keywords: list, sector_keywords_map: dict, word_boundaries: bool = False,
+                 use_c_extension: bool = True):
+        self.relevance_keywords = list(relevance_keywords)
+        self.sector_keywords_map = {sector: list(keywords) for sector, keywords in sector_keywords_map.items()}
+        all_keywords = self.relevance_keywords + [kw for kws in self.sector_keywords_map.values() for kw in kws]
+        self.matcher = KeywordMatcher(all_keywords, word_boundaries=word_boundaries, use_c_extension=use_c_extension)
+
+    def analyze(self, title: str, summary: str) -> dict:
+        """
+        Returns {'relevant', 'justification', 'sector_scores', 'matched_keywords'} for
+        the text `title + " " + summary`. The justification names the first relevance
+        keyword (in list order) that matched, as qualify_article_relevance always did.
+        """
+        matched = self.matcher.find(title + " " + summary)
+        justification_keyword = next((kw for kw in self.relevance_keywords if kw.lower() in matched), None)
+        sector_scores = {
+            sector: sum(1 for kw in keywords if kw.lower() in matched)
+            for sector, keywords in self.sector_keywords_map.items()
+        }
+        return {
+            'relevant': justification_keyword is not None,
+            'justification': justification_keyword,
+            'sector_scores': sector_scores,
+            'matched_keywords': matched,
+        }
@@ -0,0 +1,165 @@
+# In-process counters and latency histograms with JSON and Prometheus text exports
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Latency buckets in seconds (upper bounds), shared by every histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_SAMPLES_PER_SERIES = 10000 # Raw samples kept per series for the p50/p95 in the JSON summary
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and histograms, each keyed by metric name and label set."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self.reset()
+
+    def reset(self):
+        """Clears all series (called at the start of each reader run)."""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self.started_at = datetime.now(timezone.utc)
+
+    def describe(self, name: str, help_text: str):
+        """Registers the HELP text shown in the Prometheus export."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.buckets), 'samples': []}
+                self._histograms[key] = series
+            series['count'] += 1
+            series['sum'] += seconds
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    series['buckets'][i] += 1
+            if len(series['samples']) < MAX_SAMPLES_PER_SERIES:
+                series['samples'].append(seconds)
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        """
+        Observes the duration of the block in histogram `name` (e.g. rss_stage_seconds);
+        exceptions escaping the block are counted in the matching `*_errors_total` counter.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            base_name = name[:-len('_seconds')] if name.endswith('_seconds') else name
+            self.inc(f"{base_name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator form of `time`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        """Returns a JSON-serializable summary of all series."""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), series in sorted(self._histograms.items()):
+                samples = sorted(series['samples'])
+                histograms.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': series['count'],
+                    'sum_seconds': series['sum'],
+                    'p50_seconds': _percentile(samples, 0.50),
+                    'p95_seconds': _percentile(samples, 0.95),
+                    'max_seconds': samples[-1] if samples else 0.0,
+                })
+            return {
+                'started_at': self.started_at.isoformat(),
+                'finished_at': datetime.now(timezone.utc).isoformat(),
+                'counters': counters,
+                'histograms': histograms,
+            }
+
+    def to_prometheus(self) -> str:
+        """Renders all series in the Prometheus text exposition format."""
+        def fmt_labels(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in items) + '}'
+
+        lines = []
+        with self._lock:
+            for metric_type, series_map in (('counter', self._counters), ('histogram', self._histograms)):
+                for name in sorted({name for name, _ in series_map}):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    for (series_name, labels), value in sorted(series_map.items()):
+                        if series_name != name:
+                            continue
+                        if metric_type == 'counter':
+                            lines.append(f"{name}{fmt_labels(labels)} {value}")
+                            continue
+                        for upper, count in zip(self.buckets, value['buckets']): # Counts are already cumulative
+                            lines.append(f"{name}_bucket{fmt_labels(labels, [('le', repr(upper))])} {count}")
+                        lines.append(f"{name}_bucket{fmt_labels(labels, [('le', '+Inf')])} {value['count']}")
+                        lines.append(f"{name}_sum{fmt_labels(labels)} {value['sum']}")
+                        lines.append(f"{name}_count{fmt_labels(labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory: str, basename: str = 'last_run', extra: dict = None) -> tuple:
+        """Writes <basename>.json and <basename>.prom atomically; returns both paths."""
+        os.makedirs(directory, exist_ok=True)
+        summary = self.snapshot()
+        if extra:
+            summary.update(extra)
+        paths = (os.path.join(directory, f"{basename}.json"), os.path.join(directory, f"{basename}.prom"))
+        for path, content in zip(paths, (json.dumps(summary, indent=2), self.to_prometheus())):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return paths
+
+
+registry = MetricsRegistry() # Shared by the reader and its helper modules
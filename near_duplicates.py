@@ -0,0 +1,133 @@
+# SimHash signatures of title + summary to spot the same story published under different URLs
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_BITS = 64
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text: str):
+    """
+    64-bit SimHash over the word unigrams and bigrams of `text`; similar texts get
+    signatures with a small Hamming distance. Returns (signature, number of tokens).
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIGNATURE_BITS
+    for feature in features:
+        h = _feature_hash(feature)
+        for bit in range(SIGNATURE_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature, len(tokens)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """
+    Signatures of recently processed stories, with the feeds/URLs that carried a copy
+    of each story (aliases). Lookups use band buckets: a signature is split into
+    max_distance + 1 bands, and any signature within `max_distance` bits must share at
+    least one band exactly, so only a handful of candidates are compared.
+    Entries older than `retention_days` are dropped; the index is persisted as JSON.
+    """
+
+    def __init__(self, path: str, max_distance: int = 3, retention_days: int = 7, min_tokens: int = 6):
+        self.path = path
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = SIGNATURE_BITS // self.bands
+        self.retention = timedelta(days=retention_days)
+        self.min_tokens = min_tokens
+        self._lock = threading.Lock()
+        self._entries = {} # url -> {'signature', 'source', 'added_at', 'aliases': [[source, url], ...]}
+        self._buckets = {} # (band index, band value) -> set of urls
+        self.load()
+
+    def _band_keys(self, signature: int):
+        mask = (1 << self.band_bits) - 1
+        return [(band, (signature >> (band * self.band_bits)) & mask) for band in range(self.bands)]
+
+    def _insert(self, url: str, entry: dict):
+        self._entries[url] = entry
+        for key in self._band_keys(entry['signature']):
+            self._buckets.setdefault(key, set()).add(url)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            cutoff = datetime.now(timezone.utc) - self.retention
+            for url, entry in data.get('entries', {}).items():
+                entry['signature'] = int(entry['signature'], 16)
+                if datetime.fromisoformat(entry['added_at']) >= cutoff:
+                    self._insert(url, entry)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not read near-duplicate index '{self.path}' ({e}). Starting empty.")
+
+    def _prune(self):
+        cutoff = datetime.now(timezone.utc) - self.retention
+        for url in [url for url, entry in self._entries.items() if datetime.fromisoformat(entry['added_at']) < cutoff]:
+            for key in self._band_keys(self._entries.pop(url)['signature']):
+                self._buckets[key].discard(url)
+
+    def save(self):
+        """Drops expired stories and writes the index atomically."""
+        with self._lock:
+            self._prune()
+            entries = {url: {**entry, 'signature': format(entry['signature'], 'x')} for url, entry in self._entries.items()}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write near-duplicate index '{self.path}': {e}")
+
+    def check_and_add(self, url: str, source: str, text: str):
+        """
+        Returns the URL of an indexed story that `text` nearly duplicates (recording
+        `source`/`url` as its alias), or None after indexing `url` as a new story.
+        Texts shorter than `min_tokens` words are neither matched nor indexed (too little signal).
+        """
+        signature, num_tokens = simhash(text)
+        if num_tokens < self.min_tokens:
+            return None
+        with self._lock:
+            for key in self._band_keys(signature):
+                for candidate in self._buckets.get(key, ()):
+                    entry = self._entries[candidate]
+                    if candidate != url and hamming_distance(signature, entry['signature']) <= self.max_distance:
+                        entry['aliases'].append([source, url])
+                        return candidate
+            self._insert(url, {'signature': signature, 'source': source,
+                               'added_at': datetime.now(timezone.utc).isoformat(), 'aliases': []})
+            return None
+
+    def aliases(self, url: str) -> list:
+        """[source, url] pairs of the copies folded into the story stored under `url`."""
+        with self._lock:
+            entry = self._entries.get(url)
+            return [list(alias) for alias in entry['aliases']] if entry else []
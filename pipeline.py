@@ -0,0 +1,110 @@
+# Minimal staged pipeline: worker threads per stage connected by bounded queues
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_END = object() # Sentinel telling a stage worker that its input is exhausted
+
+
+class Stage:
+    """
+    One pipeline step. `func(item)` returns an iterable of output items (empty to drop
+    the item) which are passed to the next stage. `flush()` is called once after the
+    last item, and any items it returns are passed on as well (used for batching).
+    Exceptions are counted and reported; they drop the item without stopping the stage.
+    The input queue holds at most `queue_size` items, so a slow stage blocks the
+    stages feeding it instead of letting work pile up in memory.
+    """
+
+    def __init__(self, name: str, func, workers: int = 1, queue_size: int = 100, flush=None, on_error=None):
+        self.name = name
+        self.func = func
+        self.on_error = on_error # Optional callback(item, exception)
+        self.workers = max(1, int(workers))
+        self.flush = flush
+        self.input = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.output = None # Input queue of the next stage (None for the last stage)
+        self._next_stage_workers = 0
+        self._lock = threading.Lock()
+        self._running_workers = self.workers
+        self.stats = {'in': 0, 'out': 0, 'errors': 0, 'busy_seconds': 0.0, 'max_queue': 0}
+
+    def _emit(self, items):
+        if items is None or self.output is None:
+            return
+        for item in items:
+            self.output.put(item) # Blocks while the next stage is saturated (backpressure)
+            with self._lock:
+                self.stats['out'] += 1
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                self.stats['max_queue'] = max(self.stats['max_queue'], self.input.qsize())
+            item = self.input.get()
+            if item is _END:
+                break
+            started = time.monotonic()
+            try:
+                self._emit(self.func(item))
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                logger.error(f"Pipeline stage '{self.name}' failed on an item: {e}")
+                if self.on_error is not None:
+                    self.on_error(item, e)
+            with self._lock:
+                self.stats['in'] += 1
+                self.stats['busy_seconds'] += time.monotonic() - started
+
+        with self._lock:
+            self._running_workers -= 1
+            last_worker = self._running_workers == 0
+        if last_worker:
+            if self.flush is not None:
+                try:
+                    self._emit(self.flush())
+                except Exception as e:
+                    logger.error(f"Pipeline stage '{self.name}' failed while flushing: {e}")
+            if self.output is not None:
+                for _ in range(self._next_stage_workers):
+                    self.output.put(_END)
+
+
+class Pipeline:
+    """Runs a list of stages; items fed to `run` enter the first stage."""
+
+    def __init__(self, stages: list):
+        self.stages = stages
+        for current, following in zip(stages, stages[1:]):
+            current.output = following.input
+            current._next_stage_workers = following.workers
+        stages[-1]._next_stage_workers = 0
+
+    def run(self, items):
+        """Feeds all items through the pipeline and returns once every stage has drained."""
+        threads = []
+        for stage in self.stages:
+            for i in range(stage.workers):
+                thread = threading.Thread(target=stage._worker, name=f"{stage.name}-{i}", daemon=True)
+                thread.start()
+                threads.append(thread)
+        first = self.stages[0]
+        for item in items:
+            first.input.put(item)
+        for _ in range(first.workers):
+            first.input.put(_END)
+        for thread in threads:
+            thread.join()
+
+    def report(self):
+        """Logs per-stage counters."""
+        logger.info("--- Pipeline stages ---")
+        logger.info(f"{'stage':<12} {'workers':>7} {'in':>6} {'out':>6} {'errors':>6} {'busy s':>8} {'max queue':>9}")
+        for stage in self.stages:
+            stats = stage.stats
+            logger.info(f"{stage.name:<12} {stage.workers:>7} {stats['in']:>6} {stats['out']:>6} {stats['errors']:>6} "
+                  f"{stats['busy_seconds']:>8.2f} {stats['max_queue']:>9}")
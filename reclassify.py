@@ -0,0 +1,169 @@
+# Re-runs relevance, categorization and social post generation over the stored articles.
+# Usage: python reclassify.py [--dry-run] [--workers 4] [--page-size 500] [--limit 1000]
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import rss_reader
+from article_store import open_article_store
+from log_config import configure_logging
+
+logger = logging.getLogger("reclassify")
+
+SOURCE_COLUMNS = ('url', 'title', 'summary', 'feed_source_name', 'full_text')
+# Columns computed by rss_reader.build_article_record from the source columns
+CLASSIFIED_COLUMNS = ('is_relevant', 'relevance_justification', 'category', 'tweet', 'instagram_caption',
+                      'linkedin_post', 'hashtags', 'image_keywords')
+LIST_COLUMNS = ('hashtags', 'image_keywords')
+DIFF_VALUE_CHARS = 80 # Old/new values are shortened to this in the dry-run diff
+
+
+def _normalized(column: str, value):
+    if column in LIST_COLUMNS:
+        if isinstance(value, str): # JSON text (SQLite, or a text column in Supabase)
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return value
+        return sorted(value) if value else None # Older rows were generated in arbitrary order
+    if column == 'is_relevant':
+        return bool(value)
+    return value
+
+
+def reclassify_rows(rows: list) -> list:
+    """
+    Worker: classifies a chunk of stored articles with the current keyword tables, as one
+    analyze_articles batch. Returns (url, {column: (old, new)}, new record) per row, where
+    the changes are the computed columns that differ.
+    """
+    texts = [rss_reader.text_for_analysis(row.get('summary') or '', row.get('full_text')) for row in rows]
+    analyses = rss_reader.analyze_articles([(row.get('title') or '', text) for row, text in zip(rows, texts)])
+    results = []
+    for row, analysis in zip(rows, analyses):
+        record = rss_reader.build_article_record(row['url'], row.get('title') or '', row.get('summary') or '',
+                                                 row.get('feed_source_name'), row.get('full_text'), analysis)
+        changes = {column: (row.get(column), record[column]) for column in CLASSIFIED_COLUMNS
+                   if _normalized(column, row.get(column)) != _normalized(column, record[column])}
+        results.append((row['url'], changes, record))
+    return results
+
+
+def _init_worker(log_level: str):
+    configure_logging(log_level) # Each process logs on its own; per-article details stay off by default
+
+
+def _shorten(value) -> str:
+    text = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else repr(value)
+    return text if len(text) <= DIFF_VALUE_CHARS else f"{text[:DIFF_VALUE_CHARS - 3]}..."
+
+
+def print_diff(url: str, changes: dict):
+    print(f"~ {url}")
+    for column, (old, new) in changes.items():
+        print(f"    {column}: {_shorten(old)} -> {_shorten(new)}")
+
+
+def write_changes(store, changed: list) -> int:
+    """
+    Writes the computed columns that changed, given as (url, {column: (old, new)}); returns
+    how many rows could not be written. Rows with the same new values (e.g. only a new
+    category) share one update filtered on their urls, so a row deleted by retention since
+    it was read stays deleted, and processed_at is never touched.
+    """
+    groups = {} # New values (JSON) -> (fields, urls)
+    for url, changes in changed:
+        fields = {column: new for column, (_, new) in changes.items()}
+        groups.setdefault(json.dumps(fields, sort_keys=True), (fields, []))[1].append(url)
+    failed = 0
+    for fields, urls in groups.values():
+        try:
+            store.update_articles(urls, fields)
+        except Exception as e:
+            logger.error(f"Could not write {len(urls)} reclassified articles: {e}")
+            failed += len(urls)
+    return failed
+
+
+def reclassify(store, workers: int = None, page_size: int = 500, batch_size: int = 100, dry_run: bool = False,
+               limit: int = None, worker_log_level: str = "WARNING") -> dict:
+    """
+    Streams the stored articles page by page (newest first), classifies each page across a
+    process pool (in chunks, each classified as one batch) and writes back only the rows whose computed columns changed.
+    With `dry_run` the changes are printed as a diff instead. Returns run statistics.
+    """
+    total = store.count_articles()
+    if limit is not None:
+        total = min(total, limit)
+    stats = {'articles': 0, 'changed': 0, 'written': 0, 'failed': 0, 'columns': {}}
+    started = time.perf_counter()
+    logger.info(f"Reclassifying {total} stored articles with {workers or os.cpu_count()} worker processes"
+                f"{' (dry run)' if dry_run else ''}.")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(worker_log_level,)) as executor:
+        offset = 0
+        while offset < total:
+            # processed_at is never rewritten, so offsets stay stable; rows stored meanwhile only shift old ones down
+            rows = store.query_articles(SOURCE_COLUMNS + CLASSIFIED_COLUMNS, limit=min(page_size, total - offset), offset=offset)
+            if not rows:
+                break
+            offset += len(rows)
+            pending = []
+            chunk_size = max(1, len(rows) // (4 * (workers or os.cpu_count() or 1)))
+            chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+            for url, changes, _ in itertools.chain.from_iterable(executor.map(reclassify_rows, chunks)):
+                stats['articles'] += 1
+                if not changes:
+                    continue
+                stats['changed'] += 1
+                for column in changes:
+                    stats['columns'][column] = stats['columns'].get(column, 0) + 1
+                if dry_run:
+                    print_diff(url, changes)
+                    continue
+                pending.append((url, changes))
+                if len(pending) >= batch_size:
+                    failed = write_changes(store, pending)
+                    stats['failed'] += failed
+                    stats['written'] += len(pending) - failed
+                    pending = []
+            failed = write_changes(store, pending)
+            stats['failed'] += failed
+            stats['written'] += len(pending) - failed
+            elapsed = time.perf_counter() - started
+            logger.info(f"{stats['articles']}/{total} articles ({stats['articles'] / elapsed:.0f}/s), "
+                        f"{stats['changed']} changed, {stats['written']} written.")
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-apply the current keyword rules and post templates to stored articles.")
+    parser.add_argument("--dry-run", action="store_true", help="Print a diff of the rows that would change; write nothing")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--page-size", type=int, default=500, help="Articles read per query")
+    parser.add_argument("--batch-size", type=int, default=100, help="Changed rows per write batch; rows with the same new values share one update")
+    parser.add_argument("--limit", type=int, default=None, help="Only the newest N articles")
+    parser.add_argument("--log-level", default=rss_reader.LOG_LEVEL, help="DEBUG, INFO, WARNING or ERROR (env LOG_LEVEL)")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level)
+
+    try:
+        store = open_article_store(rss_reader.STORAGE_BACKEND, rss_reader.SUPABASE_URL, rss_reader.SUPABASE_SERVICE_KEY,
+                                   rss_reader.SQLITE_PATH)
+    except ValueError as e:
+        logger.error(f"{e} Exiting.")
+        return 1
+    stats = reclassify(store, workers=args.workers, page_size=args.page_size, batch_size=args.batch_size,
+                       dry_run=args.dry_run, limit=args.limit)
+    columns = ', '.join(f"{column} {count}" for column, count in sorted(stats['columns'].items())) or 'none'
+    logger.info(f"Done in {stats['seconds']:.1f}s: {stats['articles']} articles, {stats['changed']} changed "
+                f"({columns}), {stats['written']} written, {stats['failed']} failed.")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+# Background run of the reader for the dashboard: in this process, or as rss_reader.py with progress parsed from its output
+import collections
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+
+PROGRESS_PREFIX = "PROGRESS "
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Exists, owned by someone else
+        return True
+    return True
+
+
+def _lock_owner(path: str) -> int:
+    """Pid in a lock file; 0 if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+class _LogTailHandler(logging.Handler):
+    """Forwards log records emitted during an in-process run to the job's log tail."""
+
+    def __init__(self, append, level=logging.WARNING):
+        super().__init__(level)
+        self.append = append
+        self.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        try:
+            self.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class RefreshJob:
+    """
+    Runs the reader in the background and keeps a snapshot of its progress events for
+    the UI to poll. With `target`, the reader runs in a thread of this process:
+    `target(progress)` is called with a `progress(event, data)` callback and its
+    warnings are collected as the log tail. Otherwise `command` is started as a
+    subprocess (it must include --progress) and its output is parsed.
+    Only one run at a time: a second `start` is refused while a run is active in this
+    process, and `lock_path` (a file holding the runner's pid) also keeps other
+    dashboard processes from starting one.
+    """
+
+    def __init__(self, command: list = None, cwd: str = None, lock_path: str = None, log_lines: int = 50, target=None):
+        if (command is None) == (target is None):
+            raise ValueError("RefreshJob needs either a command or a target")
+        self.command = command
+        self.target = target
+        self.cwd = cwd
+        self.lock_path = lock_path
+        self._lock = threading.Lock()
+        self._process = None
+        self._log_tail = collections.deque(maxlen=log_lines)
+        self._state = {'run_id': 0, 'running': False, 'returncode': None, 'started_at': None, 'finished_at': None}
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._state['running']
+
+    def start(self) -> bool:
+        """Starts a run in the background; returns False if one is already running."""
+        with self._lock:
+            if self._state['running'] or not self._acquire_lock_file():
+                return False
+            if self.command is not None:
+                try:
+                    self._process = subprocess.Popen(self.command, cwd=self.cwd, stdout=subprocess.PIPE,
+                                                     stderr=subprocess.STDOUT, text=True, bufsize=1)
+                except OSError:
+                    self._release_lock_file()
+                    raise
+            self._log_tail.clear()
+            self._state = {
+                'run_id': self._state['run_id'] + 1, 'running': True, 'returncode': None,
+                'started_at': time.time(), 'finished_at': None,
+                'feeds_total': None, 'feeds_done': 0, 'current_feed': None, 'failed_feeds': 0,
+                'new_articles': 0, 'stored_articles': 0,
+            }
+            process = self._process
+        if self.target is not None:
+            threading.Thread(target=self._run_target, name="refresh-job", daemon=True).start()
+        else:
+            threading.Thread(target=self._follow, args=(process,), name="refresh-job", daemon=True).start()
+        return True
+
+    def status(self) -> dict:
+        """Copy of the current (or last) run's progress plus the last lines of non-progress output."""
+        with self._lock:
+            return {**self._state, 'log_tail': list(self._log_tail)}
+
+    def _follow(self, process: subprocess.Popen):
+        try:
+            for line in process.stdout:
+                self._handle_line(line.rstrip('\n'))
+        finally:
+            self._finish(process.wait())
+
+    def _run_target(self):
+        handler = _LogTailHandler(self._append_log)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(handler)
+        returncode = 1
+        try:
+            if self.target(lambda event, data: self._handle_event({'event': event, **data})) is False:
+                self._append_log("WARNING the reader is already running in this process.")
+            else:
+                returncode = 0
+        except Exception as e:
+            self._append_log(f"ERROR refresh failed: {type(e).__name__}: {e}")
+        finally:
+            root_logger.removeHandler(handler)
+            self._finish(returncode)
+
+    def _finish(self, returncode: int):
+        with self._lock:
+            self._state.update(running=False, returncode=returncode, finished_at=time.time())
+            self._release_lock_file()
+
+    def _append_log(self, line: str):
+        with self._lock:
+            self._log_tail.append(line)
+
+    def _handle_line(self, line: str):
+        if not line.startswith(PROGRESS_PREFIX):
+            self._append_log(line)
+            return
+        try:
+            event = json.loads(line[len(PROGRESS_PREFIX):])
+        except ValueError:
+            return
+        self._handle_event(event)
+
+    def _handle_event(self, event: dict):
+        with self._lock:
+            state = self._state
+            kind = event.get('event')
+            if kind == 'start':
+                state['feeds_total'] = event.get('feeds')
+            elif kind == 'feed':
+                state['feeds_done'] += 1
+                state['current_feed'] = event.get('feed')
+                state['new_articles'] += event.get('new_articles', 0)
+                if event.get('status') == 'error':
+                    state['failed_feeds'] += 1
+            elif kind == 'stored':
+                state['stored_articles'] += event.get('articles', 0)
+
+    def _acquire_lock_file(self) -> bool:
+        if not self.lock_path:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        # The pid goes into a temporary file that is then linked into place, so the lock file never
+        # exists empty and a concurrent starter cannot mistake a live lock for a stale one
+        tmp_path = f"{self.lock_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(os.getpid()))
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, self.lock_path)
+                    return True
+                except FileExistsError:
+                    pass
+                owner = _lock_owner(self.lock_path)
+                if owner and _pid_alive(owner):
+                    return False
+                self._remove_stale_lock_file(owner) # Left behind by a crashed dashboard process
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def _remove_stale_lock_file(self, owner: int):
+        """Removes the lock file of dead `owner`, unless another starter has replaced it meanwhile."""
+        stale_path = f"{self.lock_path}.{os.getpid()}.stale"
+        try:
+            os.replace(self.lock_path, stale_path)
+        except FileNotFoundError:
+            return
+        if _lock_owner(stale_path) != owner: # Moved a fresh lock instead: put it back
+            try:
+                os.link(stale_path, self.lock_path)
+            except FileExistsError:
+                pass
+        os.remove(stale_path)
+
+    def _release_lock_file(self):
+        if self.lock_path:
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
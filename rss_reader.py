@@ -1,23 +1,34 @@
-import feedparser
-import time
-import ssl # Import the ssl module
 import os
+import sys
+import time
+import signal
+import argparse
+import logging
+import threading
 import json # For storing lists as JSON strings in DB
-from bs4 import BeautifulSoup # For cleaning HTML from summaries
-from supabase import create_client, Client # Supabase client
-from datetime import datetime, timedelta # For date calculations
+from datetime import datetime, timedelta, timezone # For date calculations
 from dotenv import load_dotenv # Import the library
-    
+from feed_fetcher import fetch_feed, fetch_feeds_concurrently, CACHE_HIT_STATUSES # Parallel feed downloads with per-host politeness
+from concurrent.futures import ThreadPoolExecutor
+from article_store import ArticleStore, open_article_store # Supabase or local SQLite articles table
+from write_behind import WriteBehindStore # Queued, retried and journaled DB writes
+from feed_cache import FeedCache # ETag / Last-Modified / content hash per feed
+from seen_store import SeenUrlFilter # Local Bloom filter of already seen article URLs
+from feed_scheduler import FeedScheduler, entry_timestamps # Adaptive per-feed polling for --daemon
+from feed_watermarks import FeedWatermarks # Newest handled entry per feed, for early exit
+from summary_text import html_to_text # HTML summary -> plain text, same output as BeautifulSoup get_text
+from near_duplicates import NearDuplicateIndex # SimHash index of recent stories across feeds
+from url_canon import canonicalize_url, is_google_news_url, GoogleNewsResolver # Dedup/storage keys for article links
+from keyword_matcher import KeywordClassifier # Aho-Corasick automaton over the keyword tables
+from article_extractor import ArticleExtractor # Parallel newspaper3k extraction with timeouts
+from text_cache import TextCache # Compressed on-disk cache of extracted article text
+from host_throttle import HostThrottle # Per-host request limits
+from pipeline import Pipeline, Stage # Worker stages connected by bounded queues
+import metrics # Per-stage timings and counters, exported as JSON and Prometheus text
+from log_config import configure_logging
+import http_client # Pooled keep-alive connections with one cached SSL context
 
-    # Attempt to fix SSL CERTIFICATE_VERIFY_FAILED for feedparser
-    # This tries to use certifi's certificates if available
-try:
-        import certifi
-        ssl._create_default_https_context = lambda: ssl.create_default_context(cafile=certifi.where())
-        print("INFO: Attempting to use certifi's SSL certificates.")
-except ImportError:
-        print("WARNING: certifi not found. SSL verification might still fail for some feeds.")
-        pass
+logger = logging.getLogger("rss_reader")
 
 load_dotenv() # Load environment variables from .env
 
@@ -25,11 +36,137 @@ load_dotenv() # Load environment variables from .env
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY") # Using service key for server-side script
 
-supabase: Client = None # Initialize to None
+article_store: ArticleStore = None # Initialized in init_reader
+
+# --- Configuration for Article Storage ---
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower() # 'supabase' or 'sqlite' (local file, no network)
 
 # --- Configuration for Data Retention ---
 DATA_RETENTION_DAYS = 7 # Delete articles older than 7 days
 
+# --- Configuration for Feed Fetching ---
+FEED_FETCH_CONCURRENCY = int(os.getenv("FEED_FETCH_CONCURRENCY", "8")) # Max feeds downloaded in parallel
+FEED_FETCH_PER_HOST_LIMIT = int(os.getenv("FEED_FETCH_PER_HOST_LIMIT", "2")) # Max parallel requests to one host
+FEED_FETCH_HOST_DELAY = float(os.getenv("FEED_FETCH_HOST_DELAY", "1")) # Seconds between request starts to the same host
+FEED_FETCH_TIMEOUT = float(os.getenv("FEED_FETCH_TIMEOUT", "30")) # Seconds before a feed download is abandoned
+
+# --- Configuration for the Shared HTTP Client (feeds, article pages, Google News redirects) ---
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "4")) # Keep-alive connections kept open per host
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32")) # Hosts with a connection pool at the same time
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")) # Seconds to establish a connection (TLS included)
+
+# --- Configuration for Local Caches ---
+CACHE_DIR = os.getenv("RSS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes") # Conditional GET per feed
+FEED_CACHE_PATH = os.path.join(CACHE_DIR, "feed_cache.json")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(CACHE_DIR, "articles.db")) # Articles table for STORAGE_BACKEND=sqlite
+# Writes are queued and applied by a background thread with retries; pending ones survive a crash in the journal
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() in ("1", "true", "yes")
+WRITE_BEHIND_JOURNAL_PATH = os.path.join(CACHE_DIR, "write_journal.jsonl") # Each process journals to write_journal.<pid>-<n>.jsonl; failed writes end up in write_journal.failed.jsonl
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100")) # Max rows per merged upsert
+WRITE_RETRY_BASE_DELAY = float(os.getenv("WRITE_RETRY_BASE_DELAY", "1")) # First retry delay, doubled per attempt
+WRITE_RETRY_MAX_DELAY = float(os.getenv("WRITE_RETRY_MAX_DELAY", "60"))
+WRITE_RETRY_MAX_ATTEMPTS = int(os.getenv("WRITE_RETRY_MAX_ATTEMPTS", "10"))
+WRITE_FLUSH_TIMEOUT = float(os.getenv("WRITE_FLUSH_TIMEOUT", "120")) # Max wait for queued writes at the end of a run
+
+# --- Configuration for Deduplication ---
+DEDUP_CHUNK_SIZE = int(os.getenv("DEDUP_CHUNK_SIZE", "100")) # URLs per `in` query against the article store
+SEEN_FILTER_ENABLED = os.getenv("SEEN_FILTER_ENABLED", "true").lower() in ("1", "true", "yes") # Local seen-URL Bloom filter
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "200000"))
+SEEN_FILTER_ERROR_RATE = float(os.getenv("SEEN_FILTER_ERROR_RATE", "0.001"))
+SEEN_FILTER_PATH = os.path.join(CACHE_DIR, "seen_urls.json")
+# Same story under different URLs (e.g. TOI_Top_Stories and TOI_India): only the first copy is processed
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() in ("1", "true", "yes")
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3")) # Max differing SimHash bits (of 64) for a duplicate
+NEAR_DUP_INDEX_PATH = os.path.join(CACHE_DIR, "near_duplicates.json")
+# Per-feed high-water mark (newest handled entry): only entries above it are cleaned and dedup-checked
+FEED_WATERMARKS_ENABLED = os.getenv("FEED_WATERMARKS_ENABLED", "true").lower() in ("1", "true", "yes")
+FEED_WATERMARKS_VERIFY_EVERY = int(os.getenv("FEED_WATERMARKS_VERIFY_EVERY", "20")) # Every Nth parse of a feed is a full scan (0: never)
+FEED_WATERMARKS_PATH = os.path.join(CACHE_DIR, "feed_watermarks.json")
+# Article links are keyed by their canonical form (no tracking parameters, normalized host)
+# Google News wrapper links: 'off', 'decode' (offline, from the link itself) or 'network' (also follow the redirect)
+GOOGLE_NEWS_RESOLVE = os.getenv("GOOGLE_NEWS_RESOLVE", "decode").lower()
+GOOGLE_NEWS_CACHE_PATH = os.path.join(CACHE_DIR, "google_news_links.json")
+
+# --- Configuration for Article Persistence ---
+# 'batch': build each row in memory and upsert relevant articles in bulk (irrelevant ones are never stored)
+# 'incremental': legacy insert + per-field updates + delete of irrelevant articles
+ARTICLE_WRITE_MODE = os.getenv("ARTICLE_WRITE_MODE", "batch").lower()
+ARTICLE_WRITE_BATCH_SIZE = int(os.getenv("ARTICLE_WRITE_BATCH_SIZE", "25")) # Rows per bulk upsert
+
+# --- Configuration for Full-Text Extraction ---
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "8")) # Articles downloaded/parsed in parallel
+EXTRACTION_PER_HOST_LIMIT = int(os.getenv("EXTRACTION_PER_HOST_LIMIT", "2")) # Parallel article downloads per host
+EXTRACTION_REQUEST_TIMEOUT = float(os.getenv("EXTRACTION_REQUEST_TIMEOUT", "15")) # Socket timeout per article request
+EXTRACTION_DEADLINE = float(os.getenv("EXTRACTION_DEADLINE", "30")) # Seconds before falling back to the summary
+EXTRACTION_MAX_BYTES = int(os.getenv("EXTRACTION_MAX_BYTES", str(5 * 1024 * 1024))) # Largest article page accepted
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes") # Reuse extracted full text
+TEXT_CACHE_MAX_MB = int(os.getenv("TEXT_CACHE_MAX_MB", "200")) # Size budget before LRU eviction
+TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "fulltext")
+
+# --- Configuration for the Processing Pipeline ---
+# 'pipeline': stages (fetch, prepare, extract, classify, persist) run concurrently, connected by bounded queues
+# 'sequential': each feed is handled start to finish before the next one (easier to debug)
+READER_MODE = os.getenv("READER_MODE", "pipeline").lower()
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50")) # Max articles waiting in front of a stage
+PIPELINE_FEED_QUEUE_SIZE = int(os.getenv("PIPELINE_FEED_QUEUE_SIZE", "4")) # Max parsed feeds waiting to be prepared
+PIPELINE_CLASSIFY_WORKERS = int(os.getenv("PIPELINE_CLASSIFY_WORKERS", "2"))
+
+# --- Configuration for Logging and Metrics ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper() # DEBUG also logs the generated social media posts
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower() # 'text' or 'json' (one JSON object per line)
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(CACHE_DIR, "metrics")) # last_run.json / last_run.prom
+
+# --- Configuration for Daemon Mode (--daemon) ---
+DAEMON_MIN_INTERVAL = float(os.getenv("DAEMON_MIN_INTERVAL", "120")) # Shortest time between two polls of a feed (seconds)
+DAEMON_MAX_INTERVAL = float(os.getenv("DAEMON_MAX_INTERVAL", "3600")) # Longest time, also for quiet or failing feeds
+DAEMON_TARGET_NEW_PER_POLL = float(os.getenv("DAEMON_TARGET_NEW_PER_POLL", "3")) # New articles a poll should find on average
+DAEMON_JITTER = float(os.getenv("DAEMON_JITTER", "0.1")) # +/- fraction added to every interval
+DAEMON_SAVE_INTERVAL = float(os.getenv("DAEMON_SAVE_INTERVAL", "300")) # Seconds between saves of caches and metrics
+DAEMON_RETENTION_INTERVAL = float(os.getenv("DAEMON_RETENTION_INTERVAL", "3600")) # Seconds between deletes of old articles
+FEED_SCHEDULE_PATH = os.path.join(CACHE_DIR, "feed_schedule.json") # Learned publish rates and next poll times
+
+metrics.registry.describe('rss_stage_seconds', 'Time spent per stage (fetch, clean, dedup, extract, classify, persist)')
+metrics.registry.describe('rss_db_seconds', 'Latency of database calls by operation')
+metrics.registry.describe('rss_db_errors_total', 'Failed database calls by operation')
+metrics.registry.describe('rss_articles_total', 'Articles by feed and outcome (new, relevant, uncategorized, irrelevant)')
+metrics.registry.describe('rss_feed_cache_total', 'Feed downloads answered from the validator cache (hit) or parsed (miss)')
+metrics.registry.describe('rss_extraction_total', 'Full-text extractions by host and outcome')
+metrics.registry.describe('rss_daemon_polls_total', 'Daemon mode polls by feed and outcome (ok, error)')
+metrics.registry.describe('rss_feed_entries_skipped_total', 'Feed entries skipped unseen because they are at or below the high-water mark')
+
+seen_url_filter: SeenUrlFilter = None # Initialized in init_reader when enabled
+# Canonical URLs claimed by collect_new_entries and not yet stored or dropped, so that an
+# article listed by several feeds is only processed once while the first copy is in flight
+_in_flight_urls = set()
+_in_flight_lock = threading.Lock()
+near_duplicate_index: NearDuplicateIndex = None # Initialized in init_reader when enabled
+google_news_resolver: GoogleNewsResolver = None # Initialized in init_reader unless GOOGLE_NEWS_RESOLVE is 'off'
+feed_watermarks: FeedWatermarks = None # Initialized in init_reader when enabled
+article_extractor: ArticleExtractor = None # Initialized in init_reader
+
+# Receives run events (start, feed, stored, finished) as callback(event, data); see report_progress
+progress_callback = None
+_progress_lock = threading.Lock()
+
+def report_progress(event: str, **data):
+    """Forwards a run event to progress_callback, if one is set (called from worker threads)."""
+    if progress_callback is not None:
+        progress_callback(event, data)
+
+def print_progress(event: str, data: dict):
+    """progress_callback for --progress: one 'PROGRESS {json}' line per event on stdout, for the dashboard."""
+    with _progress_lock:
+        print(f"PROGRESS {json.dumps({'event': event, **data})}", flush=True)
+
+# --- Configuration for Keyword Classification ---
+# Off by default to keep historical results; when on, "ai"/"ml" no longer match inside other words
+KEYWORD_MATCH_WORD_BOUNDARIES = os.getenv("KEYWORD_MATCH_WORD_BOUNDARIES", "false").lower() in ("1", "true", "yes")
+# 'keyword': keyword hit counts per sector (two hits needed, ties by sector order)
+# 'vector': TF-IDF weighted sector scores for a whole batch of articles at once (see vector_classifier.py)
+CATEGORIZATION_ENGINE = os.getenv("CATEGORIZATION_ENGINE", "keyword").lower()
+VECTOR_MIN_SCORE = float(os.getenv("VECTOR_MIN_SCORE", "1.5")) # Weighted score a sector needs to beat 'Uncategorized'
+
 # 1. Define a dictionary named RSS_FEEDS
 
 # 1. Define a dictionary named RSS_FEEDS
@@ -171,24 +308,71 @@ MCCIA_SECTOR_KEYWORDS_MAP = {
 }
 
 
+_keyword_classifier: KeywordClassifier = None
+
+def get_keyword_classifier() -> KeywordClassifier:
+    """Returns the shared keyword automaton, compiling it on first use."""
+    global _keyword_classifier
+    if _keyword_classifier is None:
+        _keyword_classifier = KeywordClassifier(MCCIA_RELEVANCE_KEYWORDS, MCCIA_SECTOR_KEYWORDS_MAP,
+                                                word_boundaries=KEYWORD_MATCH_WORD_BOUNDARIES)
+    return _keyword_classifier
+
+_vector_classifier = None
+
+def get_vector_classifier():
+    """Returns the shared TF-IDF classifier (CATEGORIZATION_ENGINE=vector), building it on first use."""
+    global _vector_classifier
+    if _vector_classifier is None:
+        from vector_classifier import VectorClassifier # numpy is only needed for this engine
+        _vector_classifier = VectorClassifier(MCCIA_RELEVANCE_KEYWORDS, MCCIA_SECTOR_KEYWORDS_MAP, sectors=MCCIA_SECTORS,
+                                              word_boundaries=KEYWORD_MATCH_WORD_BOUNDARIES, min_score=VECTOR_MIN_SCORE)
+    return _vector_classifier
+
+def analyze_articles(articles: list) -> list:
+    """
+    Relevance and category for a batch of (title, text) pairs with the CATEGORIZATION_ENGINE.
+    The vector engine scores the whole batch with one matrix product.
+    """
+    if CATEGORIZATION_ENGINE != 'vector':
+        return [analyze_article_keywords(title, text) for title, text in articles]
+    results = []
+    for analysis in get_vector_classifier().analyze_batch(articles):
+        justification = (f"Keyword '{analysis['justification']}' found." if analysis['relevant']
+                         else 'No MCCIA relevant keywords found.')
+        results.append({**analysis, 'justification': justification})
+    return results
+
+def analyze_article_keywords(title: str, summary: str) -> dict:
+    """
+    Scans the text once and returns relevance, category, per-sector scores and matched keywords.
+    Equivalent to calling qualify_article_relevance and categorize_article_by_keywords.
+    """
+    analysis = get_keyword_classifier().analyze(title, summary)
+    if analysis['relevant']:
+        qualification = {'relevant': True, 'justification': f"Keyword '{analysis['justification']}' found."}
+    else:
+        qualification = {'relevant': False, 'justification': 'No MCCIA relevant keywords found.'}
+    return {
+        **qualification,
+        'category': pick_category(analysis['sector_scores']),
+        'sector_scores': analysis['sector_scores'],
+        'matched_keywords': analysis['matched_keywords'],
+    }
+
 def qualify_article_relevance(title: str, summary: str) -> dict:
     """Determines relevance based on keywords."""
-    text_to_check = (title + " " + summary).lower()
-    for keyword in MCCIA_RELEVANCE_KEYWORDS:
-        if keyword.lower() in text_to_check:
-            return {'relevant': True, 'justification': f"Keyword '{keyword}' found."}
-    return {'relevant': False, 'justification': 'No MCCIA relevant keywords found.'}
+    analysis = analyze_article_keywords(title, summary)
+    return {'relevant': analysis['relevant'], 'justification': analysis['justification']}
 
 def categorize_article_by_keywords(title: str, summary: str) -> str:
     """Categorizes based on keyword matching, returns the most relevant sector."""
-    text_to_check = (title + " " + summary).lower()
-    sector_scores = {sector: 0 for sector in MCCIA_SECTORS}
+    return analyze_article_keywords(title, summary)['category']
+
+def pick_category(scores: dict) -> str:
+    """Chooses the sector from per-sector keyword hit counts."""
+    sector_scores = {sector: scores.get(sector, 0) for sector in MCCIA_SECTORS}
 
-    for sector, keywords in MCCIA_SECTOR_KEYWORDS_MAP.items():
-        for keyword in keywords:
-            if keyword.lower() in text_to_check:
-                sector_scores[sector] += 1
-    
     # Refined Categorization Logic:
     best_sector_candidate = "Uncategorized"
     highest_score = 0
@@ -253,13 +437,13 @@ def generate_social_media_templates(title: str, summary: str, category: str, url
         potential_title_hashtag = f"#{title_words[0].capitalize()}"
         if len(potential_title_hashtag) < 20:
              hashtags.append(potential_title_hashtag)
-    all_hashtags = list(set(hashtags + common_business_tags))
+    all_hashtags = list(dict.fromkeys(hashtags + common_business_tags)) # Unique, in a stable order
     
     # Image Keyword Generation
     image_keywords = [category.split(" ")[0]]
     image_keywords.extend([kw for kw in title.split() if len(kw) > 3 and kw.lower() not in ["the", "and", "for", "is", "of"]])
     image_keywords.extend(["business", "Maharashtra", "news update", "industry report"])
-    unique_image_keywords = list(set(kw.lower().capitalize() for kw in image_keywords if kw))
+    unique_image_keywords = list(dict.fromkeys(kw.lower().capitalize() for kw in image_keywords if kw))
 
     return {
         'tweet': tweet_text[:280], # Ensure tweet length
@@ -283,20 +467,87 @@ def generate_social_media_templates(title: str, summary: str, category: str, url
     # else:
     #      print("Supabase client already initialized.")
 
+@metrics.registry.timed('rss_db_seconds', operation='select_url')
 def is_article_processed(url: str) -> bool:
     """
     Checks if an article URL exists in the database.
     Returns True if processed, False otherwise.
     """
     try:
-        response = supabase.table('articles').select('url', count='exact').eq('url', url).execute()
-        return response.count > 0
+        return bool(article_store.existing_urls([url]))
     except Exception as e:
-        print(f"Error checking if article processed '{url}': {e}")
+        metrics.registry.inc('rss_db_errors_total', operation='select_url')
+        logger.error(f"Error checking if article processed '{url}': {e}")
         return False # Assume not processed on error to allow attempt
 
-def add_new_article_basic(url: str, title: str, summary: str, feed_source_name: str):
-    """Adds a new article with basic info if it doesn't exist."""
+def find_processed_urls(urls) -> set:
+    """
+    Returns the subset of `urls` that is already known, resolving them in bulk:
+    URLs in the local seen-URL filter never reach the database, the rest are checked
+    with one `in_` query per DEDUP_CHUNK_SIZE URLs. URLs found in the database are
+    added to the local filter for next time.
+    """
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    known = set()
+    to_check = []
+    for url in unique_urls:
+        if seen_url_filter is not None and url in seen_url_filter:
+            known.add(url)
+            metrics.registry.inc('rss_seen_filter_hits_total')
+        else:
+            to_check.append(url)
+
+    for i in range(0, len(to_check), DEDUP_CHUNK_SIZE):
+        chunk = to_check[i:i + DEDUP_CHUNK_SIZE]
+        try:
+            with metrics.registry.time('rss_db_seconds', operation='select_urls'):
+                found = article_store.existing_urls(chunk)
+        except Exception as e:
+            logger.error(f"Error checking {len(chunk)} article URLs in bulk: {e}")
+            found = set() # Assume not processed on error to allow attempt
+        known.update(found)
+        if seen_url_filter is not None:
+            for url in found:
+                seen_url_filter.add(url)
+    return known
+
+def remember_urls(urls):
+    """
+    Adds handled articles to the seen-URL filter: stored ones and those deliberately not
+    stored (irrelevant, near-duplicates). Articles whose write failed must not be added,
+    so the next run picks them up again.
+    """
+    if seen_url_filter is not None:
+        for url in urls:
+            seen_url_filter.add(url)
+
+def remember_stored_urls(urls):
+    """
+    remember_urls for articles just written. With write-behind the write is only queued:
+    its URLs are remembered by writes_applied once the store has applied it, so writes that
+    end up in the failed-writes file are picked up again by the next run.
+    """
+    if not isinstance(article_store, WriteBehindStore):
+        remember_urls(urls)
+
+def writes_applied(operation: str, kwargs: dict):
+    """WriteBehindStore on_applied callback (writer thread)."""
+    if operation == 'upsert_articles':
+        remember_urls(record['url'] for record in kwargs['records'])
+    elif operation == 'insert_article':
+        remember_urls([kwargs['record']['url']])
+
+def release_urls(urls):
+    """Drops the in-flight claims of collect_new_entries once the articles are stored, remembered or given up."""
+    with _in_flight_lock:
+        _in_flight_urls.difference_update(urls)
+
+class ArticlesNotStored(Exception):
+    """Raised when some of a feed's new articles could not be written (the feed keeps its validators and high-water mark)."""
+
+@metrics.registry.timed('rss_db_seconds', operation='insert')
+def add_new_article_basic(url: str, title: str, summary: str, feed_source_name: str) -> bool:
+    """Adds a new article with basic info if it doesn't exist; returns False if the insert failed."""
     try:
         # processed_at and last_updated_at will be set by DB default (TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP)
         data = {
@@ -306,201 +557,756 @@ def add_new_article_basic(url: str, title: str, summary: str, feed_source_name:
             'feed_source_name': feed_source_name
             # 'last_updated_at': 'now()' # Can be explicitly set or rely on DB default/trigger
         }
-        response = supabase.table('articles').insert(data, upsert=False).execute() # upsert=False to avoid overwriting if somehow exists
-        
-        # Error checking for supabase-py v1.x.x (check response.data and response.error)
-        # For v2.x.x, it would raise APIError on failure.
-        if hasattr(response, 'data') and response.data:
-            # print(f"    Successfully added basic info for: {url}")
-            pass
-        elif hasattr(response, 'error') and response.error:
-            print(f"    Error adding basic info for {url}: {response.error.message}")
-        else:
-            # This case might indicate an issue or a version of supabase-py where errors are raised
-            print(f"    Attempted to add basic info for {url}, but response was not as expected or an error occurred.")
+        article_store.insert_article(data) # upsert=False to avoid overwriting if somehow exists
+        logger.debug(f"Successfully added basic info for: {url}")
+        return True
 
     except Exception as e: # Catching general exception, including APIError from supabase-py v2
-        print(f"Database error while adding new article '{url}': {e}")
+        metrics.registry.inc('rss_db_errors_total', operation='insert')
+        logger.error(f"Database error while adding new article '{url}': {e}")
+        return False
+
+@metrics.registry.timed('rss_db_seconds', operation='upsert')
+def upsert_articles(records: list) -> bool:
+    """Writes complete article rows with a single bulk upsert (keyed on url); returns False if the write failed."""
+    if not records:
+        return True
+    try:
+        article_store.upsert_articles(records)
+    except Exception as e:
+        metrics.registry.inc('rss_db_errors_total', operation='upsert')
+        logger.error(f"Database error while storing {len(records)} articles: {e}")
+        return False
+    metrics.registry.inc('rss_articles_stored_total', len(records))
+    report_progress('stored', articles=len(records))
+    logger.info(f"Stored {len(records)} articles in one upsert.")
+    remember_stored_urls(record['url'] for record in records)
+    return True
 
+@metrics.registry.timed('rss_db_seconds', operation='update')
 def update_article_details(url: str, **kwargs):
     """Updates specific fields of an article in the database."""
     if not kwargs:
         return # Nothing to update
 
-    update_data = kwargs.copy()
-    update_data['last_updated_at'] = 'now()' # Update last_updated_at timestamp
     try:
-        response = supabase.table('articles').update(update_data).eq('url', url).execute()
-        # Add error checking for response if needed, similar to insert
+        article_store.update_article(url, kwargs) # Also sets last_updated_at
     except Exception as e:
-        print(f"Database error while updating article '{url}': {e}")
+        metrics.registry.inc('rss_db_errors_total', operation='update')
+        logger.error(f"Database error while updating article '{url}': {e}")
 
+@metrics.registry.timed('rss_db_seconds', operation='delete_old')
 def delete_old_articles(retention_days: int):
     """Deletes articles older than the specified retention period."""
-    if not supabase:
-        print("ERROR: Supabase client not initialized. Cannot delete old articles.")
+    if not article_store:
+        logger.error("Article store not initialized. Cannot delete old articles.")
         return
 
-    cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-    # Format for Supabase/PostgreSQL timestamp query
-    cutoff_timestamp_str = cutoff_date.isoformat()
-
-    print(f"--- Deleting articles older than {retention_days} days (before {cutoff_timestamp_str}) ---")
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    logger.info(f"--- Deleting articles older than {retention_days} days (before {cutoff_date.isoformat()}) ---")
     try:
-        response = supabase.table('articles').delete().lt('processed_at', cutoff_timestamp_str).execute()
-        if hasattr(response, 'data') and response.data:
-            print(f"Successfully deleted {len(response.data)} old articles.")
-        elif hasattr(response, 'error') and response.error:
-            print(f"Error deleting old articles: {response.error.message}")
+        deleted = article_store.delete_older_than(cutoff_date)
+        if deleted is None: # Write-behind: applied in the background
+            logger.info("Deletion of old articles queued.")
         else:
-            print("Old articles deletion executed, but no data returned in response (might mean 0 articles deleted or an issue).")
+            logger.info(f"Successfully deleted {deleted} old articles.")
     except Exception as e:
-        print(f"Exception during old articles deletion: {e}")
+        metrics.registry.inc('rss_db_errors_total', operation='delete_old')
+        logger.error(f"Exception during old articles deletion: {e}")
 
+@metrics.registry.timed('rss_db_seconds', operation='delete')
 def delete_single_article(url: str):
     """Deletes a single article by its URL."""
-    if not supabase:
-        print(f"ERROR: Supabase client not initialized. Cannot delete article: {url}")
+    if not article_store:
+        logger.error(f"Article store not initialized. Cannot delete article: {url}")
         return
 
-    print(f"--- Deleting irrelevant article: {url} ---")
+    logger.info(f"--- Deleting irrelevant article: {url} ---")
     try:
-        response = supabase.table('articles').delete().eq('url', url).execute()
-        if hasattr(response, 'data') and response.data:
-            print(f"Successfully deleted article: {url}")
-        elif hasattr(response, 'error') and response.error:
-            print(f"Error deleting article {url}: {response.error.message}")
+        if article_store.delete_article(url) is not None:
+            logger.info(f"Successfully deleted article: {url}")
     except Exception as e:
-        print(f"Exception during single article deletion ({url}): {e}")
+        metrics.registry.inc('rss_db_errors_total', operation='delete')
+        logger.error(f"Exception during single article deletion ({url}): {e}")
+
+def text_for_analysis(summary: str, full_text: str = None) -> str:
+    """Use full_text if available and substantial, otherwise cleaned summary."""
+    return full_text if full_text and len(full_text) > len(summary) else summary
+
+def build_article_record(link: str, title: str, summary: str, feed_source_name: str, full_text: str = None,
+                         analysis: dict = None) -> dict:
+    """
+    Computes the complete database row for a new article in memory:
+    relevance, category and social media posts. `full_text` is the extracted article
+    text (None if extraction failed or missed its deadline; the summary is used instead).
+    `analysis` is this article's result from a batch analyze_articles call, if there was one.
+    Fields that do not apply (e.g. posts for an uncategorized article) are None,
+    so all records share the same columns and can be written in one bulk upsert.
+    """
+    record = {
+        'url': link,
+        'title': title,
+        'summary': summary, # This is the cleaned summary
+        'feed_source_name': feed_source_name,
+        'full_text': None,
+        'is_relevant': False,
+        'relevance_justification': None,
+        'category': None,
+        'tweet': None,
+        'instagram_caption': None,
+        'linkedin_post': None,
+        'hashtags': None,
+        'image_keywords': None,
+    }
+
+    classify_started = time.perf_counter()
+    record['full_text'] = full_text
+    # One keyword pass for relevance and category
+    qualification = analysis or analyze_articles([(title, text_for_analysis(summary, full_text))])[0]
+    logger.info(f"Keyword Qualification: Relevant - {qualification['relevant']}, Justification - {qualification['justification']}",
+                extra={'feed': feed_source_name, 'url': link})
+    record['is_relevant'] = qualification['relevant']
+    record['relevance_justification'] = qualification['justification']
+    if not qualification['relevant']:
+        metrics.registry.inc('rss_articles_total', feed=feed_source_name, outcome='irrelevant')
+        metrics.registry.observe('rss_stage_seconds', time.perf_counter() - classify_started, stage='classify', feed=feed_source_name)
+        return record
+
+    logger.info(f"ACTION: Article '{title}' is relevant. (Further processing can be added here)",
+                extra={'feed': feed_source_name, 'url': link})
+    # Now categorize the relevant article using keywords
+    category = qualification['category']
+    logger.info(f"Category: {category}", extra={'feed': feed_source_name, 'url': link})
+    record['category'] = category
+    metrics.registry.inc('rss_articles_total', feed=feed_source_name,
+                         outcome='uncategorized' if category == 'Uncategorized' else 'relevant')
+
+    if category != 'Uncategorized':
+        # Generate social media content using templates
+        social_posts = generate_social_media_templates(title, summary, category, link) # Use cleaned summary
+        logger.debug(f"Tweet: {social_posts.get('tweet')}")
+        logger.debug(f"Instagram: {social_posts.get('instagram_caption')[:100]}...") # Log snippet
+        logger.debug(f"Hashtags: {social_posts.get('hashtags')}")
+        logger.debug(f"Image Keywords: {social_posts.get('image_keywords')}")
+        if social_posts.get('error'):
+            logger.warning(f"Social Media Generation Error: {social_posts.get('error')}")
+        record['tweet'] = social_posts.get('tweet')
+        record['instagram_caption'] = social_posts.get('instagram_caption')
+        record['linkedin_post'] = social_posts.get('linkedin_post')
+        record['hashtags'] = social_posts.get('hashtags') # Pass list directly, Supabase client handles JSONB
+        record['image_keywords'] = social_posts.get('image_keywords') # Pass list directly
+    metrics.registry.observe('rss_stage_seconds', time.perf_counter() - classify_started, stage='classify', feed=feed_source_name)
+    return record
+
+def persist_article_incrementally(record: dict) -> bool:
+    """
+    Legacy write path: insert the basic row, then update it field group by field group,
+    deleting it again if it turns out to be irrelevant. Returns False if the insert failed.
+    """
+    link = record['url']
+    if not add_new_article_basic(link, record['title'], record['summary'], record['feed_source_name']):
+        return False
+    remember_stored_urls([link]) # Stored, or deleted below as irrelevant: either way handled
+    if record['full_text'] is not None:
+        update_article_details(link, full_text=record['full_text'])
+    update_article_details(link,
+                           is_relevant=record['is_relevant'],
+                           relevance_justification=record['relevance_justification'])
+    if not record['is_relevant']:
+        logger.info(f"Article '{record['title']}' deemed irrelevant. Deleting from database.")
+        delete_single_article(link) # Delete the irrelevant article
+        return True
+    update_article_details(link, category=record['category'])
+    report_progress('stored', articles=1)
+    if record['category'] != 'Uncategorized':
+        update_article_details(link,
+                               tweet=record['tweet'],
+                               instagram_caption=record['instagram_caption'],
+                               linkedin_post=record['linkedin_post'],
+                               hashtags=record['hashtags'],
+                               image_keywords=record['image_keywords'])
+    return True
+
+def canonical_link(link: str) -> tuple:
+    """
+    Returns (key, download URL) for a feed entry link. The key is the canonical URL used
+    for dedup, caches and storage; Google News wrappers are resolved to the publisher URL
+    when possible, which is then also what gets downloaded.
+    """
+    download_url = link
+    if google_news_resolver is not None and is_google_news_url(link):
+        download_url = google_news_resolver.resolve(link) or link
+    return canonicalize_url(download_url), download_url
+
+def collect_new_entries(source_name: str, feed) -> list:
+    """
+    Drops the entries of a parsed feed that were already processed and cleans the rest.
+    Returns one dict (link, original_link, download_url, title, summary, feed_source_name)
+    per new article, where `link` is the canonical key the article is stored under.
+    The returned links are claimed as in flight; the caller releases them (release_urls)
+    once the articles have been handled.
+    """
+    # 3. For each feed, iterate through its entries
+    logger.info(f"Found {len(feed.entries)} entries in {source_name}", extra={'feed': source_name})
+    metrics.registry.inc('rss_feed_entries_total', len(feed.entries), feed=source_name)
+    entries, plan = feed.entries, None
+    if feed_watermarks is not None:
+        # Newest first, stopping at the entries already handled in an earlier run
+        plan = feed_watermarks.plan(source_name, feed.entries)
+        entries = plan['entries']
+        metrics.registry.inc('rss_feed_scans_total', feed=source_name, mode=plan['mode'])
+        if plan['skipped']:
+            metrics.registry.inc('rss_feed_entries_skipped_total', plan['skipped'], feed=source_name)
+        reason = f" ({plan['reason']})" if plan['reason'] else ''
+        logger.debug(f"{source_name}: {plan['mode']} scan{reason} of {len(entries)} entries, "
+                     f"{plan['skipped']} at or below the high-water mark.")
+    links = {entry.get('link'): canonical_link(entry.get('link')) for entry in entries if entry.get('link')}
+    # Resolve the seen-check for the whole feed at once instead of one query per entry.
+    # Raw links are checked too, so articles stored before canonicalization are still recognized.
+    with metrics.registry.time('rss_stage_seconds', stage='dedup', feed=source_name):
+        processed_urls = find_processed_urls([key for key, _ in links.values()] + list(links))
+    num_processed = sum(1 for link, (key, _) in links.items() if key in processed_urls or link in processed_urls)
+    num_processed += len(feed.entries) - len(entries)
+    logger.info(f"{num_processed} of {len(feed.entries)} entries already processed.", extra={'feed': source_name})
+    new_entries, unseen_entries = [], []
+    clean_started = time.perf_counter()
+    for entry in entries:
+        # 4. For each entry, extract and print the article title and link
+        title = entry.get('title', 'N/A')
+        link = entry.get('link') # This is the URL
+
+        if not link:
+            logger.warning(f"Skipping entry (no link): {title}", extra={'feed': source_name})
+            continue
+
+        # 5. Before processing an article entry, check if its URL is already processed
+        original_link = link
+        link, download_url = links[original_link] # From here on the canonical URL is the article's key
+        if link in processed_urls or original_link in processed_urls:
+            logger.debug(f"Skipping (already processed): {title} ({link})")
+            continue
+        with _in_flight_lock:
+            if link in _in_flight_urls: # Listed twice in this feed, or by another feed still being processed
+                logger.debug(f"Skipping (already being processed): {title} ({link})")
+                continue
+            _in_flight_urls.add(link)
+        unseen_entries.append(entry)
+
+        # Clean HTML from the summary (only for new entries; known ones are skipped above)
+        summary_html = entry.get('summary', entry.get('description', 'No summary available.'))
+        summary = html_to_text(summary_html)
+        if not summary: # If summary was purely HTML and now empty, or originally empty
+            summary = "No textual summary available."
 
-def fetch_and_print_feeds():
+        # Same story already handled from another feed (this run or a recent one): record the alias, skip extraction
+        if near_duplicate_index is not None:
+            duplicate_of = near_duplicate_index.check_and_add(link, source_name, f"{title} {summary}")
+            if duplicate_of is not None:
+                metrics.registry.inc('rss_articles_total', feed=source_name, outcome='near_duplicate')
+                logger.info(f"Skipping near-duplicate of {duplicate_of}: {title}", extra={'feed': source_name, 'url': link})
+                remember_urls([link])
+                release_urls([link])
+                continue
+
+        # If new article
+        logger.info(f"NEW Article Found: {title}", extra={'feed': source_name, 'url': link})
+        metrics.registry.inc('rss_articles_total', feed=source_name, outcome='new')
+        new_entries.append({'link': link, 'original_link': original_link, 'download_url': download_url,
+                            'title': title, 'summary': summary, 'feed_source_name': source_name})
+    metrics.registry.observe('rss_stage_seconds', time.perf_counter() - clean_started, stage='clean', feed=source_name)
+    if plan is not None:
+        feed_watermarks.record(source_name, plan, unseen_entries) # Committed with the feed's validators
+    report_progress('feed', feed=source_name, status='parsed', new_articles=len(new_entries))
+    return new_entries
+
+def store_article_record(record: dict, pending_records: list) -> list:
+    """
+    Persists a built record according to ARTICLE_WRITE_MODE, batching relevant rows in `pending_records`.
+    Returns the records that could not be written (with batching, those of a failed batch).
+    """
+    if ARTICLE_WRITE_MODE == 'incremental':
+        with metrics.registry.time('rss_stage_seconds', stage='persist', feed=record['feed_source_name']):
+            return [] if persist_article_incrementally(record) else [record]
+    if record['is_relevant']:
+        pending_records.append(record)
+        if len(pending_records) >= ARTICLE_WRITE_BATCH_SIZE:
+            return flush_article_records(pending_records)
+        return []
+    logger.info(f"Article '{record['title']}' deemed irrelevant. Not storing it.")
+    remember_urls([record['url']]) # Irrelevant articles are only remembered here, never stored
+    return []
+
+def flush_article_records(pending_records: list) -> list:
+    """Writes and clears the batch of pending relevant records; returns them if the write failed."""
+    if not pending_records:
+        return []
+    records = list(pending_records)
+    pending_records.clear()
+    with metrics.registry.time('rss_stage_seconds', stage='persist'):
+        return [] if upsert_articles(records) else records
+
+def process_feed_entries(source_name: str, feed) -> int:
+    """
+    Processes the entries of an already fetched and parsed feed; returns the number of new articles.
+    Raises ArticlesNotStored if some of them could not be written.
+    """
+    new_entries = collect_new_entries(source_name, feed)
+    failed_records = []
+    try:
+        # Fetch full texts of all new articles in parallel using newspaper3k
+        downloads = {entry['link']: entry['download_url'] for entry in new_entries}
+        full_texts = article_extractor.extract_many(downloads, feed=source_name) if new_entries else {}
+
+        # Classify the feed's new articles as one batch (a single matrix product with the vector engine)
+        analyses = analyze_articles([(entry['title'], text_for_analysis(entry['summary'], full_texts.get(entry['link'])))
+                                     for entry in new_entries])
+        pending_records = [] # Relevant articles waiting for the next bulk upsert (batch mode)
+        for entry, analysis in zip(new_entries, analyses):
+            logger.info(f"Analyzing: {entry['title']}", extra={'feed': source_name, 'url': entry['link']})
+            record = build_article_record(entry['link'], entry['title'], entry['summary'], source_name,
+                                          full_texts.get(entry['link']), analysis) # summary is already cleaned
+            failed_records += store_article_record(record, pending_records)
+        failed_records += flush_article_records(pending_records)
+    finally:
+        release_urls(entry['link'] for entry in new_entries)
+    if failed_records:
+        raise ArticlesNotStored(f"{len(failed_records)} of {len(new_entries)} new articles could not be stored")
+    return len(new_entries)
+
+def check_feed_result(result: dict, feed_cache: FeedCache, cache_counts: dict) -> bool:
+    """
+    Reports the outcome of a feed download (errors, cache hit/miss, bozo warnings).
+    Returns True if the feed was parsed and has entries to process.
+    """
+    source_name, feed_url, feed = result['source_name'], result['feed_url'], result['feed']
+    logger.info(f"--- Fetched feed: {source_name} from {feed_url} in {result['elapsed']:.2f}s ---", extra={'feed': source_name})
+    metrics.registry.observe('rss_stage_seconds', result['elapsed'], stage='fetch', feed=source_name)
+
+    # 5. Include basic error handling
+    if result['error']:
+        metrics.registry.inc('rss_stage_errors_total', stage='fetch', feed=source_name)
+        logger.error(f"Error fetching or parsing feed '{source_name}' at {feed_url}: {result['error']}", extra={'feed': source_name})
+        report_progress('feed', feed=source_name, status='error', new_articles=0)
+        return False
+
+    if feed_cache:
+        is_hit = result['cache_status'] in CACHE_HIT_STATUSES
+        totals = feed_cache.record(feed_url, hit=is_hit)
+        cache_counts['hits' if is_hit else 'misses'] += 1
+        metrics.registry.inc('rss_feed_cache_total', feed=source_name, result='hit' if is_hit else 'miss')
+        logger.info(f"Feed cache: {'HIT' if is_hit else 'MISS'} ({result['cache_status']}) "
+                    f"- totals for {source_name}: {totals['hits']} hits, {totals['misses']} misses", extra={'feed': source_name})
+        if is_hit:
+            logger.info(f"--- {source_name} unchanged since last run. Skipping parse. ---", extra={'feed': source_name})
+            report_progress('feed', feed=source_name, status='unchanged', new_articles=0)
+            return False
+
+    # Check for parsing errors (feedparser often returns a 'bozo' flag for malformed feeds)
+    if feed.bozo:
+        logger.warning(f"Feed '{source_name}' may be malformed. Bozo exception: {feed.bozo_exception}", extra={'feed': source_name})
+
+    if not feed.entries:
+        logger.info(f"No entries found in feed: {source_name}", extra={'feed': source_name})
+        report_progress('feed', feed=source_name, status='empty', new_articles=0)
+        return False
+    return True
+
+def run_sequential(feed_cache: FeedCache, cache_counts: dict):
+    """Debug mode: fetch feeds in parallel, then handle each feed's articles start to finish before the next."""
+    # 2. Fetch all RSS feeds concurrently; entries are processed as each feed arrives
+    feed_results = fetch_feeds_concurrently(
+        RSS_FEEDS,
+        max_workers=FEED_FETCH_CONCURRENCY,
+        per_host_limit=FEED_FETCH_PER_HOST_LIMIT,
+        per_host_delay=FEED_FETCH_HOST_DELAY,
+        cache=feed_cache,
+        timeout=FEED_FETCH_TIMEOUT,
+    )
+    for result in feed_results:
+        source_name, feed_url = result['source_name'], result['feed_url']
+        try:
+            if check_feed_result(result, feed_cache, cache_counts):
+                process_feed_entries(source_name, result['feed'])
+            # Remember the validators and high-water mark only once the feed has been processed completely
+            if feed_cache and result['validators']:
+                feed_cache.commit(feed_url, **result['validators'])
+            if feed_watermarks is not None:
+                feed_watermarks.commit(source_name)
+        except Exception as e:
+            if feed_watermarks is not None:
+                feed_watermarks.discard(source_name)
+            logger.error(f"Error processing feed '{source_name}' at {feed_url}: {e}", extra={'feed': source_name})
+        logger.info(f"--- Finished processing {source_name}. ---", extra={'feed': source_name})
+
+def run_pipeline(feed_cache: FeedCache, cache_counts: dict):
+    """
+    Streams feeds through fetch -> prepare (clean + dedup) -> extract -> classify -> persist.
+    Each stage has its own workers and a bounded input queue, so downloads overlap with
+    parsing and classification while a burst of new articles cannot exhaust memory.
+    """
+    throttle = HostThrottle(max_per_host=FEED_FETCH_PER_HOST_LIMIT, min_interval=FEED_FETCH_HOST_DELAY)
+    validators = {} # feed_url -> validators to commit once the run has drained
+    failed_sources = set() # Feeds with at least one failed item (or unstored article) keep their old validators
+    pending_records = []
+    claimed_links = [] # In-flight claims of collect_new_entries, released once the pipeline has drained
+    feed_batches = {} # source_name -> (number of new entries, those extracted so far), until the feed is classified
+    feed_batches_lock = threading.Lock()
+
+    def fetch_stage(item):
+        source_name, feed_url = item
+        return [fetch_feed(source_name, feed_url, throttle, feed_cache, FEED_FETCH_TIMEOUT)]
+
+    def prepare_stage(result):
+        if result['validators']:
+            validators[result['feed_url']] = (result['source_name'], result['validators'])
+        if not check_feed_result(result, feed_cache, cache_counts):
+            return []
+        new_entries = collect_new_entries(result['source_name'], result['feed'])
+        claimed_links.extend(entry['link'] for entry in new_entries)
+        if new_entries:
+            with feed_batches_lock:
+                feed_batches[result['source_name']] = (len(new_entries), [])
+        return new_entries
+
+    def extract_stage(entry):
+        downloads = {entry['link']: entry['download_url']}
+        entry['full_text'] = article_extractor.extract_many(downloads, feed=entry['feed_source_name'])[entry['link']]
+        return [entry]
+
+    def classify_batch(entries):
+        # One analyze_articles call per feed (a single matrix product with the vector engine)
+        analyses = analyze_articles([(entry['title'], text_for_analysis(entry['summary'], entry['full_text']))
+                                     for entry in entries])
+        records = []
+        for entry, analysis in zip(entries, analyses):
+            logger.info(f"Analyzing: {entry['title']}", extra={'feed': entry['feed_source_name'], 'url': entry['link']})
+            records.append(build_article_record(entry['link'], entry['title'], entry['summary'], entry['feed_source_name'],
+                                                entry['full_text'], analysis))
+        return records
+
+    def classify_stage(entry):
+        # Entries wait until the rest of their feed has been extracted, then the feed is classified as a batch
+        with feed_batches_lock:
+            expected, entries = feed_batches[entry['feed_source_name']]
+            entries.append(entry)
+            if len(entries) < expected:
+                return []
+            del feed_batches[entry['feed_source_name']]
+        return classify_batch(entries)
+
+    def classify_flush():
+        # Feeds that lost an entry to an extraction error
+        with feed_batches_lock:
+            batches = [entries for _, entries in feed_batches.values() if entries]
+            feed_batches.clear()
+        return [record for entries in batches for record in classify_batch(entries)]
+
+    def persist_failed(records):
+        for record in records:
+            failed_sources.add(record['feed_source_name'])
+
+    def persist_stage(record):
+        persist_failed(store_article_record(record, pending_records))
+        return []
+
+    def persist_flush():
+        persist_failed(flush_article_records(pending_records))
+        return []
+
+    def on_error(item, error):
+        if isinstance(item, dict): # Feed result or article entry/record
+            source_name = item.get('feed_source_name') or item.get('source_name')
+        else: # (source_name, feed_url) tuple from the fetch stage
+            source_name = item[0]
+        failed_sources.add(source_name)
+        metrics.registry.inc('rss_pipeline_errors_total', feed=source_name)
+
+    pipeline = Pipeline([
+        Stage('fetch', fetch_stage, workers=FEED_FETCH_CONCURRENCY, queue_size=len(RSS_FEEDS), on_error=on_error),
+        Stage('prepare', prepare_stage, workers=1, queue_size=PIPELINE_FEED_QUEUE_SIZE, on_error=on_error),
+        Stage('extract', extract_stage, workers=EXTRACTION_WORKERS, queue_size=PIPELINE_QUEUE_SIZE, on_error=on_error),
+        Stage('classify', classify_stage, workers=PIPELINE_CLASSIFY_WORKERS, queue_size=PIPELINE_QUEUE_SIZE, flush=classify_flush,
+              on_error=on_error),
+        Stage('persist', persist_stage, workers=1, queue_size=PIPELINE_QUEUE_SIZE, flush=persist_flush, on_error=on_error),
+    ])
+    pipeline.run(RSS_FEEDS.items())
+    release_urls(claimed_links)
+
+    if feed_cache:
+        for feed_url, (source_name, feed_validators) in validators.items():
+            if source_name not in failed_sources:
+                feed_cache.commit(feed_url, **feed_validators)
+    if feed_watermarks is not None:
+        for source_name in RSS_FEEDS:
+            if source_name in failed_sources:
+                feed_watermarks.discard(source_name)
+            else:
+                feed_watermarks.commit(source_name)
+    pipeline.report()
+
+def init_reader() -> bool:
+    """
+    Creates the long-lived reader state on first use: article store (Supabase client or
+    SQLite connection), extractor (with its worker pool and text cache), seen-URL filter,
+    near-duplicate index and Google News resolver. Returns False if the store cannot be opened.
+    """
+    global article_store
+    if not article_store:
+        try:
+            article_store = open_article_store(STORAGE_BACKEND, SUPABASE_URL, SUPABASE_SERVICE_KEY, SQLITE_PATH)
+            logger.info(f"Article store ({STORAGE_BACKEND}) initialized for fetching feeds.")
+        except ValueError as e:
+            logger.error(f"{e} Exiting feed fetch.")
+            return False
+    if WRITE_BEHIND_ENABLED and not isinstance(article_store, WriteBehindStore):
+        article_store = WriteBehindStore(article_store, WRITE_BEHIND_JOURNAL_PATH, max_batch=WRITE_BEHIND_MAX_BATCH,
+                                         base_delay=WRITE_RETRY_BASE_DELAY, max_delay=WRITE_RETRY_MAX_DELAY,
+                                         max_attempts=WRITE_RETRY_MAX_ATTEMPTS, on_applied=writes_applied)
+
+    global seen_url_filter, article_extractor, near_duplicate_index, google_news_resolver, feed_watermarks
+    if article_extractor is None:
+        # Feeds, article pages and redirects share one client, so connections to a host are reused across them
+        http_client.configure_shared_client(pool_hosts=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                                            connect_timeout=HTTP_CONNECT_TIMEOUT)
+        # Cached texts expire together with the articles they belong to
+        text_cache = TextCache(TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024,
+                               ttl_seconds=DATA_RETENTION_DAYS * 86400) if TEXT_CACHE_ENABLED else None
+        article_extractor = ArticleExtractor(max_workers=EXTRACTION_WORKERS, per_host_limit=EXTRACTION_PER_HOST_LIMIT,
+                                             request_timeout=EXTRACTION_REQUEST_TIMEOUT, deadline=EXTRACTION_DEADLINE,
+                                             max_bytes=EXTRACTION_MAX_BYTES, text_cache=text_cache)
+    if SEEN_FILTER_ENABLED and seen_url_filter is None:
+        seen_url_filter = SeenUrlFilter(SEEN_FILTER_PATH, capacity=SEEN_FILTER_CAPACITY,
+                                         error_rate=SEEN_FILTER_ERROR_RATE, rotate_after_days=DATA_RETENTION_DAYS)
+
+    if NEAR_DUP_ENABLED and near_duplicate_index is None:
+        near_duplicate_index = NearDuplicateIndex(NEAR_DUP_INDEX_PATH, max_distance=NEAR_DUP_MAX_DISTANCE,
+                                                  retention_days=DATA_RETENTION_DAYS)
+
+    if GOOGLE_NEWS_RESOLVE != 'off' and google_news_resolver is None:
+        google_news_resolver = GoogleNewsResolver(GOOGLE_NEWS_CACHE_PATH, mode=GOOGLE_NEWS_RESOLVE,
+                                                  timeout=EXTRACTION_REQUEST_TIMEOUT)
+
+    if FEED_WATERMARKS_ENABLED and feed_watermarks is None:
+        feed_watermarks = FeedWatermarks(FEED_WATERMARKS_PATH, verify_every=FEED_WATERMARKS_VERIFY_EVERY)
+    return True
+
+def save_reader_state(feed_cache: FeedCache):
+    """Persists the local dedup state, feed validators and high-water marks."""
+    if seen_url_filter is not None:
+        seen_url_filter.save()
+    if near_duplicate_index is not None:
+        near_duplicate_index.save()
+    if google_news_resolver is not None:
+        google_news_resolver.save()
+    if feed_watermarks is not None:
+        feed_watermarks.save()
+    if feed_cache:
+        feed_cache.save()
+
+def flush_pending_writes(timeout: float):
+    """Waits for queued (write-behind) database writes; those not applied in time stay in the journal."""
+    if isinstance(article_store, WriteBehindStore) and not article_store.flush(timeout):
+        logger.warning(f"{article_store.pending} database writes still pending after {timeout:.0f}s. "
+                       f"They stay in '{article_store.journal_path}' and are retried by the next run.")
+
+def replay_failed_writes():
+    """--replay-failed-writes: queues the writes that failed for good in earlier runs again and waits for them."""
+    if not WRITE_BEHIND_ENABLED:
+        logger.error("Failed writes are only kept with WRITE_BEHIND_ENABLED.")
+        return
+    if not init_reader():
+        return
+    count = article_store.replay_failed()
+    logger.info(f"Queued {count} failed database writes again.")
+    flush_pending_writes(WRITE_FLUSH_TIMEOUT)
+    save_reader_state(None) # Applied articles were added to the seen-URL filter
+
+def fetch_and_print_feeds() -> bool:
     """
     Fetches, parses, and prints titles and links from RSS feeds defined in RSS_FEEDS.
-    Skips articles that have already been processed.
+    Skips articles that have already been processed. Returns False if the reader could
+    not be initialized (e.g. the article store could not be opened).
     """
-    global supabase
-    if not supabase:
-        if SUPABASE_URL and SUPABASE_SERVICE_KEY:
-            supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-            print("Supabase client initialized for fetching feeds.")
-        else:
-            print("ERROR: Supabase URL or Key not configured. Exiting feed fetch.")
-            return
+    if not init_reader():
+        return False
+
+    metrics.registry.reset()
+    run_started = time.perf_counter()
+    report_progress('start', feeds=len(RSS_FEEDS))
 
     # Delete old articles before fetching new ones
     delete_old_articles(DATA_RETENTION_DAYS)
 
     if not RSS_FEEDS:
-        print("No RSS feeds defined. Please add feeds to the RSS_FEEDS dictionary.")
+        logger.warning("No RSS feeds defined. Please add feeds to the RSS_FEEDS dictionary.")
+        return True
+
+    feed_cache = FeedCache(FEED_CACHE_PATH) if FEED_CACHE_ENABLED else None
+    cache_counts = {'hits': 0, 'misses': 0}
+
+    if READER_MODE == 'sequential':
+        run_sequential(feed_cache, cache_counts)
+    else:
+        run_pipeline(feed_cache, cache_counts)
+
+    article_extractor.report()
+    article_extractor.reset_stats()
+    flush_pending_writes(WRITE_FLUSH_TIMEOUT)
+    save_reader_state(feed_cache)
+    if feed_cache:
+        logger.info(f"Feed cache summary: {cache_counts['hits']} hits, {cache_counts['misses']} misses across {len(RSS_FEEDS)} feeds.")
+
+    run_seconds = time.perf_counter() - run_started
+    report_progress('finished', run_seconds=round(run_seconds, 2))
+    write_run_metrics(run_seconds)
+    return True
+
+def poll_feed(source_name: str, throttle: HostThrottle, feed_cache: FeedCache, cache_counts: dict) -> tuple:
+    """
+    Daemon mode: fetches and processes one feed start to finish.
+    Returns (ok, number of new articles, entry timestamps) for the scheduler.
+    """
+    feed_url = RSS_FEEDS[source_name]
+    result = fetch_feed(source_name, feed_url, throttle, feed_cache, FEED_FETCH_TIMEOUT)
+    new_items, published = 0, None
+    if check_feed_result(result, feed_cache, cache_counts):
+        published = entry_timestamps(result['feed'])
+        new_items = process_feed_entries(source_name, result['feed'])
+    if feed_cache and result['validators']:
+        feed_cache.commit(feed_url, **result['validators'])
+    if feed_watermarks is not None:
+        feed_watermarks.commit(source_name)
+    return result['error'] is None, new_items, published
+
+def run_daemon(stop_event: threading.Event = None):
+    """
+    Polls every feed on its own adaptive schedule (see FeedScheduler) until `stop_event`
+    is set or the process receives SIGINT/SIGTERM. At most FEED_FETCH_CONCURRENCY feeds
+    are polled at once; the article store, extraction pool and caches stay alive
+    between polls. Local state and metrics are saved every DAEMON_SAVE_INTERVAL seconds.
+    """
+    if not init_reader():
         return
+    if not RSS_FEEDS:
+        logger.warning("No RSS feeds defined. Please add feeds to the RSS_FEEDS dictionary.")
+        return True
+    stop_event = stop_event or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
 
-    # 2. Iterate through these RSS feeds
-    for source_name, feed_url in RSS_FEEDS.items():
-        print(f"\n--- Fetching feed: {source_name} from {feed_url} ---")
+    metrics.registry.reset()
+    started = time.perf_counter()
+    scheduler = FeedScheduler(RSS_FEEDS, FEED_SCHEDULE_PATH, min_interval=DAEMON_MIN_INTERVAL,
+                              max_interval=DAEMON_MAX_INTERVAL, target_new_per_poll=DAEMON_TARGET_NEW_PER_POLL,
+                              jitter=DAEMON_JITTER)
+    throttle = HostThrottle(max_per_host=FEED_FETCH_PER_HOST_LIMIT, min_interval=FEED_FETCH_HOST_DELAY)
+    feed_cache = FeedCache(FEED_CACHE_PATH) if FEED_CACHE_ENABLED else None
+    cache_counts = {'hits': 0, 'misses': 0}
+    wake_up = threading.Event() # Set when a poll finishes, so its feed gets rescheduled right away
+
+    def poll(source_name):
         try:
-            # Parse the feed URL
-            feed = feedparser.parse(feed_url)
+            ok, new_items, published = poll_feed(source_name, throttle, feed_cache, cache_counts)
+        except Exception as e:
+            logger.error(f"Error processing feed '{source_name}': {e}", extra={'feed': source_name})
+            metrics.registry.inc('rss_pipeline_errors_total', feed=source_name)
+            if feed_watermarks is not None:
+                feed_watermarks.discard(source_name)
+            ok, new_items, published = False, 0, None
+        delay = scheduler.record(source_name, ok, new_items, published)
+        metrics.registry.inc('rss_daemon_polls_total', feed=source_name, outcome='ok' if ok else 'error')
+        logger.info(f"--- Next poll of {source_name} in {delay / 60:.1f} min ({new_items} new articles). ---",
+                    extra={'feed': source_name})
+        wake_up.set()
 
-            # Check for parsing errors (feedparser often returns a 'bozo' flag for malformed feeds)
-            if feed.bozo:
-                print(f"Warning: Feed '{source_name}' may be malformed. Bozo exception: {feed.bozo_exception}")
+    logger.info(f"Daemon started: {len(RSS_FEEDS)} feeds, polls every {DAEMON_MIN_INTERVAL:.0f}-{DAEMON_MAX_INTERVAL:.0f}s.")
+    last_retention = None
+    last_save = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, FEED_FETCH_CONCURRENCY), thread_name_prefix="feed-poll") as executor:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if last_retention is None or now - last_retention >= DAEMON_RETENTION_INTERVAL:
+                delete_old_articles(DATA_RETENTION_DAYS)
+                last_retention = now
+            if now - last_save >= DAEMON_SAVE_INTERVAL:
+                save_daemon_state(scheduler, feed_cache, started)
+                last_save = now
+            wake_up.clear()
+            for source_name in scheduler.due():
+                executor.submit(poll, source_name) # Queued polls wait for a free worker
+            # Sleep until the next feed is due or a poll finishes; check for a stop request every second
+            wake_up.wait(min(scheduler.seconds_until_next(), 1.0))
+        logger.info("Daemon stopping: waiting for running polls to finish.")
+        executor.shutdown(wait=True, cancel_futures=True)
+    flush_pending_writes(WRITE_FLUSH_TIMEOUT)
+    save_daemon_state(scheduler, feed_cache, started)
+    article_extractor.report()
 
-            if not feed.entries:
-                print(f"No entries found in feed: {source_name}")
-                # Add delay even if no entries or error, to be polite
-                time.sleep(1) # 6. Add a small delay
-                continue
+def save_daemon_state(scheduler: FeedScheduler, feed_cache: FeedCache, started: float):
+    """Persists the schedule and local caches and writes the cumulative daemon metrics."""
+    scheduler.save()
+    save_reader_state(feed_cache)
+    uptime = time.perf_counter() - started
+    try:
+        metrics.registry.write(METRICS_DIR, basename='daemon', extra={'mode': 'daemon', 'write_mode': ARTICLE_WRITE_MODE,
+                                                                      'feeds': len(RSS_FEEDS), 'uptime_seconds': uptime})
+    except OSError as e:
+        logger.warning(f"Could not write daemon metrics to '{METRICS_DIR}': {e}")
 
-            # 3. For each feed, iterate through its entries
-            print(f"Found {len(feed.entries)} entries in {source_name}:")
-            for entry in feed.entries:
-                # 4. For each entry, extract and print the article title and link
-                title = entry.get('title', 'N/A')
-                link = entry.get('link') # This is the URL
-                # Attempt to get a summary or description from the feed entry
-                summary_html = entry.get('summary', entry.get('description', 'No summary available.'))
-
-                # Clean HTML from summary
-                soup = BeautifulSoup(summary_html, "html.parser") # Use the fetched summary_html
-                summary = soup.get_text(separator=" ", strip=True)
-                if not summary: # If summary was purely HTML and now empty, or originally empty
-                    summary = "No textual summary available."
-
-                
-                if not link:
-                    print(f"  Skipping entry (no link): {title}")
-                    continue
-
-                # 5. Before processing an article entry, check if its URL is already processed
-                if is_article_processed(link):
-                    # print(f"  Skipping (already processed): {title} ({link})") # Optional: for verbose logging
-                    continue
-
-                # If new article
-                print(f"\n  NEW Article Found: {title}")
-                print(f"    Link: {link}")
-
-                # Add basic article info to DB first
-                add_new_article_basic(link, title, summary, source_name) # summary is already cleaned
-
-                # Fetch full text using newspaper3k
-                try:  # Wrap in a try-except to handle potential issues
-                    from newspaper import Article # Keep import local to this try-block if it's the only place used
-                    article_parser = Article(link)
-                    article_parser.download()
-                    article_parser.parse()
-                    full_text = article_parser.text
-                    # Use full_text if available and substantial, otherwise cleaned summary
-                    text_for_analysis = full_text if full_text and len(full_text) > len(summary) else summary
-                    update_article_details(link, full_text=full_text)
-                except Exception as e:
-                    print(f"    Newspaper3k error for {link}: {e}. Falling back to summary for analysis.")
-                    text_for_analysis = summary # Fallback to cleaned summary
-                
-                qualification = qualify_article_relevance(title, text_for_analysis) # Use keyword-based relevance
-                print(f"    Keyword Qualification: Relevant - {qualification['relevant']}, Justification - {qualification['justification']}")
-                update_article_details(link, 
-                                       is_relevant=qualification['relevant'], 
-                                       relevance_justification=qualification['justification'])
-
-                if not qualification['relevant']:
-                    print(f"    INFO: Article '{title}' deemed irrelevant. Deleting from database.")
-                    delete_single_article(link) # Delete the irrelevant article
-                else: # Article is relevant
-                    print(f"    ACTION: Article '{title}' is relevant. (Further processing can be added here)")
-                    # Now categorize the relevant article using keywords
-                    category = categorize_article_by_keywords(title, text_for_analysis)
-                    print(f"    Category: {category}")
-                    # Update category for the relevant article
-                    update_article_details(link, category=category)
-                    
-                    if category != 'Uncategorized':
-                        # Generate social media content using templates
-                        social_posts = generate_social_media_templates(title, summary, category, link) # Use cleaned summary
-                        print(f"      Tweet: {social_posts.get('tweet')}")
-                        print(f"      Instagram: {social_posts.get('instagram_caption')[:100]}...") # Print snippet
-                        print(f"      Hashtags: {social_posts.get('hashtags')}")
-                        print(f"      Image Keywords: {social_posts.get('image_keywords')}")
-                        if social_posts.get('error'):
-                            print(f"      Social Media Generation Error: {social_posts.get('error')}")
-                        
-                        update_article_details(link,
-                                               tweet=social_posts.get('tweet'),
-                                               instagram_caption=social_posts.get('instagram_caption'),
-                                               linkedin_post=social_posts.get('linkedin_post'),
-                                               hashtags=social_posts.get('hashtags'), # Pass list directly, Supabase client handles JSONB
-                                               image_keywords=social_posts.get('image_keywords') # Pass list directly
-                                               )
-                # No need for a separate mark_article_processed if add_new_article_basic handles the initial insert
-                # and is_article_processed checks existence.
-
-        # 5. Include basic error handling
-        except Exception as e:
-            print(f"Error fetching or parsing feed '{source_name}' at {feed_url}: {e}")
+def write_run_metrics(run_seconds: float):
+    """Writes the metrics of the finished run to METRICS_DIR (last_run.json and last_run.prom)."""
+    metrics.registry.observe('rss_run_seconds', run_seconds)
+    try:
+        json_path, prom_path = metrics.registry.write(METRICS_DIR, extra={'mode': READER_MODE, 'write_mode': ARTICLE_WRITE_MODE,
+                                                                          'feeds': len(RSS_FEEDS), 'run_seconds': run_seconds})
+        logger.info(f"Run finished in {run_seconds:.1f}s. Metrics written to {json_path} and {prom_path}.")
+    except OSError as e:
+        logger.warning(f"Could not write run metrics to '{METRICS_DIR}': {e}")
+
+_refresh_lock = threading.Lock()
+
+def refresh(progress=None) -> bool:
+    """
+    In-process entry point (used by the dashboard instead of spawning rss_reader.py):
+    one fetch_and_print_feeds run whose progress events go to `progress(event, data)`.
+    The reader state (article store, HTTP connections, dedup state, compiled keyword
+    tables, imported libraries) stays loaded, so later calls start fetching right away.
+    Returns False without doing anything if a run is already in progress in this process.
+    Raises RuntimeError if the reader cannot be initialized (no article store or credentials).
+    """
+    global progress_callback
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+    previous_callback, progress_callback = progress_callback, progress
+    try:
+        if not fetch_and_print_feeds():
+            raise RuntimeError("The reader could not be initialized; check the article store settings and credentials.")
+    finally:
+        progress_callback = previous_callback
+        _refresh_lock.release()
+    return True
 
-        # 6. Add a small delay (e.g., 1 second) between fetching each feed
-        print(f"--- Finished fetching {source_name}. Waiting 1 second... ---")
-        time.sleep(1)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch RSS feeds, classify new articles and store the relevant ones.")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="DEBUG, INFO, WARNING or ERROR (env LOG_LEVEL)")
+    parser.add_argument("--log-format", default=LOG_FORMAT, choices=("text", "json"), help="Log line format (env LOG_FORMAT)")
+    parser.add_argument("--progress", action="store_true", help="Print machine-readable 'PROGRESS {json}' lines (used by the dashboard)")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and poll each feed on its own adaptive schedule")
+    parser.add_argument("--replay-failed-writes", action="store_true",
+                        help="Queue the database writes that failed for good in earlier runs again (after fixing the cause) and exit")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, args.log_format)
+    global progress_callback
+    if args.progress:
+        progress_callback = print_progress
+    if args.replay_failed_writes:
+        replay_failed_writes()
+    elif args.daemon:
+        run_daemon()
+    elif not fetch_and_print_feeds():
+        return 1 # The dashboard reports the refresh as failed
+    return 0
 
 if __name__ == "__main__":
-    fetch_and_print_feeds()
+    sys.exit(main())
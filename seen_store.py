@@ -0,0 +1,131 @@
+# Local seen-URL set (generational Bloom filter) persisted between reader runs
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, tunable false positives)."""
+
+    def __init__(self, capacity: int = 200000, error_rate: float = 0.001, bits: bytearray = None, num_hashes: int = None):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = float(error_rate)
+        num_bits = int(math.ceil(-self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)))
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = num_hashes or max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.num_bits = len(self.bits) * 8
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_dict(self) -> dict:
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'num_hashes': self.num_hashes,
+            'count': self.count,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BloomFilter':
+        bloom = cls(data['capacity'], data['error_rate'],
+                    bits=bytearray(base64.b64decode(data['bits'])), num_hashes=data['num_hashes'])
+        bloom.count = data.get('count', 0)
+        return bloom
+
+
+class SeenUrlFilter:
+    """
+    Remembers URLs already stored (or deliberately skipped) so that most known URLs
+    never reach the database. Two Bloom filter generations are kept: the current one
+    receives new URLs and is rotated into 'previous' every `rotate_after_days`, so
+    memory of a URL lasts between one and two rotation periods (aligned with data retention).
+    A positive answer may be a false positive at roughly `error_rate`.
+    """
+
+    def __init__(self, path: str, capacity: int = 200000, error_rate: float = 0.001, rotate_after_days: int = 7):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rotate_after = timedelta(days=rotate_after_days)
+        self._lock = threading.Lock()
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = None
+        self.created_at = datetime.now(timezone.utc)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.current = BloomFilter.from_dict(data['current'])
+            self.previous = BloomFilter.from_dict(data['previous']) if data.get('previous') else None
+            self.created_at = datetime.fromisoformat(data['created_at'])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read seen-URL filter '{self.path}' ({e}). Starting empty.")
+        with self._lock:
+            self._rotate_if_due()
+
+    def _rotate_if_due(self):
+        """
+        Called with the lock held: on load, and on every add and save, so a long-running
+        process (--daemon, the dashboard) rotates on schedule instead of filling the current
+        generation past its capacity.
+        """
+        if datetime.now(timezone.utc) - self.created_at >= self.rotate_after:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.created_at = datetime.now(timezone.utc)
+
+    def save(self):
+        with self._lock:
+            self._rotate_if_due()
+            data = {
+                'created_at': self.created_at.isoformat(),
+                'current': self.current.to_dict(),
+                'previous': self.previous.to_dict() if self.previous else None,
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write seen-URL filter '{self.path}': {e}")
+
+    def add(self, url: str):
+        with self._lock:
+            self._rotate_if_due()
+            if url not in self.current:
+                self.current.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self.current or (self.previous is not None and url in self.previous)
@@ -1,13 +1,12 @@
 import streamlit as st
 import pandas as pd
 import datetime
-import json # To parse hashtags/keywords from DB
-import subprocess # To run the rss_reader.py script
 import sys # To get the current python interpreter path
 import os # To construct file paths
 from config import MCCIA_SECTORS # Import from shared config
-from supabase import create_client, Client # Supabase client
-import numpy as np # Import numpy for np.ndarray
+from dashboard_cache import ArticleCache, FACET_COLUMNS, count_articles, fetch_article_page, rows_to_frame # Server-side queries
+from refresh_job import RefreshJob # Runs the reader in the background
+from article_store import open_article_store # Supabase or local SQLite articles table
 from dotenv import load_dotenv
 
 load_dotenv() # Load environment variables from .env
@@ -16,82 +15,89 @@ load_dotenv() # Load environment variables from .env
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY") # Or an ANON_KEY if you set up RLS for public dashboards
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    st.error("Supabase URL or Key not configured. Please check your .env file or Streamlit secrets.")
+# --- Configuration for Article Storage (same settings as rss_reader.py) ---
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower() # 'supabase' or 'sqlite'
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.getenv("RSS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")),
+                                                    "articles.db"))
+
+@st.cache_resource
+def get_article_store():
+    """One store (Supabase client or SQLite connection) per server process."""
+    return open_article_store(STORAGE_BACKEND, SUPABASE_URL, SUPABASE_SERVICE_KEY, SQLITE_PATH)
+
+try:
+    article_store = get_article_store()
+except ValueError as e:
+    st.error(f"{e} Please check your .env file or Streamlit secrets.")
     st.stop()
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+# --- Configuration for Data Loading ---
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "300")) # Seconds loaded articles are served without a query
+DASHBOARD_FULL_RELOAD_SECONDS = float(os.getenv("DASHBOARD_FULL_RELOAD_SECONDS", "3600")) # Full reload picks up deletions
+DASHBOARD_FACET_MAX_ROWS = int(os.getenv("DASHBOARD_FACET_MAX_ROWS", "5000")) # Recent articles the filter options are built from
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+# --- Configuration for Feed Refresh ---
+# Assumes rss_reader.py is in the same directory as social_media_dashboard.py
+READER_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rss_reader.py")
+REFRESH_LOCK_PATH = os.path.join(os.getenv("RSS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")),
+                                 "refresh.lock") # Keeps several dashboard processes from refreshing at once
+REFRESH_POLL_SECONDS = float(os.getenv("REFRESH_POLL_SECONDS", "2")) # Progress update interval while a refresh runs
+# 'in_process': run the reader in a thread of this server (imports, connections and caches stay warm between refreshes)
+# 'subprocess': start rss_reader.py with a fresh interpreter for every refresh
+REFRESH_MODE = os.getenv("REFRESH_MODE", "in_process").lower()
+
+@st.cache_resource
+def get_article_cache() -> ArticleCache:
+    """One cache per server process, shared by all sessions and reruns. Holds only the light facet columns."""
+    return ArticleCache(article_store, columns=FACET_COLUMNS, ttl_seconds=DASHBOARD_CACHE_TTL,
+                        full_reload_seconds=DASHBOARD_FULL_RELOAD_SECONDS, max_rows=DASHBOARD_FACET_MAX_ROWS)
 
 def load_data_from_db():
-    try:
-        response = supabase.table('articles').select(
-            'url, title, summary, feed_source_name, processed_at, '
-            'relevance_justification, category, tweet, instagram_caption, linkedin_post, flares, '
-            'hashtags, image_keywords'
-        ).eq('is_relevant', True).not_.is_('category', None).not_.eq('category', 'Uncategorized').order(
-            'processed_at', desc=True # Ensure 'processed_at' is the correct column name in Supabase
-        ).limit(500).execute()
-
-        if hasattr(response, 'data') and response.data:
-            df = pd.DataFrame(response.data)
-            df['processed_at_date'] = pd.to_datetime(df['processed_at']).dt.date
-        else:
-            df = pd.DataFrame() # Empty DataFrame if no data or error
-    except Exception as e:
-        st.error(f"Error loading data from Supabase: {e}")
-        df = pd.DataFrame() # Return empty DataFrame on error
-    return df
-
-def process_json_field(data_from_row):
     """
-    Safely processes a field from a DataFrame row that is expected to contain
-    a list (either directly, as a JSON string, or wrapped in a Series/ndarray).
-    Returns a list of strings, or an empty list if data is missing/malformed.
+    Returns the facet columns (url, source, date, category, flares) of recent articles
+    and the sorted flares found in them.
     """
-    actual_data = data_from_row
-
-    # 1. Handle bytes
-    if isinstance(actual_data, bytes):
-        try:
-            actual_data = actual_data.decode('utf-8')
-        except UnicodeDecodeError:
-            return []
-
-    # 2. Handle pandas Series/Arrays and NumPy arrays - try to get scalar or return empty
-    if isinstance(actual_data, (pd.Series, pd.arrays.NumpyExtensionArray, np.ndarray)):
-        if hasattr(actual_data, 'size') and actual_data.size == 1: # If it's a single-element array
-            actual_data = actual_data.item() if hasattr(actual_data, 'item') else actual_data[0]
-        else: # Multi-element array or empty array in a cell, treat as unprocessable for this function
-            return []
-
-    # 3. At this point, actual_data should be a Python scalar (None, NaN, str, list, int, float etc.)
-    #    or a Python list.
-
-    # Check for primary missing indicators
-    if actual_data is None: # Python None
-        return []
-
-    # If it's not a list or string, then check with pd.isna for other scalar missing types
-    if not isinstance(actual_data, (list, str)):
-        if pd.isna(actual_data): # For np.nan, pd.NA, etc. This is now safe.
-            return []
-        # If it's some other scalar (e.g., int, float) that's not NA,
-        # it will pass through. The subsequent isinstance checks for list/str will handle it
-        # (or it will result in an empty list if not list/str).
-    
-    processed_list = []
-    if isinstance(actual_data, list):
-        processed_list = [str(item) for item in actual_data if item is not None and not pd.isna(item)]
-    elif isinstance(actual_data, str):
-        if not actual_data.strip(): # Handle empty string case by returning empty list
-            return []
-        try:
-            parsed = json.loads(actual_data)
-            if isinstance(parsed, list):
-                processed_list = [str(item) for item in parsed if item is not None and not pd.isna(item)]
-        except (json.JSONDecodeError, TypeError):
-            pass # Keep processed_list empty
-    return processed_list
+    try:
+        return get_article_cache().get_with_flares() # Served from memory unless the TTL expired; then only new rows are fetched
+    except Exception as e:
+        st.error(f"Error loading data from the database: {e}")
+        return pd.DataFrame(), [] # Return empty DataFrame on error
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_article_page(page_size: int, cursor: tuple, filters: tuple):
+    """One page of full article rows for the given filters; `filters` is a tuple of (name, value) pairs."""
+    return fetch_article_page(article_store, page_size, cursor, **dict(filters))
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_article_count(filters: tuple) -> int:
+    return count_articles(article_store, **dict(filters))
+
+def clear_loaded_data():
+    """Called after a refresh so new articles show up on the next rerun."""
+    get_article_cache().invalidate()
+    load_article_page.clear()
+    load_article_count.clear()
+
+def run_reader_in_process(progress) -> bool:
+    """RefreshJob target for REFRESH_MODE=in_process."""
+    import rss_reader # Imported by the first refresh, then kept loaded with its store, connections and caches
+    return rss_reader.refresh(progress)
+
+@st.cache_resource
+def get_refresh_job() -> RefreshJob:
+    """One background refresh per server process, shared by all sessions."""
+    if REFRESH_MODE == 'subprocess':
+        return RefreshJob([sys.executable, READER_SCRIPT_PATH, "--progress", "--log-level", "WARNING"],
+                          cwd=os.path.dirname(READER_SCRIPT_PATH), lock_path=REFRESH_LOCK_PATH)
+    return RefreshJob(target=run_reader_in_process, lock_path=REFRESH_LOCK_PATH)
+
+def go_to_page(page_index: int, cursor: tuple = None):
+    cursors = st.session_state.page_cursors
+    if cursor is not None:
+        del cursors[page_index:]
+        cursors.append(cursor)
+    st.session_state.page_index = page_index
 
 st.set_page_config(layout="wide", page_title="MCCIA Social Media Content Hub")
 st.title("MCCIA News & Social Media Content Hub")
@@ -121,41 +127,49 @@ div.stCodeBlock pre {
 """, unsafe_allow_html=True)
 
 st.sidebar.header("Actions")
-if st.sidebar.button("🔄 Refresh News Feeds"):
-    with st.spinner("Fetching new articles... This may take a few moments."):
+job = get_refresh_job()
+if st.sidebar.button("🔄 Refresh News Feeds", disabled=job.running):
+    if REFRESH_MODE == 'subprocess' and not os.path.exists(READER_SCRIPT_PATH):
+        st.sidebar.error(f"Error: rss_reader.py not found at {READER_SCRIPT_PATH}")
+    else:
         try:
-            # Determine the path to the Python interpreter and the script
-            python_executable = sys.executable
-            # Assumes rss_reader.py is in the same directory as social_media_dashboard.py
-            script_dir = os.path.dirname(__file__)
-            script_path = os.path.join(script_dir, "rss_reader.py")
-
-            if not os.path.exists(script_path):
-                st.sidebar.error(f"Error: rss_reader.py not found at {script_path}")
-            else:
-                # Run the rss_reader.py script as a subprocess
-                process = subprocess.run(
-                    [python_executable, script_path],
-                    capture_output=True,  # Capture stdout and stderr
-                    text=True,            # Decode output as text
-                    check=False           # Don't raise exception for non-zero exit codes
-                )
-
-                if process.returncode == 0:
-                    st.sidebar.success("News feeds refreshed successfully!")
-                    # You can uncomment the lines below to show some output if needed
-                    # if process.stdout:
-                    #     st.sidebar.caption("Output from rss_reader (last 500 chars):")
-                    #     st.sidebar.code(process.stdout[-500:])
-                else:
-                    st.sidebar.error("Error during news feed refresh.")
-                    st.sidebar.caption("Error details:")
-                    st.sidebar.code(process.stderr if process.stderr else process.stdout)
+            if not job.start(): # Runs in the background; progress is shown below while it runs
+                st.sidebar.warning("A refresh is already running.")
         except Exception as e:
             st.sidebar.error(f"An exception occurred while trying to refresh: {e}")
-    st.rerun() # Rerun the Streamlit app to reload data from DB
 
-df_articles = load_data_from_db()
+@st.fragment(run_every=REFRESH_POLL_SECONDS if job.running else None)
+def show_refresh_status():
+    """Polls the background refresh; reruns the whole app whenever new articles were stored or the run ended."""
+    status = job.status()
+    if status['run_id'] == 0:
+        return
+    if status['running']:
+        feeds_total, feeds_done = status['feeds_total'], status['feeds_done']
+        st.progress(feeds_done / feeds_total if feeds_total else 0.0,
+                    text=f"Fetching feeds: {feeds_done}/{feeds_total or '?'}"
+                         + (f" (last: {status['current_feed']})" if status['current_feed'] else ""))
+        st.caption(f"{status['new_articles']} new articles found, {status['stored_articles']} relevant stored so far.")
+    elif status['returncode'] == 0:
+        st.success(f"News feeds refreshed successfully! {status['new_articles']} new articles, "
+                   f"{status['stored_articles']} stored.")
+    else:
+        st.error("Error during news feed refresh.")
+        st.caption("Error details:")
+        st.code("\n".join(status['log_tail'][-20:]))
+
+    seen = (status['run_id'], status['stored_articles'], status['running'])
+    if st.session_state.get('refresh_seen') != seen:
+        first_poll = 'refresh_seen' not in st.session_state
+        st.session_state.refresh_seen = seen
+        if not first_poll:
+            clear_loaded_data() # Show the newly stored articles while the refresh keeps running
+            st.rerun()
+
+with st.sidebar:
+    show_refresh_status()
+
+df_articles, flare_options = load_data_from_db()
 
 if df_articles.empty:
     st.warning("No relevant articles found. Please run the `rss_reader.py` script.")
@@ -193,40 +207,38 @@ else:
     sources = ["All"] + sorted(df_articles['feed_source_name'].unique().tolist())
     selected_sources = st.sidebar.multiselect("Filter by Source(s):", options=sources, default=["All"])
 
-    # Flare Filter
-    unique_flares_set = set()
-    # Iterate over the 'flares' column directly from the DataFrame
-    for flare_data_from_cell in df_articles['flares']: # This iterates over each cell's content
-        list_of_flares_for_this_row = process_json_field(flare_data_from_cell)
-        for flare_item in list_of_flares_for_this_row:
-            unique_flares_set.add(flare_item) # process_json_field already ensures items are strings
-    selected_flares = st.sidebar.multiselect("Filter by Flare(s):", options=["All"] + sorted(list(unique_flares_set)), default=["All"])
+    # Flare Filter - options collected when the cache was loaded (flares were parsed once at load time)
+    selected_flares = st.sidebar.multiselect("Filter by Flare(s):", options=["All"] + flare_options, default=["All"])
 
-    # Apply filters
-    df_display = df_articles.copy()
+    page_size = st.sidebar.selectbox("Articles per page:", PAGE_SIZE_OPTIONS, index=1)
 
-    if selected_sector != "All":
-            df_display = df_display[df_display['category'] == selected_sector]
-        
-    if len(selected_date_range) == 2: # Ensure two dates are selected
-            df_display = df_display[(df_display['processed_at_date'] >= selected_date_range[0]) & (df_display['processed_at_date'] <= selected_date_range[1])]
+    # Filters are applied by the database, over all stored articles (not just the cached recent ones)
+    filters = {
+        'sector': selected_sector if selected_sector != "All" else None,
+        'date_range': tuple(selected_date_range) if len(selected_date_range) == 2 else None, # Ensure two dates are selected
+        'sources': tuple(sorted(selected_sources)) if "All" not in selected_sources and selected_sources else None,
+        # Keep articles whose flares contain AT LEAST ONE of the selected_flares
+        'flares': tuple(sorted(selected_flares)) if "All" not in selected_flares and selected_flares else None,
+    }
+    filter_key = tuple(sorted(filters.items()))
 
-    if "All" not in selected_sources and selected_sources: # if "All" is not selected and some sources are
-            df_display = df_display[df_display['feed_source_name'].isin(selected_sources)]
-    
-    if "All" not in selected_flares and selected_flares:
-        # Filter rows where the 'flares' list (after parsing from JSON) contains AT LEAST ONE of the selected_flares
-        def has_selected_flare(flare_payload_from_row): # flare_payload_from_row is row['flares']
-            article_flares_list_for_check = process_json_field(flare_payload_from_row)
-            if not article_flares_list_for_check: # Empty list of flares for this article
-                return False
-            try:
-                article_flares_set_for_check = set(article_flares_list_for_check) # Items are already strings
-                return not article_flares_set_for_check.isdisjoint(set(selected_flares))
-            except TypeError: # Handles cases where items in article_flares_list_for_check might not be hashable (e.g. dicts)
-                return False # Or log an error
-        df_display = df_display[df_display['flares'].apply(has_selected_flare)]
-    st.info(f"Displaying {len(df_display)} articles.")
+    # Keyset pagination: page_cursors[i] is the cursor that loads page i (None for the first page)
+    if st.session_state.get('page_filter_key') != (filter_key, page_size):
+        st.session_state.page_filter_key = (filter_key, page_size)
+        st.session_state.page_cursors = [None]
+        st.session_state.page_index = 0
+    page_index = st.session_state.page_index
+
+    try:
+        total_articles = load_article_count(filter_key)
+        page_rows, next_cursor = load_article_page(page_size, st.session_state.page_cursors[page_index], filter_key)
+    except Exception as e:
+        st.error(f"Error loading data from the database: {e}")
+        total_articles, page_rows, next_cursor = 0, [], None
+    df_display = rows_to_frame(page_rows)
+
+    first_shown = page_index * page_size + 1 if page_rows else 0
+    st.info(f"Displaying articles {first_shown}-{page_index * page_size + len(page_rows)} of {total_articles}.")
 
     for index, row in df_display.iterrows():
         with st.expander(f"{row['processed_at'][:10]} | {row['category']} | {row['title']}"):
@@ -242,19 +254,21 @@ else:
             st.subheader("Generated LinkedIn Post")
             st.code(row.get('linkedin_post', '') if pd.notna(row.get('linkedin_post')) else "", language='text')
 
-            # Display Flares
-            processed_flares_list = process_json_field(row['flares'])
-            if processed_flares_list: # Check if list is not empty
-                st.markdown(f"**Flares:** " + " ".join([f"`{flare}`" for flare in processed_flares_list]))
+            # Display Flares (list columns are already parsed by rows_to_frame)
+            if row['flares']: # Check if list is not empty
+                st.markdown(f"**Flares:** " + " ".join([f"`{flare}`" for flare in row['flares']]))
             
             st.markdown(f"**Relevance Justification:** {row['relevance_justification']}") # Moved justification lower
             
             st.subheader("Suggested Hashtags")
-            processed_hashtags_list = process_json_field(row['hashtags'])
-            st.code(' '.join(processed_hashtags_list), language='text')
+            st.code(' '.join(row['hashtags']), language='text')
 
             st.subheader("Image Keywords")
-            processed_keywords_list = process_json_field(row['image_keywords'])
-            st.code(', '.join(processed_keywords_list), language='text')
+            st.code(', '.join(row['image_keywords']), language='text')
 
             st.markdown("---")
+
+    previous_column, page_column, next_column = st.columns([1, 2, 1])
+    previous_column.button("← Previous", disabled=page_index == 0, on_click=go_to_page, args=(page_index - 1,))
+    page_column.caption(f"Page {page_index + 1} of {max(1, -(-total_articles // page_size))}")
+    next_column.button("Next →", disabled=next_cursor is None, on_click=go_to_page, args=(page_index + 1, next_cursor))
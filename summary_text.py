@@ -0,0 +1,128 @@
+# Plain text of feed summaries without building a BeautifulSoup tree
+import logging
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+# Text inside these tags is not part of get_text() (BeautifulSoup keeps it as Script, Stylesheet, ... strings)
+HIDDEN_TEXT_TAGS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+# Elements closed right after their start tag (never on the open-tag stack)
+VOID_TAGS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta',
+                       'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+                       'nextid', 'spacer'})
+
+# Named references without their semicolon; the first spelling in sorted order wins, as in bs4's EntitySubstitution
+NAMED_ENTITIES = {}
+for _name, _character in sorted(html5.items()):
+    NAMED_ENTITIES.setdefault(_name[:-1] if _name.endswith(';') else _name, _character)
+
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+def numeric_reference(name: str) -> str:
+    """'&#...;' as decoded by BeautifulSoup (HTML spec rules, Windows-1252 for 0x80-0x9F), plus any trailing data."""
+    base, pattern = (16, _HEX_REFERENCE) if name[:1] in ('x', 'X') else (10, _DECIMAL_REFERENCE)
+    digits = name[1:] if base == 16 else name
+    extra = ''
+    try:
+        number = int(digits, base)
+    except ValueError:
+        match = pattern.search(digits)
+        if match is None:
+            return digits
+        number, extra = int(match.group(1), base), match.group(2)
+    if number == 0 or number > 0x10ffff or 0xd800 <= number <= 0xdfff:
+        return '\ufffd' + extra
+    if 0x80 <= number <= 0x9f:
+        try:
+            return bytes([number]).decode('cp1252') + extra
+        except UnicodeDecodeError: # 0x81, 0x8D, 0x8F, 0x90, 0x9D stay control characters
+            pass
+    return chr(number) + extra
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Streams the markup through html.parser (the tokenizer BeautifulSoup uses with
+    "html.parser") and keeps the text runs between markup events, without a tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        self._current = []
+        self._open = [] # Open non-void tag names
+        self._hidden = 0 # How many of them hide their text
+        self._closed_voids = [] # <br> etc. whose redundant </br> is swallowed without ending the text run
+
+    def _end_string(self):
+        if self._current:
+            text = ''.join(self._current).strip()
+            self._current = []
+            if text and not self._hidden:
+                self.strings.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_string()
+        if tag in VOID_TAGS:
+            self._closed_voids.append(tag)
+        else:
+            self._open.append(tag)
+            self._hidden += tag in HIDDEN_TEXT_TAGS
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_voids:
+            self._closed_voids.remove(tag)
+            return
+        self._end_string()
+        if tag in self._open: # Stray end tags are ignored; otherwise everything up to the matching tag closes
+            while True:
+                closed = self._open.pop()
+                self._hidden -= closed in HIDDEN_TEXT_TAGS
+                if closed == tag:
+                    break
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_string() # <x/> opens and closes in one event
+
+    def handle_data(self, data):
+        self._current.append(data)
+
+    def handle_charref(self, name):
+        self._current.append(numeric_reference(name))
+
+    def handle_entityref(self, name):
+        self._current.append(NAMED_ENTITIES.get(name, f"&{name}"))
+
+    def handle_comment(self, data):
+        self._end_string() # Comments, declarations and processing instructions are not text
+
+    handle_decl = handle_pi = handle_comment
+
+    def unknown_decl(self, data):
+        self._end_string()
+        text = data[len('CDATA['):].strip() if data.upper().startswith('CDATA[') else ''
+        if text: # CDATA counts as text even inside hidden tags
+            self.strings.append(text)
+
+
+def html_to_text(markup: str) -> str:
+    """
+    Same result as BeautifulSoup(markup, "html.parser").get_text(separator=" ", strip=True):
+    every text run stripped, empty ones dropped, the rest joined with single spaces.
+    """
+    if '<' not in markup and '&' not in markup:
+        return markup.strip() # No markup: the whole summary is one text run
+    parser = _TextExtractor()
+    try:
+        parser.feed(markup)
+        parser.close()
+    except Exception as e: # Markup html.parser gives up on: let BeautifulSoup decide, as before
+        logger.debug(f"Falling back to BeautifulSoup for a summary ({e}).")
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(markup, "html.parser").get_text(separator=" ", strip=True)
+    parser._end_string()
+    return ' '.join(parser.strings)
@@ -0,0 +1,115 @@
+# Content-addressed, compressed on-disk cache of extracted article text
+import hashlib
+import logging
+import os
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class TextCache:
+    """
+    Stores extracted full text under <directory>/<xx>/<sha256(url)>.z (zlib compressed).
+    A file's mtime is when it was stored (for the TTL) and its atime is the last
+    cache hit (for LRU eviction once the total size exceeds `max_bytes`).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024, ttl_seconds: float = 7 * 86400):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.z")
+
+    def _iter_files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.z'):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except FileNotFoundError:
+                        continue
+
+    def _scan(self):
+        """Drops expired entries and computes the current cache size."""
+        cutoff = time.time() - self.ttl_seconds
+        total = 0
+        for path, stat in self._iter_files():
+            if stat.st_mtime < cutoff:
+                self._remove(path)
+            else:
+                total += stat.st_size
+        self._total_bytes = total
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str):
+        """Returns the cached text for a URL, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime < time.time() - self.ttl_seconds:
+                self._remove(path)
+                with self._lock:
+                    self._total_bytes -= stat.st_size
+                    self.misses += 1
+                return None
+            with open(path, 'rb') as f:
+                text = zlib.decompress(f.read()).decode('utf-8')
+            os.utime(path, (time.time(), stat.st_mtime)) # Mark as recently used, keep the stored time
+        except (FileNotFoundError, zlib.error, UnicodeDecodeError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        """Stores text for a URL, evicting least recently used entries when over budget."""
+        path = self._path(key)
+        data = zlib.compress(text.encode('utf-8'), 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                previous_size = os.stat(path).st_size
+            except FileNotFoundError:
+                previous_size = 0
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write text cache entry for {key}: {e}")
+            return
+        with self._lock:
+            self._total_bytes += len(data) - previous_size
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is below 90% of its budget."""
+        with self._lock:
+            entries = sorted(self._iter_files(), key=lambda item: item[1].st_atime)
+            target = self.max_bytes * 0.9
+            for path, stat in entries:
+                if self._total_bytes <= target:
+                    break
+                self._remove(path)
+                self._total_bytes -= stat.st_size
@@ -0,0 +1,139 @@
+# Canonical article URLs (tracking parameters stripped, Google News wrappers resolved) used as dedup/storage keys
+import base64
+import json
+import logging
+import os
+import re
+import threading
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+from article_extractor import BROWSER_USER_AGENT
+from http_client import shared_client
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only identify the referrer/campaign, never the article
+TRACKING_PARAM_PREFIXES = ('utm_', 'pk_', 'mtm_')
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'ocid', 'cmpid', 'ito', 'ref_src', 'spm', 'at_medium', 'at_campaign',
+}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+GOOGLE_NEWS_HOST = 'news.google.com'
+MAX_RESOLVED_LINKS = 20000 # Most recent Google News lookups kept in the cache file
+_EMBEDDED_URL_RE = re.compile(rb'https?://[\x21-\x7e]+')
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Returns the key an article URL is deduplicated and stored under: lowercase scheme
+    and host, no default port, no fragment, no tracking parameters and the remaining
+    query parameters sorted. The result is still a working link to the same page.
+    """
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError: # Malformed URL (e.g. bad port): keep it as the key
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        host = f"{parts.netloc.rsplit('@', 1)[0]}@{host}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query, quote_via=quote), ''))
+
+
+def is_google_news_url(url: str) -> bool:
+    try:
+        return (urlsplit(url).hostname or '').lower() == GOOGLE_NEWS_HOST
+    except ValueError:
+        return False
+
+
+def decode_google_news_url(url: str):
+    """
+    Offline decoding of a news.google.com/rss/articles/<id> link: older ids are base64
+    encoded protobufs that embed the publisher URL. Returns None for ids that do not.
+    """
+    path = urlsplit(url).path
+    if '/articles/' not in path:
+        return None
+    article_id = path.rsplit('/', 1)[-1]
+    try:
+        payload = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except (ValueError, TypeError):
+        return None
+    match = _EMBEDDED_URL_RE.search(payload)
+    return match.group(0).decode('ascii') if match else None
+
+
+class GoogleNewsResolver:
+    """
+    Maps Google News redirect links to publisher URLs, caching every answer (also
+    failures) in a JSON file. `mode` is 'decode' (offline decoding only) or 'network'
+    (additionally follow the redirect with an HTTP request when decoding fails).
+    """
+
+    def __init__(self, path: str, mode: str = 'decode', timeout: float = 10):
+        self.path = path
+        self.mode = mode
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._cache = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read Google News link cache '{self.path}' ({e}). Starting empty.")
+
+    def resolve(self, url: str):
+        """Returns the publisher URL behind a Google News link, or None if it cannot be resolved."""
+        with self._lock:
+            if url in self._cache:
+                return self._cache[url]
+        resolved = decode_google_news_url(url)
+        if resolved is None and self.mode == 'network':
+            resolved = self._follow_redirect(url)
+        with self._lock:
+            self._cache[url] = resolved
+            self._dirty = True
+        return resolved
+
+    def _follow_redirect(self, url: str):
+        try: # Only the final URL is needed: the body is never read
+            with shared_client().get(url, headers={'User-Agent': BROWSER_USER_AGENT}, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                final_url = response.url
+        except Exception as e:
+            logger.debug(f"Could not resolve Google News link {url}: {e}")
+            return None
+        return None if is_google_news_url(final_url) else final_url
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self._cache) > MAX_RESOLVED_LINKS: # Dicts keep insertion order: drop the oldest lookups
+                self._cache = dict(list(self._cache.items())[-MAX_RESOLVED_LINKS:])
+            snapshot = json.dumps(self._cache)
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write Google News link cache '{self.path}': {e}")
@@ -0,0 +1,108 @@
+# Batch sector classification with a TF-IDF keyword-weight matrix (CATEGORIZATION_ENGINE=vector)
+import math
+
+import numpy as np
+
+try:
+    from scipy import sparse # Optional: fast sparse x dense products (pip install scipy)
+except ImportError:
+    sparse = None
+
+from keyword_matcher import KeywordMatcher
+
+UNCATEGORIZED = 'Uncategorized'
+
+
+class VectorClassifier:
+    """
+    Scores articles against every sector at once. Each sector keyword is a term whose
+    weight is its inverse sector frequency (a keyword listed under several sectors says
+    less about any one of them), scaled so that an average keyword weighs 1.0.
+    An article becomes a sparse row of sublinear term frequencies (1 + log count), and
+    a whole batch is scored with one product  X (articles x terms) @ W (terms x sectors).
+
+    Raw scores are calibrated into per-sector probabilities with a softmax that also
+    contains an 'Uncategorized' option scoring `min_score`; the category is the most
+    probable option. With the defaults, one average keyword is not enough for a sector
+    and two are. Relevance uses the relevance keyword list exactly like the keyword engine.
+    """
+
+    def __init__(self, relevance_keywords: list, sector_keywords_map: dict, sectors: list = None,
+                 word_boundaries: bool = False, min_score: float = 1.5, sharpness: float = 2.0):
+        self.sectors = list(sectors or sector_keywords_map)
+        self.relevance_keywords = list(relevance_keywords)
+        self.min_score = min_score
+        self.sharpness = sharpness
+        sector_terms = {sector: {kw.lower() for kw in sector_keywords_map.get(sector, [])} for sector in self.sectors}
+        self.terms = sorted(set().union(*sector_terms.values())) if sector_terms else []
+        all_keywords = self.terms + [kw.lower() for kw in self.relevance_keywords]
+        self.matcher = KeywordMatcher(all_keywords, word_boundaries=word_boundaries)
+        # Matcher keyword index -> term column (relevance-only keywords have none)
+        term_column = {term: column for column, term in enumerate(self.terms)}
+        self._columns = np.array([term_column.get(keyword, -1) for keyword in self.matcher.keywords], dtype=np.int64)
+        self._relevance_index = {keyword: index for index, keyword in enumerate(self.matcher.keywords)}
+
+        weights = np.zeros((len(self.terms), len(self.sectors)))
+        for column, term in enumerate(self.terms):
+            holders = [s for s, sector in enumerate(self.sectors) if term in sector_terms[sector]]
+            idf = math.log(1 + len(self.sectors) / len(holders))
+            weights[column, holders] = idf
+        mean_weight = weights[weights > 0].mean() if weights.any() else 1.0
+        self.weights = weights / mean_weight
+
+    def _vectorize(self, texts: list) -> tuple:
+        """CSR arrays (data, indices, indptr) of the term frequencies plus each text's matched keyword indices."""
+        data, indices, indptr, matched = [], [], [0], []
+        for text in texts:
+            counts = self.matcher.count(text)
+            matched.append(counts)
+            for index, count in counts.items():
+                column = self._columns[index]
+                if column >= 0:
+                    indices.append(column)
+                    data.append(1.0 + math.log(count))
+            indptr.append(len(indices))
+        return np.array(data), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64), matched
+
+    def _scores(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+        """Sparse (articles x terms) @ dense (terms x sectors), with scipy or a numpy segment sum."""
+        rows = len(indptr) - 1
+        if sparse is not None:
+            matrix = sparse.csr_matrix((data, indices, indptr), shape=(rows, len(self.terms)))
+            return np.asarray(matrix @ self.weights)
+        scores = np.zeros((rows, len(self.sectors)))
+        if len(data):
+            row_ids = np.repeat(np.arange(rows), np.diff(indptr))
+            np.add.at(scores, row_ids, data[:, None] * self.weights[indices])
+        return scores
+
+    def calibrate(self, scores: np.ndarray) -> np.ndarray:
+        """Softmax over [sectors..., Uncategorized]; each row sums to 1."""
+        logits = np.hstack([scores, np.full((scores.shape[0], 1), self.min_score)]) * self.sharpness
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def analyze_batch(self, articles: list) -> list:
+        """
+        Classifies (title, text) pairs. Returns per article {'relevant', 'justification',
+        'category', 'sector_scores' (calibrated probabilities, Uncategorized included),
+        'raw_scores', 'matched_keywords'}; justification is the first matching relevance keyword.
+        """
+        data, indices, indptr, matched = self._vectorize([f"{title} {text}" for title, text in articles])
+        raw = self._scores(data, indices, indptr)
+        probabilities = self.calibrate(raw)
+        best = probabilities.argmax(axis=1) # First (MCCIA_SECTORS order) wins exact ties
+        options = self.sectors + [UNCATEGORIZED]
+        results = []
+        for row, counts in enumerate(matched):
+            justification = next((kw for kw in self.relevance_keywords if counts.get(self._relevance_index[kw.lower()])), None)
+            results.append({
+                'relevant': justification is not None,
+                'justification': justification,
+                'category': options[best[row]],
+                'sector_scores': {option: float(p) for option, p in zip(options, probabilities[row])},
+                'raw_scores': {sector: float(score) for sector, score in zip(self.sectors, raw[row])},
+                'matched_keywords': {self.matcher.keywords[index] for index in counts},
+            })
+        return results
@@ -0,0 +1,425 @@
+# Asynchronous, journaled writes to an article store
+import collections
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+import metrics
+from article_store import ArticleStore
+
+logger = logging.getLogger(__name__)
+
+WRITE_OPERATIONS = ('insert_article', 'upsert_articles', 'update_article', 'update_articles', 'delete_article',
+                    'delete_older_than')
+JOURNAL_COMPACT_BYTES = 8 * 1024 * 1024 # Rewrite the journal with only the pending writes beyond this size
+# SQLSTATE classes worth retrying: connection, transaction rollback (deadlock), resources, lock not available,
+# operator intervention (statement timeout) and system errors. Constraint, data and schema errors are permanent.
+TRANSIENT_SQLSTATE_CLASSES = ('08', '40', '53', '55', '57', '58', 'XX')
+
+_journals_lock = threading.Lock() # Serializes journal adoption between the stores of this process
+_journals_in_use = set() # Journal paths of the stores opened by this process
+_journal_numbers = itertools.count()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Exists, owned by someone else
+        return True
+    return True
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """
+    True for write errors a retry cannot fix: constraint violations (e.g. a duplicate
+    insert), unknown columns, bad values and other 4xx answers. Network errors, timeouts,
+    locks and 5xx answers are retried.
+    """
+    if isinstance(error, (sqlite3.IntegrityError, sqlite3.ProgrammingError, sqlite3.InterfaceError, sqlite3.DataError)):
+        return True
+    if isinstance(error, sqlite3.OperationalError): # "database is locked" is worth a retry, a missing column is not
+        return 'no such' in str(error) or 'no column' in str(error)
+    code = getattr(error, 'code', None) # postgrest APIError: SQLSTATE, PGRSTxxx or the HTTP status
+    if isinstance(code, str) and code.startswith('PGRST'):
+        return not code.startswith('PGRST0') # PGRST0xx: database connection errors
+    if isinstance(code, str) and len(code) == 5:
+        return code[:2] not in TRANSIENT_SQLSTATE_CLASSES
+    status = code if isinstance(code, int) else getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+class WriteBehindStore(ArticleStore):
+    """
+    Wraps an ArticleStore so that writes return immediately. A background thread applies
+    them in order, merging consecutive upserts into one call of up to `max_batch` rows,
+    and retries failures with exponential backoff and jitter (`base_delay` doubling up to
+    `max_delay`). An operation still failing after `max_attempts`, or failing with a
+    permanent error (see is_permanent_error; a merged upsert is then split so only the bad
+    writes are affected), goes to <journal>.failed.jsonl instead of being dropped. Those
+    are reported when a store opens and can be queued again with `replay_failed`.
+    `on_applied(operation, kwargs)` is called for every write once the store has applied it.
+
+    Every write is appended to a JSONL journal before it is queued, and a 'done' line
+    is appended once it has been applied. The journal is truncated whenever the queue
+    drains (or rewritten with just the pending writes once it grows large). Each store
+    has its own journal, <journal>.<pid>-<n>.jsonl, so processes sharing the cache
+    directory (a daemon and the dashboard's refreshes) never compact each other's writes.
+    Operations without a 'done' line in the journal of a process that is gone (it died,
+    or `close` timed out) are taken over by the next WriteBehindStore that opens.
+
+    Reads go to the wrapped store, except that `existing_urls` also reflects queued
+    writes, so an article that is still waiting to be stored is not processed twice.
+    """
+
+    def __init__(self, store: ArticleStore, journal_path: str, max_batch: int = 100, base_delay: float = 1.0,
+                 max_delay: float = 60.0, max_attempts: int = 10, on_applied=None):
+        self.store = store
+        self.on_applied = on_applied
+        stem = os.path.splitext(journal_path)[0]
+        self.failed_path = f"{stem}.failed.jsonl"
+        self.max_batch = max_batch
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._queue = collections.deque() # (seq, operation, kwargs), applied oldest first
+        self._seq = 0
+        self._closing = False
+        self._abandon = threading.Event() # Set when close() gives up: leave the rest to the journal
+        directory = os.path.dirname(journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _journals_lock:
+            self.journal_path = f"{stem}.{os.getpid()}-{next(_journal_numbers)}.jsonl"
+            _journals_in_use.add(self.journal_path)
+            adopted = self._adopt_orphaned_journals(stem)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            if adopted:
+                self._compact_journal() # The adopted writes are in this store's journal before their files go
+                for path in adopted:
+                    os.remove(path)
+        self._report_failed()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # --- Journal ---
+    def _adopt_orphaned_journals(self, stem: str) -> list:
+        """
+        Queues the pending writes from the journals of processes that are gone (and from the
+        single journal of older versions), oldest journal first, and returns their paths. Each
+        journal is first claimed by renaming it, so two processes starting together cannot
+        both replay it; a claim left by a process that died is adopted again in turn.
+        """
+        directory = os.path.dirname(stem) or '.'
+        pattern = re.compile(rf"{re.escape(os.path.basename(stem))}(?:\.(\d+)-\d+(?:\.claimed-\d+)?)?\.jsonl")
+        orphans = []
+        for name in os.listdir(directory):
+            match = pattern.fullmatch(name)
+            path = os.path.join(directory, name) if os.path.dirname(stem) else name
+            if not match or path in _journals_in_use:
+                continue
+            pid = match.group(1) and int(match.group(1))
+            if pid and pid != os.getpid() and _pid_alive(pid):
+                continue
+            try:
+                orphans.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        claimed, pending = [], []
+        for _, path in sorted(orphans):
+            claimed_path = f"{os.path.splitext(self.journal_path)[0]}.claimed-{len(claimed)}.jsonl"
+            try:
+                os.replace(path, claimed_path)
+            except FileNotFoundError: # Claimed by another process first
+                continue
+            claimed.append(claimed_path)
+            pending += self._read_journal(claimed_path)
+        for operation, kwargs in pending:
+            self._seq += 1
+            self._queue.append((self._seq, operation, kwargs))
+        if pending:
+            logger.warning(f"Replaying {len(pending)} database writes left in {len(claimed)} write journals by earlier runs.")
+            metrics.registry.inc('rss_write_behind_replayed_total', len(pending))
+        return claimed
+
+    def _read_journal(self, path: str) -> list:
+        """The (operation, kwargs) of a journal without a 'done' line, in order."""
+        pending = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError: # Torn last line of a crashed process
+                        continue
+                    if 'done' in entry:
+                        pending.pop(entry['done'], None)
+                    elif entry.get('op') in WRITE_OPERATIONS:
+                        pending[entry['seq']] = (entry['op'], entry['args'])
+        except OSError as e:
+            logger.error(f"Could not read write journal '{path}': {e}")
+        return [pending[seq] for seq in sorted(pending)]
+
+    def _report_failed(self):
+        try:
+            with open(self.failed_path, 'r', encoding='utf-8') as f:
+                failed = sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error(f"Could not read failed writes '{self.failed_path}': {e}")
+            return
+        if failed:
+            logger.warning(f"{failed} database writes failed for good in earlier runs and are kept in '{self.failed_path}'. "
+                           f"Fix their cause, then queue them again with `python rss_reader.py --replay-failed-writes`.")
+
+    def replay_failed(self) -> int:
+        """Moves the writes from the failed-writes file back into the queue (journaled first); returns how many."""
+        replaying_path = f"{self.failed_path}.{os.getpid()}.replaying"
+        try:
+            os.replace(self.failed_path, replaying_path) # Writes failing from now on start a new file
+        except FileNotFoundError:
+            return 0
+        entries = []
+        with open(replaying_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('op') in WRITE_OPERATIONS:
+                    entries.append((entry['op'], entry['args']))
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("WriteBehindStore is closed")
+            journal_entries = []
+            for operation, kwargs in entries:
+                self._seq += 1
+                journal_entries.append({'seq': self._seq, 'op': operation, 'args': kwargs})
+                self._queue.append((self._seq, operation, kwargs))
+            self._append_journal(journal_entries)
+            self._cond.notify_all()
+        os.remove(replaying_path)
+        return len(entries)
+
+    def _append_journal(self, entries: list):
+        """Called with the lock held."""
+        try:
+            self._journal.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            self._journal.flush()
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not append to write journal '{self.journal_path}': {e}")
+
+    def _compact_journal(self):
+        """Rewrites the journal with only the queued writes (empty when nothing is pending). Called with the lock held."""
+        tmp_path = f"{self.journal_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for seq, operation, kwargs in self._queue:
+                    f.write(json.dumps({'seq': seq, 'op': operation, 'args': kwargs}) + '\n')
+            self._journal.close()
+            os.replace(tmp_path, self.journal_path)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        except OSError as e:
+            logger.error(f"Could not compact write journal '{self.journal_path}': {e}")
+
+    def _enqueue(self, operation: str, **kwargs):
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("WriteBehindStore is closed")
+            self._seq += 1
+            self._append_journal([{'seq': self._seq, 'op': operation, 'args': kwargs}])
+            self._queue.append((self._seq, operation, kwargs))
+            self._cond.notify_all()
+
+    # --- Writer thread ---
+    def _next_batch(self) -> list:
+        """Head of the queue: one operation, or a run of upserts with the same columns and distinct urls."""
+        first = self._queue[0]
+        if first[1] != 'upsert_articles':
+            return [first]
+        batch, urls = [first], {record['url'] for record in first[2]['records']}
+        columns = {frozenset(record) for record in first[2]['records']}
+        rows = len(first[2]['records'])
+        for item in list(self._queue)[1:]:
+            records = item[2].get('records', [])
+            if (item[1] != 'upsert_articles' or rows + len(records) > self.max_batch
+                    or {frozenset(record) for record in records} != columns or urls & {record['url'] for record in records}):
+                break
+            batch.append(item)
+            urls.update(record['url'] for record in records)
+            rows += len(records)
+        return batch
+
+    def _apply(self, batch: list):
+        operation = batch[0][1]
+        with metrics.registry.time('rss_write_behind_seconds', operation=operation):
+            if operation == 'upsert_articles':
+                self.store.upsert_articles([record for _, _, kwargs in batch for record in kwargs['records']])
+            else:
+                getattr(self.store, operation)(**batch[0][2])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue or self._abandon.is_set():
+                    return
+                batch = self._next_batch() # Stays queued (visible to existing_urls) until applied
+            applied = self._apply_with_retries(batch)
+            with self._cond:
+                if applied is None: # close() gave up while retrying: the journal keeps the batch
+                    return
+                for _ in batch:
+                    self._queue.popleft()
+                self._append_journal([{'done': seq} for seq, _, _ in batch])
+                if not self._queue or self._journal.tell() > JOURNAL_COMPACT_BYTES:
+                    self._compact_journal()
+                self._cond.notify_all()
+            if self.on_applied is not None:
+                for _, operation, kwargs in applied:
+                    try:
+                        self.on_applied(operation, kwargs)
+                    except Exception as e:
+                        logger.error(f"on_applied callback failed for {operation}: {e}")
+
+    def _apply_with_retries(self, batch: list):
+        """
+        Returns the writes of `batch` that were applied (the others went to the failed-writes
+        file), or None if close() gave up while waiting for a retry.
+        """
+        operation = batch[0][1]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._apply(batch)
+                return batch
+            except Exception as e:
+                metrics.registry.inc('rss_db_errors_total', operation=operation)
+                permanent = is_permanent_error(e)
+                if permanent and len(batch) > 1:
+                    # A merged upsert fails as a whole: apply its writes one by one so only the bad ones are set aside
+                    logger.warning(f"Database {operation} of {len(batch)} merged writes failed: {e}. Applying them one by one.")
+                    applied = []
+                    for item in batch:
+                        item_applied = self._apply_with_retries([item])
+                        if item_applied is None:
+                            return None
+                        applied += item_applied
+                    return applied
+                if permanent or attempt == self.max_attempts:
+                    reason = "with a permanent error" if permanent else f"after {attempt} attempts"
+                    logger.error(f"Giving up on {operation} ({len(batch)} queued writes) {reason}: {e}. "
+                                 f"Saved to '{self.failed_path}'.")
+                    self._dead_letter(batch, str(e))
+                    return []
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                logger.warning(f"Database {operation} failed (attempt {attempt}/{self.max_attempts}): {e}. Retrying in {delay:.1f}s.")
+                metrics.registry.inc('rss_db_retries_total', operation=operation)
+                if self._abandon.wait(delay):
+                    return None
+        return []
+
+    def _dead_letter(self, batch: list, error: str):
+        metrics.registry.inc('rss_write_behind_failed_total', len(batch))
+        lines = ''.join(json.dumps({'op': operation, 'args': kwargs, 'error': error, 'failed_at': time.time()}) + '\n'
+                        for _, operation, kwargs in batch)
+        try:
+            with open(self.failed_path, 'a', encoding='utf-8') as f:
+                f.write(lines) # One append, so lines of concurrent writers do not interleave
+        except OSError as e:
+            logger.error(f"Could not write failed database writes to '{self.failed_path}': {e}")
+
+    # --- Control ---
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until every queued write has been applied; False if `timeout` expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Flushes for up to `timeout` seconds and stops the writer. Writes that could not be
+        applied in time stay in the journal and are replayed by the next run.
+        """
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closing = True
+            if not flushed:
+                self._abandon.set()
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        with self._cond:
+            self._journal.close()
+        if not flushed:
+            logger.warning(f"{self.pending} database writes not applied yet; they stay in '{self.journal_path}' for the next run.")
+            return False
+        try:
+            os.remove(self.journal_path) # Empty once everything is applied
+        except OSError:
+            pass
+        with _journals_lock:
+            _journals_in_use.discard(self.journal_path)
+        return True
+
+    # --- ArticleStore ---
+    def existing_urls(self, urls) -> set:
+        urls = set(urls)
+        queued = {} # url -> stored after the queued writes (True) or deleted (False)
+        with self._cond:
+            for _, operation, kwargs in self._queue:
+                if operation == 'upsert_articles':
+                    queued.update((record['url'], True) for record in kwargs['records'] if record['url'] in urls)
+                elif operation == 'insert_article' and kwargs['record']['url'] in urls:
+                    queued[kwargs['record']['url']] = True
+                elif operation == 'delete_article' and kwargs['url'] in urls:
+                    queued[kwargs['url']] = False
+        found = self.store.existing_urls(urls - set(queued)) if urls - set(queued) else set()
+        return found | {url for url, stored in queued.items() if stored}
+
+    def insert_article(self, record: dict):
+        self._enqueue('insert_article', record=record)
+
+    def upsert_articles(self, records: list) -> int:
+        if records:
+            self._enqueue('upsert_articles', records=list(records))
+        return len(records)
+
+    def update_article(self, url: str, fields: dict):
+        self._enqueue('update_article', url=url, fields=fields)
+
+    def update_articles(self, urls: list, fields: dict):
+        self._enqueue('update_articles', urls=list(urls), fields=fields)
+        return None # Not known until the update runs
+
+    def delete_article(self, url: str):
+        self._enqueue('delete_article', url=url)
+        return None # Not known until the delete runs
+
+    def delete_older_than(self, cutoff):
+        self._enqueue('delete_older_than', cutoff=cutoff if isinstance(cutoff, str) else cutoff.isoformat())
+        return None
+
+    def query_articles(self, columns=None, limit: int = None, offset: int = 0, **filters) -> list:
+        return self.store.query_articles(columns, limit=limit, offset=offset, **filters)
+
+    def count_articles(self, **filters) -> int:
+        return self.store.count_articles(**filters)